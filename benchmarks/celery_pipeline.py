@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the Celery audio pipeline (STT -> LLM -> TTS chain)
+
+Runs closed-loop load - C clients, each submitting process_audio and
+waiting for its result before the next - at several concurrency levels,
+and reports turns/s and latency per level. Throughput rises with C until
+the worker slots are saturated, then flattens while latency grows:
+
+    per-stage layout (one K-slot worker per stage queue): K / slowest stage
+    shared layout (one K-slot worker on every queue):     K / (stt + llm + tts)
+
+By default the workers are Celery thread-pool workers in
+this process on an in-memory broker, and the providers are fakes with the
+given latencies - no Redis or API keys needed. With --external, turns go to
+the configured REDIS_URL and whatever workers are running there, using
+--audio as the utterance.
+
+    python benchmarks/celery_pipeline.py --workers 4
+    python benchmarks/celery_pipeline.py --workers 4 --layout shared --levels 1,2,4,8,16
+    python benchmarks/celery_pipeline.py --external --audio sample.wav --levels 1,4,16
+
+The old process_audio waited on process_ai_response with .get() inside the
+worker: once C >= K every slot held a waiting parent and no slot was left
+for the children, so the queue stalled. The chain has no such cliff.
+"""
+
+import argparse
+import base64
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "bench")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+
+
+
+def install_fake_providers(stt_delay, llm_delay, tts_delay):
+    """Swap the SDK clients in server.tasks.audio_processing for fixed-latency fakes"""
+    from server.services import celery_app as celery_module
+    from server.services import tracing
+    from server.tasks import audio_processing
+
+    words = ["today", "is", "tuesday", "i", "think"]
+
+    def transcribe_file(payload, options):
+        time.sleep(stt_delay)
+        alternative = SimpleNamespace(
+            transcript="Today is Tuesday, I think.",
+            words=[
+                SimpleNamespace(word=word, start=0.4 * position, end=0.4 * position + 0.3, confidence=0.95)
+                for position, word in enumerate(words)
+            ]
+        )
+        return SimpleNamespace(results=SimpleNamespace(channels=[SimpleNamespace(alternatives=[alternative])]))
+
+    def create(**kwargs):
+        time.sleep(llm_delay)
+        message = SimpleNamespace(content="Thank you, that is very helpful. What month is it now?")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def generate(**kwargs):
+        time.sleep(tts_delay)
+        return b"\xff\xfb" * 4000
+
+    prerecorded = SimpleNamespace(v=lambda version: SimpleNamespace(transcribe_file=transcribe_file))
+    audio_processing.deepgram = SimpleNamespace(listen=SimpleNamespace(prerecorded=prerecorded))
+    audio_processing.openai = SimpleNamespace(ChatCompletion=SimpleNamespace(create=create))
+    audio_processing.elevenlabs = SimpleNamespace(generate=generate)
+    audio_processing.publish_to_session = lambda session_id, *messages: 1
+
+    # No Redis here: keep spans local and skip job notifications
+    tracing.enable_remote_spans = lambda *args, **kwargs: None
+    celery_module.publish_job_done = lambda *args: None
+
+
+def start_workers(stack, celery_app, layout, slots):
+    """In-process thread-pool workers on the memory broker"""
+    from celery.contrib.testing.worker import start_worker
+    from server.services.task_queues import QUEUE_INTERACTIVE, STAGE_QUEUES
+
+    if layout == "shared":
+        groups = {"all": [QUEUE_INTERACTIVE, *STAGE_QUEUES]}
+    else:
+        groups = {"stt": [QUEUE_INTERACTIVE, "stt"], "llm": ["llm"], "tts": ["tts"]}
+
+    for name, queues in groups.items():
+        stack.enter_context(start_worker(
+            celery_app,
+            pool="threads",
+            concurrency=slots,
+            queues=queues,
+            hostname=f"{name}@bench",
+            perform_ping_check=False,
+            shutdown_timeout=30
+        ))
+
+
+def run_level(process_audio, audio, clients, turns_per_client, timeout):
+    """Closed loop: each client submits a turn and waits for it before the next"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(index):
+        for turn in range(turns_per_client):
+            started = time.perf_counter()
+            try:
+                result = process_audio.delay(f"bench_{index}", audio).get(timeout=timeout, interval=0.005)
+                if result.get("status") != "success":
+                    raise RuntimeError(result)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Slots per worker (K)")
+    parser.add_argument("--layout", choices=("per-stage", "shared"), default="per-stage")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Client concurrency levels to sweep")
+    parser.add_argument("--turns", type=int, default=10, help="Turns per client per level")
+    parser.add_argument("--stt-delay", type=float, default=0.3)
+    parser.add_argument("--llm-delay", type=float, default=0.8)
+    parser.add_argument("--tts-delay", type=float, default=0.4)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for one turn")
+    parser.add_argument("--external", action="store_true", help="Use REDIS_URL and running workers")
+    parser.add_argument("--audio", help="Utterance to send (required with --external)")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+
+    if args.external:
+        if not args.audio:
+            parser.error("--external needs --audio")
+        with open(args.audio, "rb") as f:
+            audio = base64.b64encode(f.read()).decode("ascii")
+    else:
+        audio = base64.b64encode(b"\x00" * 32000).decode("ascii")
+
+    from server.services.celery_app import celery_app
+
+    with ExitStack() as stack:
+        if args.external:
+            print(f"🔧 External workers via {celery_app.conf.broker_url}")
+            bound = None
+        else:
+            celery_app.conf.update(broker_url="memory://", result_backend="cache+memory://")
+            install_fake_providers(args.stt_delay, args.llm_delay, args.tts_delay)
+            start_workers(stack, celery_app, args.layout, args.workers)
+            stages = (args.stt_delay, args.llm_delay, args.tts_delay)
+            bound = args.workers / (max(stages) if args.layout == "per-stage" else sum(stages))
+            print(
+                f"🔧 {args.layout} layout, K={args.workers} slots per worker, stage delays "
+                f"stt={args.stt_delay}s llm={args.llm_delay}s tts={args.tts_delay}s "
+                f"-> saturation at ~{bound:.2f} turns/s"
+            )
+
+        from server.tasks.audio_processing import process_audio
+
+        print(f"{'clients':>8} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for clients in levels:
+            latencies, errors, elapsed = run_level(process_audio, audio, clients, args.turns, args.timeout)
+            throughput = len(latencies) / elapsed if elapsed else 0.0
+            p50 = percentile(latencies, 0.5) * 1000 if latencies else float("nan")
+            p95 = percentile(latencies, 0.95) * 1000 if latencies else float("nan")
+            note = "  saturated" if bound and throughput >= 0.9 * bound else ""
+            print(f"{clients:>8} {throughput:>8.2f} {p50:>8.0f} {p95:>8.0f} {len(errors):>7}{note}")
+            if errors:
+                print(f"         first error: {errors[0][:120]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Fake provider server for offline benchmarks and regression runs
+
+One aiohttp server that imitates every upstream endpoint the app calls:
+
+    POST /v1/listen                                    Deepgram prerecorded STT
+    WS   /v1/listen                                    Deepgram live STT (interim + final Results)
+    POST /openai/deployments/{name}/chat/completions   Azure OpenAI, streaming (SSE) or not
+    POST /v1/chat/completions                          OpenAI, same responses
+    POST /v1/text-to-speech/{voice}[/stream]           ElevenLabs TTS (chunked MP3-sized bytes)
+    POST /v1/streaming.new|start|task|interrupt|stop   HeyGen streaming avatar
+    GET  /v1/avatars                                   HeyGen avatar list
+
+Each provider (stt, stt_live, llm, tts, heygen) has a latency distribution
+(lognormal around a median), an error rate (500/503), a rate-limit rate
+(429 with Retry-After, provider-shaped body) and an optional concurrency
+quota past which requests get 429 - like a real per-key limit. Random
+draws use --seed, so runs are reproducible.
+
+    python benchmarks/fake_providers.py --port 8900
+    python benchmarks/fake_providers.py --port 8900 --profile profiles/slow_llm.json --seed 7
+    python benchmarks/fake_providers.py --llm-latency 1.2 --error-rate 0.02 --rate-limit-rate 0.05
+
+Point the app at it (see env.example, "Offline providers"):
+
+    DEEPGRAM_BASE_URL=http://127.0.0.1:8900
+    DEEPGRAM_LIVE_URL=ws://127.0.0.1:8900/v1/listen
+    AZURE_OPEN_AI_ENDPOINT=http://127.0.0.1:8900
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8900
+    HEYGEN_BASE_URL=http://127.0.0.1:8900
+
+Control endpoints:
+
+    GET  /_fake/stats    requests, errors, 429s and in-flight per provider
+    GET  /_fake/config   current profiles
+    POST /_fake/config   {"llm": {"latency": 2.0}, ...} - change profiles mid-run
+    POST /_fake/reset    zero the stats
+
+A profile file is the same JSON as POST /_fake/config.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+
+from aiohttp import WSMsgType, web
+
+PROVIDERS = ("stt", "stt_live", "llm", "tts", "heygen")
+
+DEFAULT_PROFILES = {
+    # latency: median seconds (STT/LLM: to the first result/token; TTS: to the first byte)
+    "stt": {"latency": 0.3, "jitter": 0.3, "error_rate": 0.0, "rate_limit_rate": 0.0, "max_concurrent": 0},
+    "stt_live": {"latency": 0.15, "jitter": 0.3, "error_rate": 0.0, "rate_limit_rate": 0.0, "max_concurrent": 0},
+    "llm": {"latency": 0.4, "jitter": 0.4, "error_rate": 0.0, "rate_limit_rate": 0.0, "max_concurrent": 0,
+            "tokens_per_second": 60.0},
+    "tts": {"latency": 0.25, "jitter": 0.3, "error_rate": 0.0, "rate_limit_rate": 0.0, "max_concurrent": 0,
+            "realtime_factor": 5.0},
+    "heygen": {"latency": 0.1, "jitter": 0.3, "error_rate": 0.0, "rate_limit_rate": 0.0, "max_concurrent": 0}
+}
+
+# Patient answers the fake STT cycles through, in assessment order
+TRANSCRIPTS = (
+    "Hello doctor, my name is Margaret and I'm feeling fine, thank you.",
+    "I think it's Tuesday today.",
+    "It's October, the seventeenth, twenty twenty six.",
+    "I had porridge and a cup of tea for breakfast.",
+    "Apple, table, penny.",
+    "Seven dollars.",
+    "Dog, cat, horse, cow, lion, tiger, um, elephant, sheep.",
+    "Apple, um, table, and the last one was penny.",
+    "I would post it in the mailbox.",
+    "No, I think that's everything, thank you."
+)
+
+REPLY = (
+    "Thank you, that's very helpful. You're doing really well so far. "
+    "Let's move on to the next question now, and please take your time."
+)
+
+# 128 kbit/s MP3, and about 15 spoken characters per second
+TTS_BYTES_PER_SECOND = 16000
+SPOKEN_CHARS_PER_SECOND = 15.0
+TTS_CHUNK_BYTES = 4096
+# 16-bit mono 16 kHz, what the browser recorder sends
+LIVE_AUDIO_BYTES_PER_SECOND = 32000
+
+RATE_LIMIT_BODIES = {
+    "stt": {"err_code": "TOO_MANY_REQUESTS", "err_msg": "Too many requests. Please try again later."},
+    "stt_live": {"err_code": "TOO_MANY_REQUESTS", "err_msg": "Too many concurrent streams."},
+    "llm": {"error": {"code": "429", "message": "Requests to the ChatCompletions_Create Operation have exceeded call rate limit."}},
+    "tts": {"detail": {"status": "too_many_concurrent_requests", "message": "Too many concurrent requests."}},
+    "heygen": {"code": 10004, "message": "Rate limit exceeded"}
+}
+
+
+class FakeProviders:
+    """Profiles, random source and per-provider counters shared by every handler"""
+
+    def __init__(self, profiles=None, seed=None):
+        self.profiles = json.loads(json.dumps(DEFAULT_PROFILES))
+        self.update(profiles or {})
+        self.random = random.Random(seed)
+        self.transcript_index = 0
+        self.reset()
+
+    def update(self, profiles):
+        for provider, values in profiles.items():
+            if provider not in self.profiles:
+                raise ValueError(f"Unknown provider {provider!r} (expected one of {', '.join(PROVIDERS)})")
+            self.profiles[provider].update(values)
+
+    def reset(self):
+        self.stats = {provider: defaultdict(int) for provider in PROVIDERS}
+        self.in_flight = defaultdict(int)
+
+    def delay(self, provider, scale=1.0):
+        """One latency draw: lognormal around the median, so the tail is realistic"""
+        profile = self.profiles[provider]
+        median = profile["latency"] * scale
+        if median <= 0:
+            return 0.0
+        return median * math.exp(self.random.gauss(0.0, profile["jitter"]))
+
+    def next_transcript(self):
+        text = TRANSCRIPTS[self.transcript_index % len(TRANSCRIPTS)]
+        self.transcript_index += 1
+        return text
+
+    def admit(self, provider):
+        """
+        Decide the fate of one request before it is served
+
+        Returns:
+            Optional[web.Response]: 429/5xx to send instead, or None to serve it
+        """
+        profile = self.profiles[provider]
+        stats = self.stats[provider]
+        stats["requests"] += 1
+
+        quota = profile.get("max_concurrent") or 0
+        if (quota and self.in_flight[provider] >= quota) or self.random.random() < profile["rate_limit_rate"]:
+            stats["rate_limited"] += 1
+            return web.json_response(RATE_LIMIT_BODIES[provider], status=429, headers={"Retry-After": "1"})
+        if self.random.random() < profile["error_rate"]:
+            stats["errors"] += 1
+            status = self.random.choice((500, 503))
+            return web.json_response({"error": {"message": f"Fake upstream error {status}"}}, status=status)
+        return None
+
+    def begin(self, provider):
+        self.in_flight[provider] += 1
+        self.stats[provider]["peak_in_flight"] = max(self.stats[provider]["peak_in_flight"], self.in_flight[provider])
+
+    def end(self, provider):
+        self.in_flight[provider] -= 1
+        self.stats[provider]["served"] += 1
+
+
+def words_for(text, start=0.0, seconds_per_word=0.35):
+    """Deepgram word objects with plausible timings"""
+    words = []
+    for position, word in enumerate(text.split()):
+        begin = start + position * seconds_per_word
+        words.append({
+            "word": word.strip(".,?!").lower(),
+            "punctuated_word": word,
+            "start": round(begin, 3),
+            "end": round(begin + seconds_per_word * 0.8, 3),
+            "confidence": 0.97
+        })
+    return words
+
+
+def deepgram_result(text):
+    return {
+        "metadata": {"request_id": str(uuid.uuid4()), "duration": round(len(text.split()) * 0.35, 3)},
+        "results": {"channels": [{"alternatives": [{
+            "transcript": text,
+            "confidence": 0.97,
+            "words": words_for(text)
+        }]}]}
+    }
+
+
+def served(provider):
+    """Admission, in-flight accounting and errors around a handler"""
+    def decorate(handler):
+        async def wrapper(request):
+            fakes = request.app["fakes"]
+            rejection = fakes.admit(provider)
+            if rejection is not None:
+                return rejection
+            fakes.begin(provider)
+            try:
+                return await handler(request, fakes)
+            finally:
+                fakes.end(provider)
+        return wrapper
+    return decorate
+
+
+@served("stt")
+async def prerecorded_stt(request, fakes):
+    audio = await request.read()
+    await asyncio.sleep(fakes.delay("stt"))
+    if len(audio) < 1000:
+        return web.json_response(deepgram_result(""))
+    return web.json_response(deepgram_result(fakes.next_transcript()))
+
+
+async def live_stt(request):
+    fakes = request.app["fakes"]
+    rejection = fakes.admit("stt_live")
+    if rejection is not None:
+        return rejection
+
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    fakes.begin("stt_live")
+    text = fakes.next_transcript()
+    words = text.split()
+    received = 0
+    interim_sent = 0
+
+    async def send_results(count, is_final):
+        spoken = " ".join(words[:count])
+        await ws.send_str(json.dumps({
+            "type": "Results",
+            "is_final": is_final,
+            "speech_final": is_final,
+            "start": 0.0,
+            "duration": round(received / LIVE_AUDIO_BYTES_PER_SECOND, 3),
+            "channel": {"alternatives": [{
+                "transcript": spoken,
+                "confidence": 0.97,
+                "words": words_for(spoken) if is_final else []
+            }]}
+        }))
+
+    try:
+        async for message in ws:
+            if message.type == WSMsgType.BINARY:
+                received += len(message.data)
+                # An interim hypothesis roughly every half second of audio
+                due = min(len(words) - 1, received // (LIVE_AUDIO_BYTES_PER_SECOND // 2))
+                if due > interim_sent:
+                    interim_sent = due
+                    await send_results(due, False)
+            elif message.type == WSMsgType.TEXT:
+                if json.loads(message.data).get("type") == "CloseStream":
+                    await asyncio.sleep(fakes.delay("stt_live"))
+                    await send_results(len(words) if received else 0, True)
+                    break
+            else:
+                break
+    finally:
+        fakes.end("stt_live")
+        await ws.close()
+    return ws
+
+
+def completion_chunk(completion_id, model, delta=None, finish_reason=None, usage=None):
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [] if usage else [{"index": 0, "delta": delta or {}, "finish_reason": finish_reason}]
+    }
+    if usage:
+        chunk["usage"] = usage
+    return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+
+@served("llm")
+async def chat_completions(request, fakes):
+    body = await request.json()
+    model = request.match_info.get("deployment") or body.get("model", "gpt-4")
+    max_tokens = body.get("max_tokens") or 200
+    # Roughly one token per word piece - cut at max_tokens like the real API
+    tokens = [word + " " for word in REPLY.split()][:max_tokens]
+    prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+        "prompt_tokens_details": {"cached_tokens": 0}
+    }
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    token_seconds = 1.0 / fakes.profiles["llm"]["tokens_per_second"]
+
+    await asyncio.sleep(fakes.delay("llm"))
+
+    if not body.get("stream"):
+        await asyncio.sleep(token_seconds * len(tokens))
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop" if len(tokens) < max_tokens else "length"
+            }],
+            "usage": usage
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    try:
+        await response.write(completion_chunk(completion_id, model, {"role": "assistant", "content": ""}))
+        for token in tokens:
+            await response.write(completion_chunk(completion_id, model, {"content": token}))
+            await asyncio.sleep(token_seconds)
+        await response.write(completion_chunk(completion_id, model, finish_reason="stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await response.write(completion_chunk(completion_id, model, usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+    except (ConnectionResetError, asyncio.CancelledError):
+        # The client hung up (barge-in) - stop generating, like the real API
+        fakes.stats["llm"]["cancelled"] += 1
+    return response
+
+
+@served("tts")
+async def text_to_speech(request, fakes):
+    body = await request.json()
+    text = body.get("text", "")
+    audio_bytes = int(len(text) / SPOKEN_CHARS_PER_SECOND * TTS_BYTES_PER_SECOND)
+    # Rendered faster than real time; first byte after the latency draw
+    chunk_seconds = TTS_CHUNK_BYTES / TTS_BYTES_PER_SECOND / fakes.profiles["tts"]["realtime_factor"]
+
+    await asyncio.sleep(fakes.delay("tts"))
+    response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+    await response.prepare(request)
+    frame = b"\xff\xfb\x90\x64" + b"\x00" * (TTS_CHUNK_BYTES - 4)
+    try:
+        for offset in range(0, audio_bytes, TTS_CHUNK_BYTES):
+            await response.write(frame[:min(TTS_CHUNK_BYTES, audio_bytes - offset)])
+            await asyncio.sleep(chunk_seconds)
+        await response.write_eof()
+    except (ConnectionResetError, asyncio.CancelledError):
+        fakes.stats["tts"]["cancelled"] += 1
+    return response
+
+
+def heygen_ok(data=None):
+    return web.json_response({"code": 100, "data": data or {}, "message": "success"})
+
+
+@served("heygen")
+async def heygen_new(request, fakes):
+    await asyncio.sleep(fakes.delay("heygen"))
+    session_id = str(uuid.uuid4())
+    return heygen_ok({
+        "session_id": session_id,
+        "sdp": {"type": "offer", "sdp": "v=0\r\no=- 0 0 IN IP4 127.0.0.1\r\ns=fake\r\nt=0 0\r\n"},
+        "ice_servers2": [],
+        "access_token": f"fake-{session_id}",
+        "url": "wss://127.0.0.1/fake-livekit"
+    })
+
+
+@served("heygen")
+async def heygen_task(request, fakes):
+    body = await request.json()
+    await asyncio.sleep(fakes.delay("heygen"))
+    duration_ms = int(len(body.get("text", "")) / SPOKEN_CHARS_PER_SECOND * 1000)
+    return heygen_ok({"task_id": uuid.uuid4().hex, "duration_ms": duration_ms})
+
+
+@served("heygen")
+async def heygen_simple(request, fakes):
+    await asyncio.sleep(fakes.delay("heygen"))
+    return heygen_ok()
+
+
+@served("heygen")
+async def heygen_avatars(request, fakes):
+    await asyncio.sleep(fakes.delay("heygen"))
+    return heygen_ok({"avatars": [{"avatar_id": "fake_doctor", "avatar_name": "Fake Doctor"}]})
+
+
+async def listen(request):
+    # Deepgram serves both STT modes on /v1/listen
+    if request.headers.get("Upgrade", "").lower() == "websocket":
+        return await live_stt(request)
+    return await prerecorded_stt(request)
+
+
+async def get_stats(request):
+    fakes = request.app["fakes"]
+    return web.json_response({
+        provider: dict(stats, in_flight=fakes.in_flight[provider])
+        for provider, stats in fakes.stats.items()
+    })
+
+
+async def get_config(request):
+    return web.json_response(request.app["fakes"].profiles)
+
+
+async def post_config(request):
+    try:
+        request.app["fakes"].update(await request.json())
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response(request.app["fakes"].profiles)
+
+
+async def post_reset(request):
+    request.app["fakes"].reset()
+    return web.json_response({"reset": True})
+
+
+def create_app(profiles=None, seed=None) -> web.Application:
+    """The fake provider app; also usable in-process with aiohttp's AppRunner"""
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["fakes"] = FakeProviders(profiles, seed)
+    app.router.add_route("*", "/v1/listen", listen)
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/text-to-speech/{voice}", text_to_speech)
+    app.router.add_post("/v1/text-to-speech/{voice}/stream", text_to_speech)
+    app.router.add_post("/v1/streaming.new", heygen_new)
+    app.router.add_post("/v1/streaming.task", heygen_task)
+    for name in ("start", "interrupt", "stop"):
+        app.router.add_post(f"/v1/streaming.{name}", heygen_simple)
+    app.router.add_get("/v1/avatars", heygen_avatars)
+    app.router.add_get("/_fake/stats", get_stats)
+    app.router.add_get("/_fake/config", get_config)
+    app.router.add_post("/_fake/config", post_config)
+    app.router.add_post("/_fake/reset", post_reset)
+    return app
+
+
+def profiles_from_args(args):
+    profiles = {}
+    if args.profile:
+        with open(args.profile) as f:
+            profiles = json.load(f)
+
+    overrides = {
+        "stt": {"latency": args.stt_latency},
+        "stt_live": {"latency": args.stt_live_latency},
+        "llm": {"latency": args.llm_latency, "tokens_per_second": args.llm_tokens_per_second},
+        "tts": {"latency": args.tts_latency},
+        "heygen": {"latency": args.heygen_latency}
+    }
+    for provider in PROVIDERS:
+        values = {name: value for name, value in overrides[provider].items() if value is not None}
+        for name in ("jitter", "error_rate", "rate_limit_rate", "max_concurrent"):
+            value = getattr(args, name)
+            if value is not None:
+                values[name] = value
+        profiles.setdefault(provider, {}).update(values)
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency/error draws")
+    parser.add_argument("--profile", help="JSON file: {provider: {latency, jitter, error_rate, ...}}")
+    parser.add_argument("--stt-latency", type=float)
+    parser.add_argument("--stt-live-latency", type=float)
+    parser.add_argument("--llm-latency", type=float, help="Median seconds to the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float)
+    parser.add_argument("--tts-latency", type=float, help="Median seconds to the first audio byte")
+    parser.add_argument("--heygen-latency", type=float)
+    parser.add_argument("--jitter", type=float, help="Lognormal sigma for every provider")
+    parser.add_argument("--error-rate", type=float, help="Share of requests answered 500/503, every provider")
+    parser.add_argument("--rate-limit-rate", type=float, help="Share of requests answered 429, every provider")
+    parser.add_argument("--max-concurrent", type=int, help="Per-provider concurrency quota (429 beyond it)")
+    args = parser.parse_args()
+
+    app = create_app(profiles_from_args(args), args.seed)
+    print(f"🧪 Fake providers on http://{args.host}:{args.port}")
+    for provider, profile in app["fakes"].profiles.items():
+        print(f"   {provider:<9} {json.dumps(profile)}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
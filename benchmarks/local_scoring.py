@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Local scorer benchmark for the objective assessment items
+
+Generates synthetic patient answers for every scored stage - correct,
+partly correct and wrong, with fillers, self-corrections, plurals and STT
+misspellings - scores them with server.tasks.assessment_scoring and reports
+per-answer latency and agreement with the expected points.
+
+    python benchmarks/local_scoring.py --answers 5000
+    python benchmarks/local_scoring.py --answers 20000 --seed 7
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.tasks.assessment_scoring import score_answer
+from server.tasks.scoring_lexicon import ANIMALS, MONTHS, RECALL_WORDS, WEEKDAYS
+
+FILLERS = ["um", "uh", "well", "let me think", "I think", "hmm", "oh", "you know"]
+# Misspellings a speech recogniser plausibly produces
+STT_SLIPS = {
+    "wednesday": "wensday", "thursday": "thursay", "february": "febuary",
+    "saturday": "saterday", "elephant": "elefant", "penny": "penney",
+    "table": "tabel", "giraffe": "girafe", "kangaroo": "kangeroo",
+    "squirrel": "squirel", "october": "octobre", "tiger": "tigre"
+}
+DATE_NAMES = {
+    1: "first", 2: "second", 3: "third", 15: "fifteenth", 16: "sixteenth", 17: "seventeenth",
+    18: "eighteenth", 20: "twentieth", 21: "twenty first", 22: "twenty second"
+}
+
+
+def noisy(rng, word, slip_rate):
+    return STT_SLIPS.get(word, word) if rng.random() < slip_rate else word
+
+
+def with_filler(rng, text):
+    return f"{rng.choice(FILLERS)}, {text}" if rng.random() < 0.5 else text
+
+
+def weekday_answer(rng, now, slip_rate):
+    today = now.weekday()
+    kind = rng.choice(["correct", "adjacent", "wrong", "corrected", "unsure"])
+    if kind == "unsure":
+        return "I'm not sure, I don't know", 0
+    if kind == "corrected":
+        wrong = WEEKDAYS[(today + 3) % 7]
+        return f"{wrong.title()}? No, wait, it's {noisy(rng, WEEKDAYS[today], slip_rate)}", 2
+    day, points = {
+        "correct": (today, 2),
+        "adjacent": ((today + rng.choice([1, 6])) % 7, 1),
+        "wrong": ((today + rng.choice([2, 3, 4, 5])) % 7, 0)
+    }[kind]
+    return with_filler(rng, f"it's {noisy(rng, WEEKDAYS[day], slip_rate)} today"), points
+
+
+def date_answer(rng, now, slip_rate):
+    month = MONTHS[now.month - 1]
+    parts, points = [], 0
+    if rng.random() < 0.8:
+        parts.append(noisy(rng, month, slip_rate).title())
+        points += 1
+    else:
+        parts.append(MONTHS[(now.month + 2) % 12].title())
+    if rng.random() < 0.7:
+        day = now.day
+        points += 1
+    else:
+        day = (now.day + 9) % 28 + 1
+    parts.append(DATE_NAMES.get(day, str(day)) if rng.random() < 0.3 else f"{day}")
+    if rng.random() < 0.7:
+        parts.append(rng.choice([str(now.year), "twenty twenty six" if now.year == 2026 else str(now.year)]))
+        points += 1
+    return with_filler(rng, " ".join(parts)), points
+
+
+def recall_answer(rng, now, slip_rate):
+    words = [noisy(rng, word, slip_rate) for word in RECALL_WORDS if rng.random() < 0.6]
+    distractors = rng.sample(["chair", "orange", "coin", "pen", "desk"], rng.randint(0, 2))
+    spoken = words + distractors
+    rng.shuffle(spoken)
+    if not spoken:
+        return "I can't remember any of them", 0
+    return with_filler(rng, " and ".join(spoken)), len(words)
+
+
+def calculation_answer(rng, now, slip_rate):
+    kind = rng.choice(["digit", "word", "sentence", "wrong", "corrected"])
+    if kind == "digit":
+        return "$7", 1
+    if kind == "word":
+        return with_filler(rng, "seven dollars"), 1
+    if kind == "sentence":
+        return "ten minus three, that leaves seven", 1
+    if kind == "wrong":
+        return with_filler(rng, f"{rng.choice(['six', 'eight', 'thirteen', '5'])} dollars"), 0
+    return "seven, no, six dollars", 0
+
+
+def naming_answer(rng, now, slip_rate):
+    named = rng.sample([animal for animal in ANIMALS if " " not in animal], rng.randint(0, 14))
+    spoken = []
+    for animal in named:
+        word = noisy(rng, animal, slip_rate)
+        spoken.append(word + "s" if rng.random() < 0.2 and not word.endswith("s") else word)
+    if named and rng.random() < 0.3:
+        spoken.append(spoken[0])  # repeats only count once
+    if not spoken:
+        return "I can't think of any", 0
+    return with_filler(rng, ", ".join(spoken)), min(len(named), 10)
+
+
+GENERATORS = {
+    1: weekday_answer,
+    2: date_answer,
+    4: recall_answer,
+    5: calculation_answer,
+    6: naming_answer,
+    7: recall_answer
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=5000, help="Synthetic answers per stage")
+    parser.add_argument("--slip-rate", type=float, default=0.2, help="Share of words replaced by STT slips")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime(2026, 10, 17, 10, 30)
+    rows = []
+    for stage, generate in GENERATORS.items():
+        for _ in range(args.answers):
+            answer, expected = generate(rng, now, args.slip_rate)
+            rows.append((stage, answer, expected))
+    rng.shuffle(rows)
+
+    latencies = defaultdict(list)
+    agreement = defaultdict(int)
+    mismatches = []
+    started = time.perf_counter()
+    for stage, answer, expected in rows:
+        before = time.perf_counter_ns()
+        item = score_answer(stage, answer, now)
+        latencies[stage].append((time.perf_counter_ns() - before) / 1000)
+        if item["points"] == expected:
+            agreement[stage] += 1
+        elif len(mismatches) < 5:
+            mismatches.append((item["stage_name"], answer, expected, item["points"]))
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(rows)} answers scored in {elapsed:.2f}s ({len(rows) / elapsed:,.0f} answers/s)\n")
+    print(f"{'stage':<24}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}{'agreement':>12}")
+    for stage in GENERATORS:
+        values = latencies[stage]
+        name = score_answer(stage, "", now)["stage_name"]
+        print(
+            f"{name:<24}{statistics.mean(values):>10.1f}{percentile(values, 0.5):>10.1f}"
+            f"{percentile(values, 0.99):>10.1f}{agreement[stage] / len(values):>11.1%}"
+        )
+
+    if mismatches:
+        print("\nSample disagreements (stage, answer, expected, scored):")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+
+
+if __name__ == "__main__":
+    main()
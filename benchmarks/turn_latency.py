@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Turn latency benchmark for the /ws/{session_id} socket
+
+Opens N concurrent patient sockets against an in-process server whose
+upstreams (Deepgram, Azure OpenAI, ElevenLabs) are replaced by slow fakes,
+and reports per-turn latency. Run with --blocking to emulate the old
+synchronous clients and see head-of-line blocking.
+
+    python benchmarks/turn_latency.py --sockets 50 --turns 3
+    python benchmarks/turn_latency.py --sockets 50 --turns 3 --blocking
+    python benchmarks/turn_latency.py --sockets 50 --turns 3 --fast-path
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fake credentials so every provider branch in the turn handler is exercised
+os.environ.setdefault("AZURE_OPEN_AI_ENDPOINT", "http://127.0.0.1:9")
+os.environ.setdefault("AZURE_OPEN_AI_KEY", "bench")
+os.environ.setdefault("DEEPGRAM_API_KEY", "bench")
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bench_tts_cache"))
+os.environ.setdefault("WS_PUBSUB_ENABLED", "false")
+os.environ.pop("HEYGEN_API_KEY", None)
+os.environ.pop("HEYGEN_REALTIME_AVATAR_API_KEY", None)
+
+import uvicorn
+import websockets
+
+from server import main as app_module
+from server.services import tts_cache as tts_cache_module
+from server.services.audio_stream import FRAME_CHUNK, FRAME_END, decode_frame
+
+
+def install_fake_upstreams(stt_delay, llm_delay, tts_delay, blocking):
+    """Swap provider clients in server.main for fakes with fixed latency"""
+
+    async def wait(delay):
+        if blocking:
+            time.sleep(delay)  # what a synchronous SDK does to the event loop
+        else:
+            await asyncio.sleep(delay)
+
+    async def fake_transcribe(audio_data, utterances=False):
+        await wait(stt_delay)
+        alternative = {
+            "transcript": "Today is Tuesday, I think.",
+            "words": [
+                {"word": word, "start": 0.4 * position, "end": 0.4 * position + 0.3, "confidence": 0.95}
+                for position, word in enumerate(["today", "is", "tuesday", "i", "think"])
+            ]
+        }
+        return {"results": {"channels": [{"alternatives": [alternative]}]}}
+
+    reply = ("Thank you, that is very helpful to know. "
+             "Now let me ask you something a little different. "
+             "Can you tell me what today's date is, including the month and year?")
+
+    class FakeStream:
+        """Streams the reply word by word; first token at 30% of the LLM delay"""
+
+        def __init__(self):
+            self.words = [word + " " for word in reply.split()]
+            self.first = True
+            self.response = SimpleNamespace(aclose=self.aclose)
+
+        async def aclose(self):
+            self.words = []
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.words:
+                raise StopAsyncIteration
+            if self.first:
+                await wait(llm_delay * 0.3)
+                self.first = False
+            else:
+                await wait(llm_delay * 0.7 / len(reply.split()))
+            delta = SimpleNamespace(content=self.words.pop(0))
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    class FakeCompletions:
+        async def create(self, stream=False, **kwargs):
+            if stream:
+                return FakeStream()
+            await wait(llm_delay)
+            message = SimpleNamespace(content=reply)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def fake_stream_tts(text, **kwargs):
+        await wait(tts_delay * 0.5)  # time to first byte
+        for _ in range(4):
+            await wait(tts_delay * 0.5 / 4)
+            yield b"\xff\xfb" * 512
+
+    fake_openai = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+    app_module.transcribe_prerecorded = fake_transcribe
+    tts_cache_module.stream_tts = fake_stream_tts
+    app_module.provider_registry.openai_client = lambda: fake_openai
+
+
+async def simulated_patient(port, index, turns, binary, latencies, first_audio, errors):
+    uri = f"ws://127.0.0.1:{port}/ws/bench_{index}"
+    audio = b"\x00" * 4096
+    try:
+        async with websockets.connect(uri, max_size=None) as ws:
+            if binary:
+                await ws.send(json.dumps({"type": "configure", "audio_transport": "binary"}))
+            for _ in range(turns):
+                started = time.perf_counter()
+                heard_audio = False
+                await ws.send(audio)
+                while True:
+                    raw = await ws.recv()
+                    if isinstance(raw, bytes):
+                        kind = decode_frame(raw)[0]
+                        if kind == FRAME_CHUNK and not heard_audio:
+                            first_audio.append(time.perf_counter() - started)
+                            heard_audio = True
+                        if kind == FRAME_END:
+                            break
+                        continue
+                    message = json.loads(raw)
+                    if message["type"] == "ai_audio":
+                        # JSON transport: the whole reply's audio in one message
+                        first_audio.append(time.perf_counter() - started)
+                        break
+                    if message["type"] == "error":
+                        raise RuntimeError(message["message"])
+                latencies.append(time.perf_counter() - started)
+    except Exception as e:
+        errors.append(str(e))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(args):
+    install_fake_upstreams(args.stt_delay, args.llm_delay, args.tts_delay, args.blocking)
+    app_module.ASSESSMENT_FAST_PATH = args.fast_path
+
+    config = uvicorn.Config(app_module.app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    latencies, first_audio, errors = [], [], []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        simulated_patient(args.port, i, args.turns, args.binary, latencies, first_audio, errors)
+        for i in range(args.sockets)
+    ])
+    elapsed = time.perf_counter() - started
+
+    server.should_exit = True
+    await server_task
+
+    ideal = args.stt_delay + args.llm_delay + args.tts_delay
+    mode = "blocking (old)" if args.blocking else "async + executor"
+    mode += ", binary audio frames" if args.binary else ", JSON audio"
+    mode += ", template fast path" if args.fast_path else ""
+    print(f"📊 Turn latency - {args.sockets} sockets x {args.turns} turns, {mode}")
+    print(f"   Upstream floor per turn (single TTS call): {ideal * 1000:.0f} ms")
+    if first_audio:
+        print(f"   Time to first audio p50: {percentile(first_audio, 50) * 1000:.0f} ms, "
+              f"p95: {percentile(first_audio, 95) * 1000:.0f} ms")
+    if latencies:
+        print(f"   Full turn p50: {percentile(latencies, 50) * 1000:.0f} ms")
+        print(f"   p95: {percentile(latencies, 95) * 1000:.0f} ms")
+        print(f"   max: {max(latencies) * 1000:.0f} ms")
+        print(f"   mean: {statistics.mean(latencies) * 1000:.0f} ms")
+    print(f"   Turns completed: {len(latencies)} in {elapsed:.2f}s")
+    print(f"   Errors: {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--stt-delay", type=float, default=0.3)
+    parser.add_argument("--llm-delay", type=float, default=0.8)
+    parser.add_argument("--tts-delay", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--blocking", action="store_true",
+                        help="Emulate synchronous provider clients on the event loop")
+    parser.add_argument("--binary", action="store_true",
+                        help="Negotiate the binary audio frame protocol")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="Answer scripted transitions from templates instead of the LLM")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+WebSocket load test with simulated patients
+
+Each simulated patient opens /ws/{session_id}, asks for the greeting
+(speak_text) and then answers every assessment stage in turn - one
+recorded answer per stage, either as a single binary utterance or streamed
+in real time between start_stream / end_stream - waiting for Dr. Smith's
+ai_response and audio before the next answer. The last answer leads to the
+diagnosis, so one patient covers all 11 ASSESSMENT_STAGES.
+
+Reports throughput, per-stage turn latency percentiles, errors and the
+server's memory growth (RSS from /proc, sampled every second). Everything
+runs on one Linux box; raise the open file limit for large runs
+(ulimit -n 65536).
+
+Against a running server (uvicorn server.main:app, any --workers):
+
+    python benchmarks/ws_load.py --url ws://127.0.0.1:8000 --patients 200 --ramp 20
+    python benchmarks/ws_load.py --url ws://127.0.0.1:8000 --patients 300 --fixtures fixtures/answers --stream
+
+Without a server or provider keys (in-process server, fake upstreams from
+turn_latency.py; memory is then this process's RSS, client included):
+
+    python benchmarks/ws_load.py --in-process --patients 100
+
+Audio fixtures: a directory of recorded answers, used in sorted order, one
+per stage (01_orientation_time.wav, 02_orientation_date.wav, ...). Fewer
+files than stages are reused in turn. Without --fixtures a second of
+silence is sent, which a real Deepgram transcribes as no speech - fine for
+the in-process fakes, not for sizing against real providers.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import websockets
+
+from server.services.audio_stream import FRAME_CHUNK, FRAME_END, decode_frame
+from server.tasks.dementia_assessment_flow import ASSESSMENT_STAGES
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".mp3", ".ogg", ".m4a", ".flac")
+# 16-bit mono 16 kHz
+SILENCE_BYTES_PER_SECOND = 32000
+
+
+def load_fixtures(directory):
+    """Recorded answers in sorted order, or one second of silence"""
+    if not directory:
+        return [b"\x00" * SILENCE_BYTES_PER_SECOND]
+    paths = sorted(
+        path for path in glob.glob(os.path.join(directory, "*"))
+        if path.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    if not paths:
+        raise SystemExit(f"No audio fixtures ({', '.join(AUDIO_EXTENSIONS)}) in {directory}")
+    fixtures = []
+    for path in paths:
+        with open(path, "rb") as f:
+            fixtures.append(f.read())
+    return fixtures
+
+
+def process_rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+def find_server_pids():
+    """uvicorn processes serving server.main, plus their worker processes"""
+    parents = {}
+    masters = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\x00", b" ")
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows its closing parenthesis
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if b"uvicorn" in cmdline and b"server.main" in cmdline:
+            masters.append(int(entry))
+    # --workers N: the workers are children of the master
+    return masters + [pid for pid, parent in parents.items() if parent in masters and pid not in masters]
+
+
+class MemorySampler:
+    """Total RSS of the server processes, sampled in the background"""
+
+    def __init__(self, pids, interval=1.0):
+        self.pids = pids
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def sample(self):
+        self.samples.append((time.perf_counter(), sum(process_rss_bytes(pid) for pid in self.pids)))
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.sample()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.sample()
+
+
+class Results:
+    def __init__(self):
+        self.turn_seconds = defaultdict(list)
+        self.first_audio_seconds = defaultdict(list)
+        self.first_text_seconds = defaultdict(list)
+        self.errors = Counter()
+        self.sessions_completed = 0
+        self.turns = 0
+
+
+async def wait_for_reply(ws, expect_audio, timeout, marks):
+    """
+    Read until Dr. Smith's reply is complete: ai_response plus, if expected, the end of its audio
+
+    Records the time of the first text and first audio in marks.
+    """
+    got_response = False
+    audio_done = not expect_audio
+    deadline = time.perf_counter() + timeout
+
+    while not (got_response and audio_done):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise asyncio.TimeoutError("reply timeout")
+        raw = await asyncio.wait_for(ws.recv(), remaining)
+
+        if isinstance(raw, bytes):
+            kind = decode_frame(raw)[0]
+            if kind == FRAME_CHUNK:
+                marks.setdefault("audio", time.perf_counter())
+            elif kind == FRAME_END:
+                audio_done = True
+            continue
+
+        message = json.loads(raw)
+        kind = message.get("type")
+        if kind == "ai_response_delta":
+            marks.setdefault("text", time.perf_counter())
+        elif kind == "ai_response":
+            marks.setdefault("text", time.perf_counter())
+            got_response = True
+        elif kind == "ai_audio":
+            # JSON transport: the whole reply's audio in one message
+            marks.setdefault("audio", time.perf_counter())
+            audio_done = True
+        elif kind == "error":
+            raise RuntimeError(message.get("message", "server error"))
+
+
+async def send_answer(ws, audio, stream, chunk_bytes, chunk_seconds):
+    """Send one recorded answer; returns when the patient has 'stopped talking'"""
+    if not stream:
+        await ws.send(audio)
+        return
+    await ws.send(json.dumps({"type": "start_stream"}))
+    for offset in range(0, len(audio), chunk_bytes):
+        await ws.send(audio[offset:offset + chunk_bytes])
+        await asyncio.sleep(chunk_seconds)
+    await ws.send(json.dumps({"type": "end_stream"}))
+
+
+async def simulated_patient(index, args, fixtures, results):
+    session_id = f"load_{index}_{uuid.uuid4().hex[:8]}"
+    answers = len(ASSESSMENT_STAGES) - 1
+    chunk_bytes = max(1, int(SILENCE_BYTES_PER_SECOND * args.chunk_ms / 1000))
+
+    try:
+        async with websockets.connect(f"{args.url}/ws/{session_id}", max_size=None, open_timeout=args.turn_timeout) as ws:
+            if args.binary:
+                await ws.send(json.dumps({"type": "configure", "audio_transport": "binary"}))
+
+            # Stage 0: the greeting
+            marks = {}
+            started = time.perf_counter()
+            await ws.send(json.dumps({"type": "speak_text"}))
+            await wait_for_reply(ws, args.expect_audio, args.turn_timeout, marks)
+            results.turn_seconds[0].append(time.perf_counter() - started)
+            results.turns += 1
+
+            # Stages 1-10: one answer each; the last one leads to the diagnosis
+            for stage in range(1, answers + 1):
+                await asyncio.sleep(args.think_time)
+                await send_answer(ws, fixtures[(stage - 1) % len(fixtures)], args.stream, chunk_bytes, args.chunk_ms / 1000)
+
+                marks = {}
+                started = time.perf_counter()
+                await wait_for_reply(ws, args.expect_audio, args.turn_timeout, marks)
+                results.turn_seconds[stage].append(time.perf_counter() - started)
+                if "audio" in marks:
+                    results.first_audio_seconds[stage].append(marks["audio"] - started)
+                if "text" in marks:
+                    results.first_text_seconds[stage].append(marks["text"] - started)
+                results.turns += 1
+
+        results.sessions_completed += 1
+    except asyncio.TimeoutError:
+        results.errors["timeout"] += 1
+    except websockets.exceptions.ConnectionClosed as e:
+        results.errors[f"closed ({e.code})"] += 1
+    except OSError as e:
+        results.errors[f"connect: {e.__class__.__name__}"] += 1
+    except Exception as e:
+        results.errors[str(e)[:80]] += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def format_ms(values, pct):
+    return f"{percentile(values, pct) * 1000:>8.0f}" if values else f"{'-':>8}"
+
+
+def report(args, results, elapsed, memory):
+    mode = "streamed answers" if args.stream else "utterance answers"
+    mode += ", binary audio" if args.binary else ", JSON audio"
+    print(f"📊 WebSocket load - {args.patients} patients, {mode}, target {args.url}")
+    print(f"   Sessions completed: {results.sessions_completed}/{args.patients} in {elapsed:.1f}s")
+    print(f"   Turns: {results.turns} ({results.turns / elapsed:.1f} turns/s, "
+          f"{results.sessions_completed / elapsed * 60:.1f} assessments/min)")
+
+    all_turns = [value for values in results.turn_seconds.values() for value in values]
+    all_audio = [value for values in results.first_audio_seconds.values() for value in values]
+    if all_turns:
+        print(f"   Full turn p50/p95/p99: {percentile(all_turns, 50) * 1000:.0f} / "
+              f"{percentile(all_turns, 95) * 1000:.0f} / {percentile(all_turns, 99) * 1000:.0f} ms "
+              f"(mean {statistics.mean(all_turns) * 1000:.0f} ms)")
+    if all_audio:
+        print(f"   First audio p50/p95/p99: {percentile(all_audio, 50) * 1000:.0f} / "
+              f"{percentile(all_audio, 95) * 1000:.0f} / {percentile(all_audio, 99) * 1000:.0f} ms")
+
+    print(f"\n   {'stage':<24}{'turns':>7}{'audio p50':>10}{'p95':>8}{'turn p50':>10}{'p95':>8}{'p99':>8}")
+    for stage in sorted(results.turn_seconds):
+        name = ASSESSMENT_STAGES.get(stage, {}).get("stage", str(stage))
+        turns = results.turn_seconds[stage]
+        audio = results.first_audio_seconds.get(stage, [])
+        print(f"   {stage:>2} {name:<21}{len(turns):>7}  {format_ms(audio, 50)}{format_ms(audio, 95)}"
+              f"  {format_ms(turns, 50)}{format_ms(turns, 95)}{format_ms(turns, 99)}")
+
+    print(f"\n   Errors: {sum(results.errors.values())}")
+    for error, count in results.errors.most_common(10):
+        print(f"     {count:>5} x {error}")
+
+    if memory and memory.samples and memory.pids:
+        start, peak, end = memory.samples[0][1], max(rss for _, rss in memory.samples), memory.samples[-1][1]
+        mb = 1024 * 1024
+        print(f"\n   Server RSS ({len(memory.pids)} process{'es' if len(memory.pids) != 1 else ''}): "
+              f"{start / mb:.0f} MB -> peak {peak / mb:.0f} MB -> end {end / mb:.0f} MB "
+              f"(growth {(end - start) / mb:+.0f} MB, {(end - start) / max(1, results.sessions_completed) / 1024:+.1f} KB/session)")
+    elif memory is not None:
+        print("\n   Server RSS: no server process found (pass --server-pid)")
+
+
+async def start_in_process_server(args):
+    """Serve server.main in this process with the fake upstreams from turn_latency.py"""
+    import uvicorn
+    import turn_latency
+
+    turn_latency.install_fake_upstreams(args.stt_delay, args.llm_delay, args.tts_delay, blocking=False)
+    config = uvicorn.Config(turn_latency.app_module.app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run(args):
+    fixtures = load_fixtures(args.fixtures)
+
+    server = server_task = None
+    if args.in_process:
+        server, server_task = await start_in_process_server(args)
+        args.url = f"ws://127.0.0.1:{args.port}"
+        pids = [os.getpid()]
+    else:
+        pids = args.server_pid or find_server_pids()
+
+    memory = MemorySampler(pids)
+    memory.start()
+
+    results = Results()
+    started = time.perf_counter()
+    patients = []
+    for index in range(args.patients):
+        patients.append(asyncio.create_task(simulated_patient(index, args, fixtures, results)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.patients)
+    await asyncio.gather(*patients)
+    elapsed = time.perf_counter() - started
+
+    await memory.stop()
+    if server is not None:
+        server.should_exit = True
+        await server_task
+
+    report(args, results, elapsed, memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000", help="Server base URL (ws:// or wss://)")
+    parser.add_argument("--patients", type=int, default=100, help="Concurrent simulated patients")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconds over which patients connect")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Pause before each answer")
+    parser.add_argument("--fixtures", help="Directory of recorded answers, one per stage in sorted order")
+    parser.add_argument("--stream", action="store_true", help="Stream answers in real time (start_stream/end_stream)")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Streamed audio chunk length")
+    parser.add_argument("--binary", action="store_true", help="Negotiate binary audio frames")
+    parser.add_argument("--no-audio", dest="expect_audio", action="store_false",
+                        help="Server has no TTS configured; a reply ends with ai_response")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--server-pid", type=int, action="append", help="Server process to sample (repeatable)")
+    parser.add_argument("--in-process", action="store_true", help="Start the server here with fake upstreams")
+    parser.add_argument("--port", type=int, default=8766, help="Port for --in-process")
+    parser.add_argument("--stt-delay", type=float, default=0.3, help="Fake STT latency (--in-process)")
+    parser.add_argument("--llm-delay", type=float, default=0.8, help="Fake LLM latency (--in-process)")
+    parser.add_argument("--tts-delay", type=float, default=0.5, help="Fake TTS latency (--in-process)")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,10 @@ import MicOffIcon from '@mui/icons-material/MicOff';
 import VolumeUpIcon from '@mui/icons-material/VolumeUp';
 import FavoriteIcon from '@mui/icons-material/Favorite';
 import PsychologyIcon from '@mui/icons-material/Psychology';
+import AudioStreamPlayer from '../utils/audioStreamPlayer';
+
+// Recorder timeslice for live streaming STT (ms of audio per WebSocket frame)
+const STREAM_TIMESLICE_MS = 250;
 
 const DoctorAvatar = ({ onPageChange }) => {
   const [isListening, setIsListening] = useState(false);
@@ -36,8 +40,8 @@ const DoctorAvatar = ({ onPageChange }) => {
   const [peerConnection, setPeerConnection] = useState(null);
   
   const mediaRecorderRef = useRef(null);
-  const audioChunksRef = useRef([]);
   const audioRef = useRef(null);
+  const audioPlayerRef = useRef(null); // Progressive TTS playback (binary frames + legacy clips)
   const videoRef = useRef(null);
   const conversationEndRef = useRef(null);
   const heygenInitializedRef = useRef(false);
@@ -393,26 +397,50 @@ const DoctorAvatar = ({ onPageChange }) => {
       setIsConnected(true);
       setError(null);
       console.log('Connected to AI Doctor');
+      // Ask for sequenced binary audio frames so replies play progressively
+      websocket.send(JSON.stringify({ type: 'configure', audio_transport: 'binary' }));
     };
     
     websocket.onmessage = (event) => {
       try {
         // Check if it's binary data (audio)
         if (event.data instanceof ArrayBuffer) {
-          const audioData = new Uint8Array(event.data);
-          playAudioBuffer(audioData);
+          const player = getAudioPlayer();
+          if (!player || !player.handleFrame(event.data)) {
+            playAudioBuffer(new Uint8Array(event.data));
+          }
           return;
         }
         
         // Handle text messages
         const data = JSON.parse(event.data);
         
-        if (data.type === 'ai_response') {
-          setConversation(prev => [...prev, {
-            type: 'assistant',
-            text: data.text,
-            timestamp: new Date()
-          }]);
+        if (data.type === 'ai_response_delta') {
+          // Grow the in-progress assistant bubble as tokens arrive
+          setConversation(prev => {
+            const last = prev[prev.length - 1];
+            if (last && last.type === 'assistant' && last.streaming) {
+              return [...prev.slice(0, -1), { ...last, text: last.text + data.text }];
+            }
+            return [...prev, {
+              type: 'assistant',
+              text: data.text,
+              streaming: true,
+              timestamp: new Date()
+            }];
+          });
+          setIsProcessing(false);
+        } else if (data.type === 'ai_response') {
+          // The final text replaces the streamed bubble
+          setConversation(prev => {
+            const last = prev[prev.length - 1];
+            const base = last && last.type === 'assistant' && last.streaming ? prev.slice(0, -1) : prev;
+            return [...base, {
+              type: 'assistant',
+              text: data.text,
+              timestamp: new Date()
+            }];
+          });
           setIsProcessing(false);
           
           // Update doctor emotion based on keywords
@@ -436,13 +464,32 @@ const DoctorAvatar = ({ onPageChange }) => {
           setDoctorEmotion('concerned');
           console.log('📋 Assessment complete - generating diagnosis...');
         } else if (data.type === 'user_transcript') {
-          setConversation(prev => [...prev, {
-            type: 'user',
-            text: data.text,
-            timestamp: new Date()
-          }]);
+          // Interim transcripts replace the previous partial bubble until the final one lands
+          setConversation(prev => {
+            const last = prev[prev.length - 1];
+            const base = last && last.type === 'user' && last.partial ? prev.slice(0, -1) : prev;
+            return [...base, {
+              type: 'user',
+              text: data.text,
+              partial: data.is_final === false,
+              timestamp: new Date()
+            }];
+          });
         } else if (data.type === 'processing') {
           setIsProcessing(true);
+        } else if (data.type === 'turn_cancelled') {
+          // The patient interrupted - drop queued audio and close the partial reply
+          const player = getAudioPlayer();
+          if (player) {
+            player.stop();
+          }
+          setConversation(prev => {
+            const last = prev[prev.length - 1];
+            if (last && last.type === 'assistant' && last.streaming) {
+              return [...prev.slice(0, -1), { ...last, streaming: false, interrupted: true }];
+            }
+            return prev;
+          });
         }
       } catch (error) {
         console.error('Error handling WebSocket message:', error);
@@ -487,27 +534,32 @@ const DoctorAvatar = ({ onPageChange }) => {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       const mediaRecorder = new MediaRecorder(stream);
       mediaRecorderRef.current = mediaRecorder;
-      audioChunksRef.current = [];
+      
+      // Barge-in: the patient talks over Dr. Smith, so stop the reply locally;
+      // start_stream also cancels the server-side turn
+      if (audioPlayerRef.current) {
+        audioPlayerRef.current.stop();
+      }
+      
+      // Stream frames to the server while recording so STT runs live
+      if (ws && ws.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify({ type: 'start_stream' }));
+      }
       
       mediaRecorder.ondataavailable = (event) => {
-        audioChunksRef.current.push(event.data);
+        if (event.data.size > 0 && ws && ws.readyState === WebSocket.OPEN) {
+          ws.send(event.data);
+        }
       };
       
       mediaRecorder.onstop = () => {
-        const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/wav' });
-        const reader = new FileReader();
-        reader.onload = () => {
-          const arrayBuffer = reader.result;
-          const audioData = new Uint8Array(arrayBuffer);
-          if (ws && ws.readyState === WebSocket.OPEN) {
-            ws.send(audioData);
-            setIsProcessing(true);
-          }
-        };
-        reader.readAsArrayBuffer(audioBlob);
+        if (ws && ws.readyState === WebSocket.OPEN) {
+          ws.send(JSON.stringify({ type: 'end_stream' }));
+          setIsProcessing(true);
+        }
       };
       
-      mediaRecorder.start();
+      mediaRecorder.start(STREAM_TIMESLICE_MS);
       setIsListening(true);
       setError(null);
     } catch (err) {
@@ -524,14 +576,17 @@ const DoctorAvatar = ({ onPageChange }) => {
     }
   };
 
+  const getAudioPlayer = () => {
+    if (!audioPlayerRef.current && audioRef.current) {
+      audioPlayerRef.current = new AudioStreamPlayer(audioRef.current);
+    }
+    return audioPlayerRef.current;
+  };
+
   const playAudioBuffer = (audioData) => {
-    if (audioRef.current) {
-      const audioBlob = new Blob([audioData], { type: 'audio/mpeg' });
-      const audioUrl = URL.createObjectURL(audioBlob);
-      audioRef.current.src = audioUrl;
-      audioRef.current.play().catch(err => {
-        console.error('Audio playback error:', err);
-      });
+    const player = getAudioPlayer();
+    if (player) {
+      player.enqueueBlob(new Blob([audioData], { type: 'audio/mpeg' }));
     }
   };
 
@@ -544,11 +599,9 @@ const DoctorAvatar = ({ onPageChange }) => {
         bytes[i] = binaryString.charCodeAt(i);
       }
       const audioBlob = new Blob([bytes], { type: 'audio/mpeg' });
-      const audioUrl = URL.createObjectURL(audioBlob);
-      audioRef.current.src = audioUrl;
-      audioRef.current.play().catch(err => {
-        console.error('Audio playback error:', err);
-      });
+      
+      // Legacy JSON transport: one ai_audio clip per reply - queue it behind any audio still playing
+      getAudioPlayer().enqueueBlob(audioBlob);
     }
   };
 
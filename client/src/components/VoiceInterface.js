@@ -15,6 +15,10 @@ import {
 import MicIcon from '@mui/icons-material/Mic';
 import MicOffIcon from '@mui/icons-material/MicOff';
 import VolumeUpIcon from '@mui/icons-material/VolumeUp';
+import AudioStreamPlayer from '../utils/audioStreamPlayer';
+
+// Recorder timeslice for live streaming STT (ms of audio per WebSocket frame)
+const STREAM_TIMESLICE_MS = 250;
 
 const VoiceInterface = ({ onPageChange }) => {
   const [isListening, setIsListening] = useState(false);
@@ -26,8 +30,8 @@ const VoiceInterface = ({ onPageChange }) => {
   const [isConnected, setIsConnected] = useState(false);
   
   const mediaRecorderRef = useRef(null);
-  const audioChunksRef = useRef([]);
   const audioRef = useRef(null);
+  const audioPlayerRef = useRef(null); // Progressive TTS playback (binary frames + legacy clips)
 
   useEffect(() => {
     // Initialize session
@@ -41,14 +45,18 @@ const VoiceInterface = ({ onPageChange }) => {
     websocket.onopen = () => {
       setIsConnected(true);
       setError(null);
+      // Ask for sequenced binary audio frames so replies play progressively
+      websocket.send(JSON.stringify({ type: 'configure', audio_transport: 'binary' }));
     };
     
     websocket.onmessage = (event) => {
       try {
         // Check if it's binary data (audio)
         if (event.data instanceof ArrayBuffer) {
-          const audioData = new Uint8Array(event.data);
-          playAudio(audioData);
+          const player = getAudioPlayer();
+          if (!player || !player.handleFrame(event.data)) {
+            playAudio(new Uint8Array(event.data));
+          }
           return;
         }
         
@@ -91,24 +99,21 @@ const VoiceInterface = ({ onPageChange }) => {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       const mediaRecorder = new MediaRecorder(stream);
       mediaRecorderRef.current = mediaRecorder;
-      audioChunksRef.current = [];
+      
+      // Stream frames to the server while recording so STT runs live
+      ws.send(JSON.stringify({ type: 'start_stream' }));
       
       mediaRecorder.ondataavailable = (event) => {
-        audioChunksRef.current.push(event.data);
+        if (event.data.size > 0) {
+          ws.send(event.data);
+        }
       };
       
       mediaRecorder.onstop = () => {
-        const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/wav' });
-        const reader = new FileReader();
-        reader.onload = () => {
-          const arrayBuffer = reader.result;
-          const audioData = new Uint8Array(arrayBuffer);
-          ws.send(audioData);
-        };
-        reader.readAsArrayBuffer(audioBlob);
+        ws.send(JSON.stringify({ type: 'end_stream' }));
       };
       
-      mediaRecorder.start();
+      mediaRecorder.start(STREAM_TIMESLICE_MS);
       setIsListening(true);
       setError(null);
     } catch (err) {
@@ -123,12 +128,17 @@ const VoiceInterface = ({ onPageChange }) => {
     }
   };
 
+  const getAudioPlayer = () => {
+    if (!audioPlayerRef.current && audioRef.current) {
+      audioPlayerRef.current = new AudioStreamPlayer(audioRef.current);
+    }
+    return audioPlayerRef.current;
+  };
+
   const playAudio = (audioData) => {
-    if (audioRef.current) {
-      const audioBlob = new Blob([audioData], { type: 'audio/mpeg' });
-      const audioUrl = URL.createObjectURL(audioBlob);
-      audioRef.current.src = audioUrl;
-      audioRef.current.play();
+    const player = getAudioPlayer();
+    if (player) {
+      player.enqueueBlob(new Blob([audioData], { type: 'audio/mpeg' }));
     }
   };
 
@@ -0,0 +1,163 @@
+// Progressive playback for Dr. Smith's TTS audio.
+//
+// Binary frames from the server (see server/services/audio_stream.py):
+//   [kind u8][stream_id u32][sequence u32][payload]
+//   kind 1 = START (payload: JSON {"mime": ...}), 2 = CHUNK, 3 = END
+//
+// Streams play one after another through a single <audio> element. Where
+// MediaSource supports the codec, chunks are appended as they arrive so
+// playback starts on the first chunk; otherwise the stream is played as a
+// Blob once its END frame lands. Legacy base64 clips go through the same queue.
+
+const FRAME_HEADER_BYTES = 9;
+const FRAME_START = 1;
+const FRAME_CHUNK = 2;
+const FRAME_END = 3;
+
+const DEFAULT_MIME = 'audio/mpeg';
+
+export default class AudioStreamPlayer {
+  constructor(audioElement) {
+    this.audio = audioElement;
+    this.queue = [];
+    this.current = null;
+    this.streams = new Map();
+
+    this.handleEnded = () => {
+      this.releaseCurrent();
+      this.playNext();
+    };
+    this.audio.addEventListener('ended', this.handleEnded);
+  }
+
+  dispose() {
+    this.stop();
+    this.audio.removeEventListener('ended', this.handleEnded);
+  }
+
+  // Returns false if the buffer is not an audio frame (e.g. a raw MP3 clip)
+  handleFrame(arrayBuffer) {
+    if (arrayBuffer.byteLength < FRAME_HEADER_BYTES) {
+      return false;
+    }
+    const view = new DataView(arrayBuffer);
+    const kind = view.getUint8(0);
+    if (kind < FRAME_START || kind > FRAME_END) {
+      return false;
+    }
+    const streamId = view.getUint32(1);
+    const payload = new Uint8Array(arrayBuffer, FRAME_HEADER_BYTES);
+
+    if (kind === FRAME_START) {
+      let mime = DEFAULT_MIME;
+      try {
+        mime = JSON.parse(new TextDecoder().decode(payload)).mime || DEFAULT_MIME;
+      } catch (e) {
+        // keep the default
+      }
+      const item = { kind: 'stream', mime, chunks: [], ended: false };
+      this.streams.set(streamId, item);
+      this.enqueue(item);
+    } else {
+      const item = this.streams.get(streamId);
+      if (!item) {
+        return true; // stream was stopped (barge-in) - ignore late frames
+      }
+      if (kind === FRAME_CHUNK) {
+        item.chunks.push(payload.slice());
+      } else {
+        item.ended = true;
+        this.streams.delete(streamId);
+      }
+      if (item === this.current) {
+        this.pump();
+      }
+    }
+    return true;
+  }
+
+  enqueueBlob(blob) {
+    this.enqueue({ kind: 'blob', blob });
+  }
+
+  enqueue(item) {
+    this.queue.push(item);
+    if (!this.current) {
+      this.playNext();
+    }
+  }
+
+  // Stop playback and drop everything queued
+  stop() {
+    this.queue = [];
+    this.streams.clear();
+    this.audio.pause();
+    this.releaseCurrent();
+  }
+
+  playNext() {
+    const item = this.queue.shift();
+    this.current = item || null;
+    if (!item) {
+      return;
+    }
+
+    if (item.kind === 'blob') {
+      this.playUrl(URL.createObjectURL(item.blob));
+    } else if (window.MediaSource && MediaSource.isTypeSupported(item.mime)) {
+      const mediaSource = new MediaSource();
+      item.mediaSource = mediaSource;
+      mediaSource.addEventListener('sourceopen', () => {
+        item.sourceBuffer = mediaSource.addSourceBuffer(item.mime);
+        item.sourceBuffer.addEventListener('updateend', () => this.pump());
+        this.pump();
+      }, { once: true });
+      this.playUrl(URL.createObjectURL(mediaSource));
+    } else {
+      // No MediaSource support: wait for the whole stream
+      this.pump();
+    }
+  }
+
+  pump() {
+    const item = this.current;
+    if (!item || item.kind !== 'stream') {
+      return;
+    }
+
+    if (!item.mediaSource) {
+      if (item.ended) {
+        this.playUrl(URL.createObjectURL(new Blob(item.chunks, { type: item.mime })));
+        item.chunks = [];
+        item.kind = 'blob';
+      }
+      return;
+    }
+
+    const sourceBuffer = item.sourceBuffer;
+    if (!sourceBuffer || sourceBuffer.updating || item.mediaSource.readyState !== 'open') {
+      return;
+    }
+    if (item.chunks.length > 0) {
+      sourceBuffer.appendBuffer(item.chunks.shift());
+    } else if (item.ended) {
+      item.mediaSource.endOfStream();
+    }
+  }
+
+  playUrl(url) {
+    this.currentUrl = url;
+    this.audio.src = url;
+    this.audio.play().catch(err => {
+      console.error('Audio playback error:', err);
+    });
+  }
+
+  releaseCurrent() {
+    if (this.currentUrl) {
+      URL.revokeObjectURL(this.currentUrl);
+      this.currentUrl = null;
+    }
+    this.current = null;
+  }
+}
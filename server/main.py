@@ -1,62 +1,134 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 import json
+import time
+import logging
 import asyncio
-from typing import List
+from typing import AsyncIterator, Awaitable, List, Optional
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from .routers import auth, assessment, report, doctor
-from .services.websocket_manager import ConnectionManager
+from .routers import auth, assessment, report, doctor, jobs
+from .services.websocket_manager import ConnectionManager, LANE_AUDIO
 from .tasks.doctor_conversation import DOCTOR_SYSTEM_PROMPT
 from .tasks.dementia_assessment_flow import (
     ACTIVE_ASSESSMENT_PROMPT, 
+    ASSESSMENT_STAGES,
+    FINAL_STAGE,
     get_next_question, 
     build_assessment_context,
-    should_advance_stage
+    should_advance_stage,
+    classify_response,
+    needs_llm,
+    build_template_reply,
+    build_diagnosis_context,
+    DIAGNOSIS_FALLBACK,
+    INTRODUCTION_FALLBACK,
+    get_scripted_phrases
 )
-from .services.heygen_avatar import create_heygen_session, send_heygen_message
-from openai import AzureOpenAI
-from deepgram import DeepgramClient, PrerecordedOptions
-from elevenlabs import generate, set_api_key, Voice, VoiceSettings
-import base64
+from .services.heygen_avatar import (
+    create_heygen_session,
+    send_heygen_message,
+    interrupt_heygen_session,
+    get_heygen_client
+)
+from .services.streaming_stt import LiveTranscriptionSession
+from .services.provider_executor import shutdown_executor
+from .services.provider_registry import (
+    provider_registry,
+    AZURE_OPENAI_ENDPOINT,
+    AZURE_OPENAI_DEPLOYMENT,
+    AZURE_DIAGNOSIS_DEPLOYMENT
+)
+from .services.speech_services import (
+    DEEPGRAM_KEY,
+    ELEVENLABS_KEY,
+    TTS_AUDIO_BITS_PER_SECOND,
+    transcribe_prerecorded,
+    transcript_text,
+    transcript_words
+)
+from .services.metrics import metrics
+from .services.tracing import span, observe_span, start_turn, set_turn_stage, load_remote_spans, latency_percentiles
+from .services.redis_client import redis_client
+from .services.job_results import job_results
+from .services.task_queues import load_queue_stats
+from .services.task_deadlines import load_retry_counts
+from .services.tts_cache import cached_stream_tts, register_scripted_phrases, preload_scripted_phrases
+from .services.audio_stream import (
+    AUDIO_TRANSPORT_BINARY,
+    AUDIO_TRANSPORT_JSON,
+    BinaryAudioTransport,
+    JsonAudioTransport
+)
+from .services.speech_pipeline import SentenceChunker, SpeechPipeline
+# Conversation history, assessment stage and HeyGen session IDs live in
+# session_store (Redis when SESSION_STORE=redis) so any worker can serve a turn
+from .services.session_store import session_store
+from .services.speculation import speculator
+from .tasks.assessment_scoring import score_answer, domain_scores, risk_level, summarize_evidence
+from .tasks.speech_timing import pack_words
+from .tasks.context_manager import update_context
+from .services.token_usage import record_usage, stream_usage_options, usage_from_response, usage_summary
 
 load_dotenv()
 
-# Azure OpenAI Configuration
-AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPEN_AI_ENDPOINT")
-AZURE_OPENAI_KEY = os.getenv("AZURE_OPEN_AI_KEY")
-AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
-AZURE_API_VERSION = os.getenv("AZURE_API_VERSION", "2024-02-15-preview")
-
-# Initialize Azure OpenAI client
-openai_client = None
-if AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_KEY:
-    openai_client = AzureOpenAI(
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        api_key=AZURE_OPENAI_KEY,
-        api_version=AZURE_API_VERSION
-    )
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
-DEEPGRAM_KEY = os.getenv("DEEPGRAM_API_KEY")
-ELEVENLABS_KEY = os.getenv("ELEVENLABS_API_KEY")
 HEYGEN_KEY = os.getenv("HEYGEN_API_KEY") or os.getenv("HEYGEN_REALTIME_AVATAR_API_KEY")
 
-# Initialize ElevenLabs API key
-if ELEVENLABS_KEY:
-    set_api_key(ELEVENLABS_KEY)
+# Template fast path: scripted acknowledgement + question, LLM only for
+# answers the local classifier flags as off-script or distressed
+ASSESSMENT_FAST_PATH = os.getenv("ASSESSMENT_FAST_PATH", "false").lower() == "true"
+
+turns_cancelled = metrics.counter(
+    "turns_cancelled_total",
+    "Dr. Smith turns cut short because the patient started speaking again"
+)
+turn_replies = metrics.counter(
+    "assessment_turns_total",
+    "Patient turns by reply path (template, llm, llm_prefetched, diagnosis, fallback) and response class"
+)
+turn_reply_seconds = metrics.counter(
+    "assessment_reply_seconds_total",
+    "Time from final transcript to complete reply text, by reply path (divide by assessment_turns_total)"
+)
+turn_followups = metrics.counter(
+    "assessment_followups_total",
+    "Response class of the answer to each reply path - repeat/unsure after a reply is a quality signal"
+)
+
+LLM_REPLY_PATHS = ("llm", "llm_prefetched", "diagnosis")
 
-# Store conversation history, assessment stage, and HeyGen sessions per session
-conversation_history = {}
-assessment_stage = {}
-heygen_sessions = {}  # Store HeyGen session IDs
+# Fixed script lines are served from the TTS cache once rendered
+register_scripted_phrases(get_scripted_phrases())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Upstream connection pools live as long as the process
+    await provider_registry.start()
+    preloaded = await preload_scripted_phrases()
+    logger.info("🔊 TTS cache: %s scripted phrases preloaded", preloaded)
+    # Cross-process delivery: forward pub/sub messages to the sockets held here
+    await manager.start()
+    # Celery job completions (report and doctor endpoints, /api/jobs)
+    await job_results.start()
+    yield
+    await job_results.close()
+    await manager.close()
+    await provider_registry.close()
+    shutdown_executor()
 
 app = FastAPI(
     title="Dementia Detection AI API",
     description="Conversational AI for Early Dementia Detection",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -73,317 +145,830 @@ app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(assessment.router, prefix="/api/assessment", tags=["assessment"])
 app.include_router(report.router, prefix="/api/report", tags=["report"])
 app.include_router(doctor.router, prefix="/api/doctor", tags=["doctor"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 # WebSocket connection manager
 manager = ConnectionManager()
 
+async def transcribe_recording(audio_data: bytes) -> dict:
+    """
+    Transcribe a complete recorded utterance with Deepgram prerecorded STT
+    
+    Returns:
+        dict: transcript, STT words and the epoch time the recording started
+              (estimated - the recording ends about when it arrives)
+    """
+    received_at = time.time()
+    words = []
+    if DEEPGRAM_KEY and len(audio_data) > 1000:  # Check if audio has content
+        try:
+            response = await transcribe_prerecorded(audio_data)
+            user_transcript = transcript_text(response)
+            words = transcript_words(response)
+            
+            if not user_transcript or user_transcript.strip() == "":
+                user_transcript = "[No speech detected in audio]"
+        except Exception as e:
+            user_transcript = f"[Speech recognition error: {str(e)}]"
+    else:
+        user_transcript = "[Audio too short or Deepgram API key not configured]"
+    
+    return {
+        "transcript": user_transcript,
+        "words": words,
+        "audio_started_at": received_at - words[-1].get("end", 0.0) if words else None
+    }
+
+
+async def stream_speech(text: str) -> AsyncIterator[bytes]:
+    """Render text with ElevenLabs (default voice, no voices_read permission needed)"""
+    # Scripted lines (greeting, questions, fallbacks) come straight from the cache
+    async for chunk in cached_stream_tts(text):
+        yield chunk
+
+
+def create_speech_pipeline(session_id: str, audio_transport: str) -> SpeechPipeline:
+    """Sentence-level TTS whose audio goes to the client as soon as it is rendered"""
+    # Audio goes through the connection's bulk lane, behind control and text messages
+    if audio_transport == AUDIO_TRANSPORT_BINARY:
+        transport = BinaryAudioTransport(lambda data: manager.send_bytes(session_id, data))
+    else:
+        transport = JsonAudioTransport(lambda text: manager.send_text(session_id, text, lane=LANE_AUDIO))
+    
+    return SpeechPipeline(synthesize=stream_speech, transport=transport)
+
+
+async def stream_reply(
+    session_id: str,
+    messages: List[dict],
+    deployment: str,
+    max_tokens: int,
+    speech: Optional[SpeechPipeline],
+    call: str = "assessment"
+) -> str:
+    """
+    Stream a completion to the client and hand each finished sentence to TTS
+    
+    Args:
+        call: Call kind for token accounting (assessment, acknowledgement, diagnosis)
+    
+    Returns:
+        str: The full reply text
+    """
+    requested = time.perf_counter()
+    stream = await provider_registry.openai_client().chat.completions.create(
+        model=deployment,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=0.7,
+        stream=True,
+        **stream_usage_options()
+    )
+    
+    chunker = SentenceChunker()
+    parts = []
+    usage = None
+    
+    try:
+        async for chunk in stream:
+            # With include_usage the last chunk carries the usage and no choices
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            # Azure sends a leading content-filter chunk with no choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            
+            if not parts:
+                observe_span("llm_first_token", time.perf_counter() - requested)
+            parts.append(delta)
+            await manager.send_json(session_id, {
+                "type": "ai_response_delta",
+                "text": delta
+            })
+            
+            if speech:
+                for sentence in chunker.feed(delta):
+                    speech.add_sentence(sentence)
+    finally:
+        # On barge-in this drops the connection, which stops generation upstream
+        await stream.response.aclose()
+        observe_span("llm", time.perf_counter() - requested)
+    
+    remainder = chunker.flush()
+    if speech and remainder:
+        speech.add_sentence(remainder)
+    
+    reply = "".join(parts)
+    await record_usage(session_id, call, usage_from_response(usage, messages, reply))
+    return reply
+
+
+async def commit_reply(session_id: str, ai_response: str, advance_from: Optional[int]) -> Optional[int]:
+    """
+    Store Dr. Smith's finished reply and move the assessment on, as one step
+    
+    Returns:
+        Optional[int]: The new stage, if the assessment advanced
+    """
+    await session_store.append_messages(session_id, {
+        "role": "assistant",
+        "content": ai_response
+    })
+    if advance_from is not None:
+        return await session_store.advance_stage(session_id, advance_from)
+    return None
+
+
+def prefetch_next_question(session_id: str, stage: int):
+    """Start rendering the question Dr. Smith will ask once the patient answers"""
+    # The answer at the last stage leads to the diagnosis, not a scripted question
+    if 0 < stage < FINAL_STAGE:
+        speculator.prepare(
+            session_id,
+            stage,
+            get_next_question(stage)["question"],
+            render_audio=bool(ELEVENLABS_KEY)
+        )
+
+
+async def speak_to_patient(
+    session_id: str,
+    text: str,
+    speech: Optional[SpeechPipeline],
+    heygen_session_id: Optional[str] = None
+) -> Optional[float]:
+    """
+    Hand a finished reply to the HeyGen avatar and wait for the ElevenLabs audio
+    
+    Args:
+        heygen_session_id: Avatar session if already known (prefetched), else looked up
+    
+    Returns:
+        Optional[float]: Loop time until which the avatar is still talking, if known
+    """
+    avatar_busy_until = None
+    
+    # Send message to HeyGen avatar if session exists
+    if HEYGEN_KEY and heygen_session_id is None:
+        heygen_session_id = await session_store.get_heygen_session(session_id)
+    if HEYGEN_KEY and heygen_session_id:
+        try:
+            logger.debug("Sending to HeyGen avatar: %s...", text[:50])
+            
+            with span("heygen"):
+                result = await send_heygen_message(
+                    api_key=HEYGEN_KEY,
+                    session_id=heygen_session_id,
+                    text=text
+                )
+            
+            if result.get("success"):
+                logger.debug("HeyGen avatar speaking...")
+                duration_ms = result.get("duration_ms") or 0
+                avatar_busy_until = asyncio.get_running_loop().time() + duration_ms / 1000
+            else:
+                logger.warning("HeyGen error: %s", result.get('error'))
+                
+        except Exception as e:
+            logger.warning("HeyGen error: %s", e)
+    
+    # Wait for the remaining sentence audio (ElevenLabs fallback to the avatar)
+    if speech:
+        await speech.finish()
+    
+    # The patient's response latency is measured from the end of this speech
+    now = asyncio.get_running_loop().time()
+    ends_at = now
+    if avatar_busy_until is not None:
+        ends_at = max(ends_at, avatar_busy_until)
+    if speech and speech.first_audio_at is not None:
+        ends_at = max(ends_at, speech.first_audio_at + speech.audio_bytes_sent * 8 / TTS_AUDIO_BITS_PER_SECOND)
+    # Stored with the session on the epoch clock, like the answer's start time
+    await session_store.set_question_end(session_id, time.time() + (ends_at - now))
+    
+    return avatar_busy_until
+
+
+async def record_followup(session_id: str, response_class: str):
+    """Attribute the patient's answer to the kind of reply it was answering"""
+    stats = await session_store.get_stats(session_id)
+    if "last_reply_template" in stats:
+        previous_path = "template" if stats["last_reply_template"] else "llm"
+        turn_followups.inc(previous_path=previous_path, response_class=response_class)
+
+
+async def record_reply(session_id: str, reply_path: str, response_class: str, seconds: float):
+    """Process-wide and per-session counters for comparing the template and LLM paths"""
+    turn_replies.inc(path=reply_path, response_class=response_class)
+    turn_reply_seconds.inc(seconds, path=reply_path)
+    
+    llm_call = reply_path in LLM_REPLY_PATHS
+    await session_store.incr_stats(
+        session_id,
+        turns=1,
+        llm_turns=1 if llm_call else 0,
+        template_turns=1 if reply_path == "template" else 0,
+        reply_seconds_llm=seconds if llm_call else 0,
+        reply_seconds_template=seconds if reply_path == "template" else 0
+    )
+    await session_store.set_stats(session_id, last_reply_template=1 if reply_path == "template" else 0)
+
+
+async def record_answer_score(
+    session_id: str, current_stage: int, user_transcript: str, response_class: str
+) -> Optional[dict]:
+    """Score the answer to the question asked last turn and store it with the session"""
+    # A request to hear the question again is not an answer; the stage does not
+    # advance (handle_patient_turn), so the item is scored once it is answered
+    if current_stage < 1 or response_class == "repeat":
+        return None
+    item = score_answer(current_stage - 1, user_transcript)
+    if item:
+        await session_store.record_evidence(session_id, item["stage"], item)
+        logger.info("🧮 %s: %s/%s (%s)", item['stage_name'], item['points'], item['max_points'], item['note'])
+    return item
+
+
+async def update_prompt_context(
+    session_id: str,
+    history: List[dict],
+    current_stage: int,
+    user_transcript: str,
+    response_class: str,
+    item: Optional[dict]
+) -> dict:
+    """Fold this turn into the session's rolling prompt context and store it"""
+    answered = current_stage - 1 if current_stage >= 1 and response_class != "repeat" else None
+    context = update_context(
+        await session_store.get_context(session_id),
+        history,
+        answered_stage=answered,
+        stage_name=ASSESSMENT_STAGES.get(answered, {}).get("stage") if answered is not None else None,
+        answer=user_transcript if answered is not None else None,
+        note=item["note"] if item else None
+    )
+    await session_store.set_context(session_id, context)
+    return context
+
+
+async def record_word_timings(session_id: str, current_stage: int, transcription: Optional[dict]):
+    """Append the answer's STT word timings to the session timeline"""
+    question_end = await session_store.pop_question_end(session_id)
+    if current_stage < 1 or not transcription or not transcription.get("words"):
+        return
+    audio_started_at = transcription.get("audio_started_at")
+    offset = audio_started_at - question_end if question_end is not None and audio_started_at is not None else None
+    await session_store.append_timings(
+        session_id, pack_words(current_stage - 1, transcription["words"], offset)
+    )
+
+
+async def handle_patient_turn(
+    session_id: str,
+    user_transcript: str,
+    audio_transport: str = AUDIO_TRANSPORT_JSON,
+    transcription: Optional[dict] = None
+) -> Optional[float]:
+    """
+    Run one assessment turn: final transcript -> Dr. Smith reply -> avatar / TTS
+    
+    Runs as a task that a newer utterance cancels (barge-in). The patient's
+    words are stored straight away; the reply and any stage advance are only
+    committed once the reply is complete, so a cancelled turn leaves the
+    history and stage consistent.
+    
+    Args:
+        transcription: STT result with word timings (see transcribe_recording)
+    
+    Returns:
+        Optional[float]: Loop time until which the avatar is still talking, if known
+    """
+    # Send user transcript
+    await manager.send_json(session_id, {
+        "type": "user_transcript",
+        "text": user_transcript,
+        "is_final": True
+    })
+    
+    speech = create_speech_pipeline(session_id, audio_transport) if ELEVENLABS_KEY else None
+    ai_response = None
+    prepared = None
+    turn_started = time.perf_counter()
+    reply_path = "fallback"
+    response_class = "none"
+    
+    try:
+        # Step 2: Generate AI response using OpenAI GPT-4 with structured assessment
+        if provider_registry.openai_configured and not user_transcript.startswith("["):
+            try:
+                # Add user's response to conversation history
+                user_message = {"role": "user", "content": user_transcript}
+                await session_store.append_messages(session_id, user_message)
+                
+                # Get current assessment stage
+                current_stage = await session_store.get_stage(session_id)
+                set_turn_stage(current_stage)
+                
+                # Cheap local read of the answer decides template vs LLM
+                response_class = classify_response(user_transcript)
+                use_llm = not ASSESSMENT_FAST_PATH or needs_llm(response_class)
+                await record_followup(session_id, response_class)
+                scored_item = await record_answer_score(session_id, current_stage, user_transcript, response_class)
+                await record_word_timings(session_id, current_stage, transcription)
+                
+                advance = should_advance_stage(user_transcript, current_stage)
+                if response_class == "repeat":
+                    # A request to hear the question again is not an answer - on
+                    # either path the question is asked again and scored later
+                    advance = False
+                
+                # Material prepared while the patient was talking - only valid if
+                # the answer moves the assessment on to the next question as predicted
+                prepared = await speculator.take(
+                    session_id,
+                    current_stage,
+                    advance and current_stage < FINAL_STAGE and not needs_llm(response_class)
+                )
+                if prepared:
+                    history = prepared.history + [user_message]
+                else:
+                    history = await session_store.get_history(session_id)
+                
+                # Older turns live on as a rolling summary so the prompt stays bounded
+                context = await update_prompt_context(
+                    session_id, history, current_stage, user_transcript, response_class, scored_item
+                )
+                
+                # Check if assessment is complete (the final stage was answered)
+                if advance and current_stage >= FINAL_STAGE:
+                    reply_path = "diagnosis"
+                    logger.info("🏥 Assessment complete! Generating diagnosis...")
+                    
+                    # Every answer has been scored already - the report is ready now
+                    evidence = await session_store.get_evidence(session_id)
+                    scores = domain_scores(evidence)
+                    
+                    # Notify client that assessment is complete
+                    await manager.send_json(session_id, {
+                        "type": "assessment_complete",
+                        "message": "Assessment complete. Dr. Smith is now analyzing your responses...",
+                        "scores": {domain: values["score"] for domain, values in scores.items()},
+                        "overall_risk": risk_level(scores)
+                    })
+                    
+                    # Diagnosis from the scored findings plus the end of the conversation
+                    diagnosis_messages = build_diagnosis_context(
+                        history, summarize_evidence(evidence) if evidence else None, context
+                    )
+                    
+                    try:
+                        ai_response = await stream_reply(
+                            session_id, diagnosis_messages, AZURE_DIAGNOSIS_DEPLOYMENT, 300, speech, "diagnosis"
+                        )
+                        logger.info("📋 Diagnosis generated: %s...", ai_response[:100])
+                    except Exception as e:
+                        logger.error("Error generating diagnosis: %s", e)
+                        ai_response = None
+                    
+                    if not ai_response:
+                        ai_response = DIAGNOSIS_FALLBACK
+                        if speech:
+                            speech.add_sentence(ai_response)
+                elif not use_llm:
+                    # Template fast path: no model call at all; both sentences are
+                    # scripted, so their audio normally comes from the TTS cache
+                    reply_path = "template"
+                    acknowledgement, question = build_template_reply(response_class, current_stage, advance)
+                    
+                    ai_response = f"{acknowledgement} {question}".strip()
+                    
+                    await manager.send_json(session_id, {
+                        "type": "ai_response_delta",
+                        "text": ai_response
+                    })
+                    if speech:
+                        speech.add_sentence(acknowledgement)
+                        if prepared and prepared.audio and prepared.question == question:
+                            speech.add_audio(prepared.audio)
+                        else:
+                            speech.add_sentence(question)
+                elif prepared:
+                    reply_path = "llm_prefetched"
+                    # Only the acknowledgement is generated; the scripted question
+                    # follows verbatim with audio rendered during the patient's answer
+                    messages = build_assessment_context(
+                        history, current_stage, question_follows=True, context=context
+                    )
+                    acknowledgement = await stream_reply(
+                        session_id, messages, AZURE_OPENAI_DEPLOYMENT, 60, speech, "acknowledgement"
+                    )
+                    
+                    await manager.send_json(session_id, {
+                        "type": "ai_response_delta",
+                        "text": " " + prepared.question
+                    })
+                    if speech:
+                        if prepared.audio:
+                            speech.add_audio(prepared.audio)
+                        else:
+                            speech.add_sentence(prepared.question)
+                    ai_response = f"{acknowledgement.strip()} {prepared.question}".strip()
+                else:
+                    reply_path = "llm"
+                    # Build assessment context with conversation history
+                    messages = build_assessment_context(history, current_stage, context=context, advance=advance)
+                    
+                    # Stream Dr. Smith's response using Azure OpenAI
+                    ai_response = await stream_reply(
+                        session_id, messages, AZURE_OPENAI_DEPLOYMENT, 200, speech
+                    )
+                
+                # Store Dr. Smith's response (and the stage advance) - shielded so a
+                # barge-in landing here cannot leave one without the other
+                new_stage = await asyncio.shield(
+                    commit_reply(session_id, ai_response, current_stage if advance else None)
+                )
+                if new_stage is not None:
+                    prefetch_next_question(session_id, new_stage)
+                
+            except Exception as e:
+                reply_path = "fallback"
+                ai_response = f"I'm here to help! Let me try again. Could you please repeat that? (Error: {str(e)[:100]})"
+                if speech:
+                    speech.add_sentence(ai_response)
+        else:
+            ai_response = INTRODUCTION_FALLBACK
+            if speech:
+                speech.add_sentence(ai_response)
+        
+        # Send the complete AI text response
+        await manager.send_json(session_id, {
+            "type": "ai_response",
+            "text": ai_response
+        })
+        await record_reply(session_id, reply_path, response_class, time.perf_counter() - turn_started)
+        
+        return await speak_to_patient(
+            session_id, ai_response, speech,
+            heygen_session_id=prepared.heygen_session_id if prepared else None
+        )
+    except asyncio.CancelledError:
+        # Barge-in: stop every TTS render still in flight
+        if speech:
+            await speech.cancel()
+        raise
+
+
+async def speak_greeting(session_id: str, audio_transport: str) -> Optional[float]:
+    """Start the assessment with Dr. Smith's scripted greeting"""
+    # Get first assessment question
+    first_question = get_next_question(0)
+    
+    # Initialize conversation with greeting
+    await session_store.reset(
+        session_id,
+        [{"role": "assistant", "content": first_question["question"]}],
+        stage=1  # Move to next stage after greeting
+    )
+    prefetch_next_question(session_id, 1)
+    
+    # Send text response
+    await manager.send_json(session_id, {
+        "type": "ai_response",
+        "text": first_question["question"]
+    })
+    
+    # Generate audio with ElevenLabs TTS
+    speech = None
+    if ELEVENLABS_KEY:
+        logger.debug("Generating welcome message audio with ElevenLabs...")
+        speech = create_speech_pipeline(session_id, audio_transport)
+        speech.add_sentence(first_question["question"])
+    
+    try:
+        return await speak_to_patient(session_id, first_question["question"], speech)
+    except asyncio.CancelledError:
+        if speech:
+            await speech.cancel()
+        raise
+
+
+async def finish_live_transcription(live_session: LiveTranscriptionSession) -> dict:
+    """Flush a live STT stream and return its final transcript and word timings"""
+    user_transcript = await live_session.finish()
+    if not user_transcript.strip():
+        user_transcript = "[No speech detected in audio]"
+    return {
+        "transcript": user_transcript,
+        "words": live_session.words,
+        "audio_started_at": live_session.started_at
+    }
+
+
+async def run_patient_turn(
+    session_id: str,
+    transcription: Awaitable[dict],
+    audio_transport: str,
+    received_at: Optional[float] = None
+) -> Optional[float]:
+    """
+    Turn task body: finish transcription, then run the turn; errors go to the client
+    
+    Args:
+        received_at: time.perf_counter() when the patient's speech ended (the
+            utterance or end_stream arrived) - the zero point for the turn's spans
+    """
+    # Spans of this task and the tasks it starts belong to this turn
+    start_turn(session_id, received_at)
+    if received_at is not None:
+        observe_span("receive", time.perf_counter() - received_at)
+    try:
+        with span("stt"):
+            result = await transcription
+        return await handle_patient_turn(session_id, result["transcript"], audio_transport, result)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await manager.send_json(session_id, {
+            "type": "error",
+            "message": f"Error processing: {str(e)}"
+        })
+        return None
+
+
+async def cancel_turn(
+    session_id: str,
+    turn_task: Optional[asyncio.Task]
+):
+    """
+    Barge-in: the patient started talking again
+    
+    Cancels the in-flight turn (LLM stream, TTS renders, HeyGen request),
+    drops its unsent audio and silences the avatar if it is still talking.
+    """
+    cancelled = False
+    avatar_busy_until = None
+    
+    if turn_task is not None:
+        if not turn_task.done():
+            turn_task.cancel()
+            cancelled = True
+        # Wait for the cancellation to unwind without re-raising it here
+        await asyncio.wait([turn_task])
+        if not turn_task.cancelled():
+            if turn_task.exception() is not None:
+                logger.error("Turn error for session %s: %s", session_id, turn_task.exception())
+            else:
+                avatar_busy_until = turn_task.result()
+    
+    avatar_talking = cancelled or (
+        avatar_busy_until is not None and asyncio.get_running_loop().time() < avatar_busy_until
+    )
+    if not avatar_talking:
+        return
+    
+    if cancelled:
+        # The question was cut off, so the next answer has no response latency
+        await session_store.clear_question_end(session_id)
+        turns_cancelled.inc()
+        manager.discard_queued(session_id, LANE_AUDIO)
+        await manager.send_json(session_id, {"type": "turn_cancelled"})
+        logger.info("✋ Barge-in: cancelled Dr. Smith's turn for session %s", session_id)
+    
+    heygen_session_id = await session_store.get_heygen_session(session_id) if HEYGEN_KEY else None
+    if heygen_session_id:
+        result = await interrupt_heygen_session(HEYGEN_KEY, heygen_session_id)
+        if not result.get("success"):
+            logger.warning("HeyGen interrupt error: %s", result.get('error'))
+
+
+async def open_live_transcription(session_id: str) -> Optional[LiveTranscriptionSession]:
+    """Start a live STT stream that pushes interim transcripts to the client"""
+    if not DEEPGRAM_KEY:
+        return None
+    
+    async def send_partial(text: str):
+        await manager.send_json(session_id, {
+            "type": "user_transcript",
+            "text": text,
+            "is_final": False
+        })
+    
+    live_session = LiveTranscriptionSession(DEEPGRAM_KEY, on_partial=send_partial)
+    try:
+        await live_session.start()
+        return live_session
+    except Exception as e:
+        logger.warning("Live STT unavailable, transcribing the recording instead: %s", e)
+        return None
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await manager.connect(websocket, session_id)
     
     # Initialize session conversation history and assessment stage
-    if session_id not in conversation_history:
-        conversation_history[session_id] = []
-        assessment_stage[session_id] = 0
+    await session_store.ensure(session_id)
+    
+    # Streaming mode state: frames go to the live session, and every frame of
+    # the utterance is also kept so a prerecorded request can take over (from
+    # the webm header on) if the live upstream could not be opened or fails
+    live_session = None
+    streaming = False
+    stream_buffer = bytearray()
+    
+    # Legacy base64 JSON audio unless the client asks for binary frames
+    audio_transport = AUDIO_TRANSPORT_JSON
+    
+    # Dr. Smith's current turn; cancelled when the patient speaks again
+    turn_task: Optional[asyncio.Task] = None
     
     try:
         while True:
             # Receive message from frontend (can be text or binary)
             message = await websocket.receive()
             
+            if message.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
             # Handle binary messages (audio data)
-            if "bytes" in message:
+            if message.get("bytes") is not None:
                 audio_data = message["bytes"]
+                received_at = time.perf_counter()
+                
+                # Streaming mode: forward the frame while the patient is still talking
+                if streaming:
+                    stream_buffer.extend(audio_data)
+                    if live_session:
+                        try:
+                            await live_session.send_audio(audio_data)
+                        except Exception as e:
+                            # The buffer holds the whole utterance - it is transcribed at end_stream
+                            logger.warning("Live STT send error, transcribing the recording instead: %s", e)
+                            await live_session.close()
+                            live_session = None
+                    continue
+                
+                # A new utterance interrupts whatever Dr. Smith is still doing
+                await cancel_turn(session_id, turn_task)
                 
                 # Send acknowledgment
-                await websocket.send_text(json.dumps({
+                await manager.send_json(session_id, {
                     "type": "processing",
                     "message": "Transcribing your speech..."
-                }))
+                })
                 
-                try:
-                    # Step 1: Transcribe audio using Deepgram
-                    if DEEPGRAM_KEY and len(audio_data) > 1000:  # Check if audio has content
-                        try:
-                            deepgram = DeepgramClient(DEEPGRAM_KEY)
-                            
-                            payload = {"buffer": audio_data}
-                            options = PrerecordedOptions(
-                                model="nova-2",
-                                smart_format=True,
-                                punctuate=True
-                            )
-                            
-                            response = deepgram.listen.prerecorded.v("1").transcribe_file(
-                                payload, options
-                            )
-                            
-                            user_transcript = response.results.channels[0].alternatives[0].transcript
-                            
-                            if not user_transcript or user_transcript.strip() == "":
-                                user_transcript = "[No speech detected in audio]"
-                        except Exception as e:
-                            user_transcript = f"[Speech recognition error: {str(e)}]"
-                    else:
-                        user_transcript = "[Audio too short or Deepgram API key not configured]"
-                    
-                    # Send user transcript
-                    await websocket.send_text(json.dumps({
-                        "type": "user_transcript",
-                        "text": user_transcript
-                    }))
-                    
-                    # Step 2: Generate AI response using OpenAI GPT-4 with structured assessment
-                    if openai_client and not user_transcript.startswith("["):
-                        try:
-                            # Add user's response to conversation history
-                            conversation_history[session_id].append({
-                                "role": "user",
-                                "content": user_transcript
-                            })
-                            
-                            # Get current assessment stage
-                            current_stage = assessment_stage.get(session_id, 0)
-                            next_question_info = get_next_question(current_stage)
-                            
-                            # Build assessment context with conversation history
-                            messages = build_assessment_context(
-                                conversation_history[session_id],
-                                current_stage
-                            )
-                            
-                            # Generate Dr. Smith's response using Azure OpenAI
-                            response = openai_client.chat.completions.create(
-                                model=AZURE_OPENAI_DEPLOYMENT,
-                                messages=messages,
-                                max_tokens=200,
-                                temperature=0.7
-                            )
-                            
-                            ai_response = response.choices[0].message.content
-                            
-                            # Store Dr. Smith's response in history
-                            conversation_history[session_id].append({
-                                "role": "assistant",
-                                "content": ai_response
-                            })
-                            
-                            # Advance to next assessment stage if appropriate
-                            if should_advance_stage(user_transcript, current_stage):
-                                assessment_stage[session_id] = current_stage + 1
-                                
-                                # Check if assessment is complete (reached stage 11 after stage 10)
-                                if assessment_stage[session_id] >= 11:
-                                    print(f"🏥 Assessment complete! Generating diagnosis...")
-                                    
-                                    # Notify client that assessment is complete
-                                    await websocket.send_text(json.dumps({
-                                        "type": "assessment_complete",
-                                        "message": "Assessment complete. Dr. Smith is now analyzing your responses..."
-                                    }))
-                                    
-                                    # Analyze the entire conversation for dementia diagnosis
-                                    diagnosis_prompt = """Based on the entire conversation above, provide a brief dementia risk assessment as Dr. Smith speaking directly to the patient.
-
-Analyze their performance across:
-- Orientation (time, date awareness)
-- Memory (recent events, immediate and delayed recall)
-- Attention and calculation
-- Language and verbal fluency
-- Reasoning and judgment
-
-Provide a compassionate but clear assessment in this format:
-
-"Thank you for completing this assessment with me. Based on our conversation today, I observed [KEY FINDINGS - mention specific issues like memory problems, disorientation, difficulty with recall, etc.].
-
-Your cognitive status appears to be [NORMAL / MILD COGNITIVE IMPAIRMENT / MODERATE COGNITIVE DECLINE / SIGNIFICANT COGNITIVE CONCERNS].
-
-[If concerning signs detected]: I'm concerned about some signs that suggest possible dementia or significant cognitive decline. I strongly recommend that you visit a hospital or neurologist as soon as possible for a comprehensive evaluation and brain imaging.
-
-[If mild concerns]: I recommend scheduling a follow-up appointment with your doctor within the next 1-3 months to monitor your cognitive health.
-
-[If normal]: Your cognitive function appears to be within normal range. Continue with regular health check-ups and maintain a healthy lifestyle.
-
-[End with]: Is there anything you'd like to ask me about these findings?"
-
-Be direct, professional, and compassionate. If you detect signs of dementia, clearly state "you may have dementia" and urgently recommend hospital visit."""
-
-                                    diagnosis_messages = conversation_history[session_id] + [
-                                        {"role": "system", "content": diagnosis_prompt}
-                                    ]
-                                    
-                                    try:
-                                        diagnosis_response = client.chat.completions.create(
-                                            model="gpt-4o",
-                                            messages=diagnosis_messages,
-                                            max_tokens=300,
-                                            temperature=0.7
-                                        )
-                                        
-                                        diagnosis_text = diagnosis_response.choices[0].message.content
-                                        print(f"📋 Diagnosis generated: {diagnosis_text[:100]}...")
-                                        
-                                        # Override ai_response with diagnosis
-                                        ai_response = diagnosis_text
-                                        
-                                        # Store diagnosis in history
-                                        conversation_history[session_id].append({
-                                            "role": "assistant",
-                                            "content": diagnosis_text
-                                        })
-                                        
-                                    except Exception as e:
-                                        print(f"Error generating diagnosis: {str(e)}")
-                                        ai_response = "Thank you for completing the assessment. Based on our conversation, I recommend scheduling a follow-up appointment with a healthcare professional to discuss your cognitive health in more detail."
-                            
-                        except Exception as e:
-                            ai_response = f"I'm here to help! Let me try again. Could you please repeat that? (Error: {str(e)[:100]})"
-                    else:
-                        ai_response = "I'm Dr. Smith, your AI doctor. I'll be asking you some questions to understand your cognitive health better. Please make sure you speak clearly into your microphone."
-                    
-                    # Send AI text response
-                    await websocket.send_text(json.dumps({
-                        "type": "ai_response",
-                        "text": ai_response
-                    }))
-                    
-                    # Send message to HeyGen avatar if session exists
-                    if HEYGEN_KEY and session_id in heygen_sessions:
-                        try:
-                            heygen_session_id = heygen_sessions[session_id]
-                            print(f"Sending to HeyGen avatar: {ai_response[:50]}...")
-                            
-                            result = await send_heygen_message(
-                                api_key=HEYGEN_KEY,
-                                session_id=heygen_session_id,
-                                text=ai_response
-                            )
-                            
-                            if result.get("success"):
-                                print(f"HeyGen avatar speaking...")
-                            else:
-                                print(f"HeyGen error: {result.get('error')}")
-                                
-                        except Exception as e:
-                            print(f"HeyGen error: {str(e)}")
-                    
-                    # Also generate audio as fallback using ElevenLabs
-                    if ELEVENLABS_KEY:
-                        try:
-                            # Use ElevenLabs TTS with default voice (doesn't require voices_read permission)
-                            audio_stream = generate(
-                                text=ai_response,
-                                api_key=ELEVENLABS_KEY
-                            )
-                            
-                            # Convert audio stream to base64
-                            audio_base64 = base64.b64encode(audio_stream).decode('utf-8')
-                            
-                            # Send audio response
-                            await websocket.send_text(json.dumps({
-                                "type": "ai_audio",
-                                "audio": audio_base64
-                            }))
-                        except Exception as e:
-                            print(f"ElevenLabs TTS error: {str(e)}")
-                            # Continue without audio if TTS fails
-                    
-                except Exception as e:
-                    await websocket.send_text(json.dumps({
-                        "type": "error",
-                        "message": f"Error processing: {str(e)}"
-                    }))
+                # Step 1: Transcribe audio using Deepgram, then run the turn
+                turn_task = asyncio.create_task(run_patient_turn(
+                    session_id, transcribe_recording(audio_data), audio_transport, received_at
+                ))
                 
             # Handle text messages (JSON commands)
-            elif "text" in message:
+            elif message.get("text") is not None:
                 try:
                     data = json.loads(message["text"])
                     
                     # Handle different message types
                     if data.get("type") == "ping":
-                        await websocket.send_text(json.dumps({
+                        await manager.send_json(session_id, {
                             "type": "pong"
-                        }))
-                    elif data.get("type") == "speak_text":
-                        # Handle welcome message - start assessment
-                        # Get first assessment question
-                        first_question = get_next_question(0)
+                        })
+                    elif data.get("type") == "configure":
+                        # Per-connection options, e.g. {"audio_transport": "binary"}
+                        if data.get("audio_transport") in (AUDIO_TRANSPORT_JSON, AUDIO_TRANSPORT_BINARY):
+                            audio_transport = data["audio_transport"]
+                        
+                        await manager.send_json(session_id, {
+                            "type": "configured",
+                            "audio_transport": audio_transport
+                        })
+                    elif data.get("type") == "start_stream":
+                        # Patient started talking - stop Dr. Smith and open the live STT stream
+                        await cancel_turn(session_id, turn_task)
+                        turn_task = None
+                        prefetch_next_question(session_id, await session_store.get_stage(session_id))
+                        if live_session:
+                            await live_session.close()
+                        live_session = await open_live_transcription(session_id)
+                        streaming = True
+                        stream_buffer = bytearray()
                         
-                        # Initialize conversation with greeting
-                        conversation_history[session_id] = [{
-                            "role": "assistant",
-                            "content": first_question["question"]
-                        }]
-                        assessment_stage[session_id] = 1  # Move to next stage after greeting
+                        await manager.send_json(session_id, {
+                            "type": "stream_started",
+                            "live": bool(live_session)
+                        })
+                    elif data.get("type") == "end_stream":
+                        # Patient stopped talking - flush STT and run the turn
+                        if not streaming:
+                            continue
+                        streaming = False
+                        received_at = time.perf_counter()
                         
-                        # Send text response
-                        await websocket.send_text(json.dumps({
-                            "type": "ai_response",
-                            "text": first_question["question"]
-                        }))
+                        await manager.send_json(session_id, {
+                            "type": "processing",
+                            "message": "Transcribing your speech..."
+                        })
                         
-                        # Generate audio with ElevenLabs TTS
-                        if ELEVENLABS_KEY:
-                            print(f"Generating welcome message audio with ElevenLabs...")
-                            try:
-                                audio_stream = generate(
-                                    text=first_question["question"],
-                                    api_key=ELEVENLABS_KEY
-                                )
-                                
-                                # Convert audio stream to base64
-                                audio_base64 = base64.b64encode(audio_stream).decode('utf-8')
-                                
-                                # Send audio response
-                                await websocket.send_text(json.dumps({
-                                    "type": "ai_audio",
-                                    "audio": audio_base64
-                                }))
-                                print(f"✅ Welcome message audio sent to client")
-                            except Exception as e:
-                                print(f"ElevenLabs TTS error: {str(e)}")
+                        if live_session:
+                            transcription = finish_live_transcription(live_session)
+                            live_session = None
+                        else:
+                            transcription = transcribe_recording(bytes(stream_buffer))
+                        stream_buffer = bytearray()
                         
-                        # Send greeting to HeyGen avatar if session exists
-                        if HEYGEN_KEY and session_id in heygen_sessions:
-                            try:
-                                heygen_session_id = heygen_sessions[session_id]
-                                print(f"Sending greeting to HeyGen avatar...")
-                                
-                                result = await send_heygen_message(
-                                    api_key=HEYGEN_KEY,
-                                    session_id=heygen_session_id,
-                                    text=first_question["question"]
-                                )
-                                
-                                if result.get("success"):
-                                    print(f"HeyGen avatar speaking greeting!")
-                                else:
-                                    print(f"HeyGen error: {result.get('error')}")
-                                    
-                            except Exception as e:
-                                print(f"HeyGen error: {str(e)}")
+                        await cancel_turn(session_id, turn_task)
+                        turn_task = asyncio.create_task(run_patient_turn(
+                            session_id, transcription, audio_transport, received_at
+                        ))
+                    elif data.get("type") == "speak_text":
+                        # Handle welcome message - start assessment
+                        await cancel_turn(session_id, turn_task)
+                        turn_task = asyncio.create_task(speak_greeting(session_id, audio_transport))
                 except json.JSONDecodeError:
                     pass
             
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        manager.disconnect(session_id, websocket)
     except RuntimeError as e:
         # Handle "Cannot call receive once disconnect" error
-        manager.disconnect(session_id)
+        manager.disconnect(session_id, websocket)
     except Exception as e:
-        print(f"WebSocket error for session {session_id}: {str(e)}")
-        manager.disconnect(session_id)
+        logger.error("WebSocket error for session %s: %s", session_id, e)
+        manager.disconnect(session_id, websocket)
+    finally:
+        # Nobody is listening any more - stop paying for the current turn
+        if turn_task and not turn_task.done():
+            turn_task.cancel()
+        speculator.discard(session_id, "disconnected")
+        await session_store.clear_question_end(session_id)
+        if live_session:
+            await live_session.close()
 
 @app.get("/")
 async def root():
     return {"message": "Dementia Detection AI API is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    # Celery workers keep their span histograms in Redis
+    try:
+        await load_remote_spans(redis_client)
+    except Exception as e:
+        logger.warning("Celery span metrics unavailable: %s", e)
+    # Queue depth and oldest-message age, read from the broker lists; worker retry/drop counts
+    try:
+        await load_queue_stats(redis_client)
+        await load_retry_counts(redis_client)
+    except Exception as e:
+        logger.warning("Celery queue metrics unavailable: %s", e)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/latency")
+async def latency_metrics():
+    """p50/p95/p99 time-to-first-audio per assessment stage (this process, since start)"""
+    return {"time_to_first_audio": latency_percentiles()}
+
+@app.get("/api/session/{session_id}/stats")
+async def session_stats(session_id: str):
+    """Per-session reply path counters: LLM call rate, mean reply latency and token usage"""
+    stats = await session_store.get_stats(session_id)
+    turns = stats.get("turns", 0)
+    llm_turns = stats.get("llm_turns", 0)
+    template_turns = stats.get("template_turns", 0)
+    return {
+        "session_id": session_id,
+        "fast_path": ASSESSMENT_FAST_PATH,
+        "turns": int(turns),
+        "llm_turns": int(llm_turns),
+        "template_turns": int(template_turns),
+        "llm_call_rate": llm_turns / turns if turns else None,
+        "mean_reply_ms_llm": 1000 * stats.get("reply_seconds_llm", 0) / llm_turns if llm_turns else None,
+        "mean_reply_ms_template": 1000 * stats.get("reply_seconds_template", 0) / template_turns if template_turns else None,
+        "tokens": usage_summary(stats)
+    }
+
+@app.get("/api/session/{session_id}/scores")
+async def session_scores(session_id: str):
+    """Running per-domain score vector, updated after every answer"""
+    evidence = await session_store.get_evidence(session_id)
+    scores = domain_scores(evidence)
+    return {
+        "session_id": session_id,
+        "scores": scores,
+        "overall_risk": risk_level(scores),
+        "evidence": [item for _, item in sorted(evidence.items())]
+    }
+
 @app.get("/health")
 async def health_check():
     services = {
         "status": "healthy",
-        "azure_openai": bool(openai_client),
-        "azure_endpoint": AZURE_OPENAI_ENDPOINT if openai_client else None,
+        "azure_openai": provider_registry.openai_configured,
+        "azure_endpoint": AZURE_OPENAI_ENDPOINT if provider_registry.openai_configured else None,
         "deepgram": bool(DEEPGRAM_KEY),
         "elevenlabs": bool(ELEVENLABS_KEY),
         "heygen": bool(HEYGEN_KEY),
@@ -397,25 +982,25 @@ async def health_check():
 async def create_heygen_avatar_session():
     """Create a new HeyGen streaming avatar session"""
     if not HEYGEN_KEY:
-        print("WARNING: HeyGen API key not found in environment variables")
+        logger.warning("HeyGen API key not found in environment variables")
         raise HTTPException(status_code=500, detail="HeyGen API key not configured")
     
-    print(f"Creating HeyGen session with API key: {HEYGEN_KEY[:10]}...")
+    logger.info("Creating HeyGen session with API key: %s...", HEYGEN_KEY[:10])
     
     try:
         result = await create_heygen_session(HEYGEN_KEY)
-        print(f"HeyGen session result: {result}")
+        logger.info("HeyGen session result: %s", result)
         
         if result.get("success"):
             return result
         else:
             error_msg = result.get("error", "Unknown error")
-            print(f"HeyGen session creation failed: {error_msg}")
+            logger.error("HeyGen session creation failed: %s", error_msg)
             raise HTTPException(status_code=500, detail=f"HeyGen error: {error_msg}")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Exception creating HeyGen session: {str(e)}")
+        logger.error("Exception creating HeyGen session: %s", e)
         raise HTTPException(status_code=500, detail=f"Exception: {str(e)}")
 
 @app.post("/api/heygen/start-session")
@@ -425,8 +1010,7 @@ async def start_heygen_session(session_data: dict):
         raise HTTPException(status_code=500, detail="HeyGen API key not configured")
     
     try:
-        from .services.heygen_avatar import HeyGenStreamingAvatar
-        client = HeyGenStreamingAvatar(HEYGEN_KEY)
+        client = get_heygen_client(HEYGEN_KEY)
         
         session_id = session_data.get("session_id")
         sdp_answer = session_data.get("sdp_answer")
@@ -436,7 +1020,7 @@ async def start_heygen_session(session_data: dict):
         
         # Store the HeyGen session ID
         if result.get("success") and user_session_id:
-            heygen_sessions[user_session_id] = session_id
+            await session_store.set_heygen_session(user_session_id, session_id)
         
         return result
     except Exception as e:
@@ -4,11 +4,14 @@ Endpoints for AI doctor conversation and elderly care features
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import uuid
 from datetime import datetime
 
+from server.services.job_results import job_results
+
 router = APIRouter()
 
 # In-memory session storage (in production, use Redis or database)
@@ -57,10 +60,59 @@ async def start_doctor_session(request: SessionStartRequest):
         status="active"
     )
 
+def finalize_doctor_reply(job_id: str, result: dict, params: dict) -> dict:
+    """
+    Job finalizer: generate_doctor_response result -> DoctorConversationResponse
+    
+    Runs on every read of the job, so it only builds the response; the turn
+    is applied to the session by record_doctor_turn when the job finishes.
+    """
+    if result.get("status") != "success":
+        raise ValueError("Failed to generate response")
+    return DoctorConversationResponse(
+        session_id=params["session_id"],
+        doctor_response=result["response"],
+        timestamp=result.get("timestamp") or datetime.now().isoformat()
+    ).dict()
+
+job_results.register_finalizer("doctor_reply", finalize_doctor_reply)
+
+def record_doctor_turn(session_id: str, user_message: str, status: str, result):
+    """
+    Job completion hook: add a finished reply to the session, exactly once
+    
+    Runs when the job finishes, whether or not the reply is ever read.
+    """
+    if status != "succeeded" or not isinstance(result, dict) or result.get("status") != "success":
+        return
+    session = sessions.setdefault(session_id, {
+        "conversation_history": [],
+        "started_at": datetime.now().isoformat(),
+        "status": "active"
+    })
+    
+    # Per-session token accounting (see GET /session/{id})
+    usage = session.setdefault(
+        "token_usage", {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    )
+    usage["calls"] += 1
+    for name in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+        usage[name] += result.get("metadata", {}).get(name) or 0
+    
+    # Update session history
+    session["conversation_history"].extend([
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": result["response"]}
+    ])
+
 @router.post("/conversation", response_model=DoctorConversationResponse)
-async def doctor_conversation(request: DoctorConversationRequest):
+async def doctor_conversation(request: DoctorConversationRequest, wait: bool = True):
     """
     Process a conversation turn with the AI doctor
+    
+    The reply is generated by a Celery job. wait=true (default) suspends until
+    it is ready without holding the event loop; wait=false - or a reply not
+    ready within 30 seconds - answers 202 with the job to follow at /api/jobs/{job_id}.
     """
     try:
         # Get or create session
@@ -74,32 +126,29 @@ async def doctor_conversation(request: DoctorConversationRequest):
         # Generate doctor response using Celery task
         from server.tasks.doctor_conversation import generate_doctor_response
         
-        task = generate_doctor_response.delay(
+        job = await job_results.submit(
+            "doctor_reply",
+            generate_doctor_response,
+            params={"session_id": request.session_id},
+            on_complete=lambda status, result: record_doctor_turn(
+                request.session_id, request.user_message, status, result
+            ),
             session_id=request.session_id,
             user_message=request.user_message,
             conversation_history=request.conversation_history
         )
+        if not wait:
+            return JSONResponse(status_code=202, content=job)
         
-        # Wait for result (in production, you might want to use webhooks or polling)
-        result = task.get(timeout=30)
-        
-        if result["status"] == "success":
-            doctor_response = result["response"]
-            
-            # Update session history
-            sessions[request.session_id]["conversation_history"].extend([
-                {"role": "user", "content": request.user_message},
-                {"role": "assistant", "content": doctor_response}
-            ])
-            
-            return DoctorConversationResponse(
-                session_id=request.session_id,
-                doctor_response=doctor_response,
-                timestamp=datetime.now().isoformat()
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate response")
+        result = await job_results.wait(job["job_id"], timeout=30)
+        if result["status"] == "failed":
+            raise HTTPException(status_code=500, detail=result.get("error") or "Failed to generate response")
+        if result["status"] != "succeeded":
+            return JSONResponse(status_code=202, content={**job, "status": result["status"]})
+        return result["result"]
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -132,15 +181,15 @@ async def end_doctor_session(session_id: str):
     # Generate assessment if conversation history exists
     if session.get("conversation_history"):
         from server.tasks.doctor_conversation import analyze_elderly_conversation
+        from server.tasks.context_manager import bounded_transcript
         
-        # Build transcript
-        transcript = "\n".join([
-            f"{'Patient' if msg['role'] == 'user' else 'Dr. Smith'}: {msg['content']}"
-            for msg in session["conversation_history"]
-        ])
+        # Build transcript - recent turns verbatim, older ones condensed, within the token budget
+        transcript = bounded_transcript(session["conversation_history"])
         
-        # Queue assessment task
-        task = analyze_elderly_conversation.delay(
+        # Queue assessment task - follow it at /api/jobs/{assessment_task_id}
+        job = await job_results.submit(
+            "doctor_assessment",
+            analyze_elderly_conversation,
             session_id=session_id,
             full_transcript=transcript
         )
@@ -148,7 +197,8 @@ async def end_doctor_session(session_id: str):
         return {
             "session_id": session_id,
             "status": "completed",
-            "assessment_task_id": task.id,
+            "assessment_task_id": job["job_id"],
+            "assessment_status_url": job["status_url"],
             "message": "Session ended. Assessment is being generated."
         }
     
@@ -0,0 +1,73 @@
+"""
+Job API Router
+Follow Celery-backed jobs (reports, doctor replies) by polling, SSE or WebSocket
+"""
+
+import json
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from server.services.job_results import JOB_WAIT_TIMEOUT_SECONDS, job_results
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """
+    Current state of a job; result (or error) once it finished
+
+    wait=N suspends up to N seconds (capped at JOB_WAIT_TIMEOUT_SECONDS) for it to finish.
+    """
+    if wait > 0:
+        job = await job_results.wait(job_id, timeout=min(wait, JOB_WAIT_TIMEOUT_SECONDS))
+    else:
+        job = await job_results.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events: one "status" event per state change, closing after the final one
+
+    A comment line is sent every JOB_KEEPALIVE_SECONDS while the job runs.
+    """
+    if await job_results.status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        async for job in job_results.updates(job_id):
+            if job is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: status\ndata: {json.dumps(job)}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{job_id}/ws")
+async def job_websocket(websocket: WebSocket, job_id: str):
+    """
+    Push the job's state changes over a WebSocket, closing after the final one
+
+    {"job_id", "keepalive": true} is sent every JOB_KEEPALIVE_SECONDS while the job runs.
+    """
+    await websocket.accept()
+    try:
+        if await job_results.status(job_id) is None:
+            await websocket.send_json({"job_id": job_id, "status": "not_found"})
+        else:
+            async for job in job_results.updates(job_id):
+                if job is None:
+                    await websocket.send_json({"job_id": job_id, "keepalive": True})
+                    continue
+                await websocket.send_json(job)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -1,14 +1,38 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from datetime import datetime
 import json
+import re
+from fastapi.responses import JSONResponse
 from server.tasks.ai_processing import analyze_cognitive_assessment
+from server.tasks.assessment_scoring import (
+    domain_scores,
+    is_complete,
+    risk_level,
+    score_transcript,
+    summarize_evidence
+)
+from server.tasks.linguistic_features import (
+    FEATURE_NAMES,
+    TRIAGE_THRESHOLD,
+    extract_features,
+    extract_features_batch,
+    triage_scores
+)
+from server.tasks.speech_timing import timing_features, unpack_words
+from server.services.session_store import session_store
+from server.services.provider_executor import run_blocking
+from server.services.job_results import job_results
 
 router = APIRouter()
 
 class ReportRequest(BaseModel):
     transcript: str
     session_id: Optional[str] = None
+    # When the conversation took place - orientation answers are checked
+    # against it, and left to the model if it is not known
+    recorded_at: Optional[datetime] = None
 
 class DementiaReport(BaseModel):
     session_id: str
@@ -20,71 +44,223 @@ class DementiaReport(BaseModel):
     overall_risk: str
     recommendations: str
     detailed_analysis: str
+    linguistic_features: Optional[Dict[str, float]] = None
+    speech_timing: Optional[Dict[str, Any]] = None
+
+class TriageTranscript(BaseModel):
+    id: str
+    transcript: str
+
+class TriageRequest(BaseModel):
+    transcripts: List[TriageTranscript]
+
+RISK_RECOMMENDATIONS = {
+    "Low": "Continue regular monitoring. Consider scheduling follow-up assessment in 3 months.",
+    "Medium": "Schedule a follow-up appointment with your doctor within the next 1-3 months to monitor cognitive health.",
+    "High": "Visit a hospital or neurologist as soon as possible for a comprehensive evaluation."
+}
+
+def report_from_evidence(
+    session_id: str,
+    evidence: dict,
+    linguistic_features: Optional[Dict[str, float]] = None,
+    speech_timing: Optional[Dict[str, Any]] = None
+) -> Optional[DementiaReport]:
+    """
+    Build the report from locally scored answers (live session or transcript)
+    
+    Returns:
+        DementiaReport, or None if some domain has not been scored yet
+    """
+    scores = domain_scores(evidence)
+    if not is_complete(scores):
+        return None
+    
+    def to_report_score(domain: str) -> int:
+        return max(1, round(scores[domain]["score"]))
+    
+    overall_risk = risk_level(scores)
+    return DementiaReport(
+        session_id=session_id,
+        memory_score=to_report_score("memory"),
+        language_score=to_report_score("language"),
+        attention_score=to_report_score("attention"),
+        executive_score=to_report_score("reasoning"),
+        orientation_score=to_report_score("orientation"),
+        overall_risk=overall_risk,
+        recommendations=RISK_RECOMMENDATIONS[overall_risk],
+        detailed_analysis="Scored answer by answer:\n" + summarize_evidence(evidence),
+        linguistic_features=linguistic_features,
+        speech_timing=speech_timing
+    )
+
+def report_from_analysis(
+    session_id: str,
+    analysis: str,
+    local_evidence: dict,
+    linguistic_features: Optional[Dict[str, float]] = None,
+    speech_timing: Optional[Dict[str, Any]] = None
+) -> DementiaReport:
+    """
+    Build the report from the model's free-text analysis, with locally scored
+    domains taking precedence over the model's numbers
+    """
+    # Extract scores from AI analysis (simplified parsing)
+    score_pattern = r'(\w+)\s*[Ss]core[:\s]*(\d+)'
+    scores = {}
+    for match in re.finditer(score_pattern, analysis, re.IGNORECASE):
+        domain = match.group(1).lower()
+        score = int(match.group(2))
+        scores[domain] = score
+    
+    local_scores = domain_scores(local_evidence)
+    for domain, key in (("memory", "memory"), ("language", "language"), ("attention", "attention"),
+                        ("reasoning", "executive"), ("orientation", "orientation")):
+        if local_scores[domain]["score"] is not None:
+            scores[key] = max(1, round(local_scores[domain]["score"]))
+    
+    # Default scores if not found in analysis
+    memory_score = scores.get('memory', 7)
+    language_score = scores.get('language', 8)
+    attention_score = scores.get('attention', 6)
+    executive_score = scores.get('executive', 7)
+    orientation_score = scores.get('orientation', 9)
+    
+    # Calculate overall risk
+    avg_score = (memory_score + language_score + attention_score + 
+                executive_score + orientation_score) / 5
+    
+    if avg_score >= 8:
+        overall_risk = "Low"
+    elif avg_score >= 6:
+        overall_risk = "Medium"
+    else:
+        overall_risk = "High"
+    
+    return DementiaReport(
+        session_id=session_id,
+        memory_score=memory_score,
+        language_score=language_score,
+        attention_score=attention_score,
+        executive_score=executive_score,
+        orientation_score=orientation_score,
+        overall_risk=overall_risk,
+        recommendations="Continue regular monitoring. Consider scheduling follow-up assessment in 3 months.",
+        detailed_analysis=analysis,
+        linguistic_features=linguistic_features,
+        speech_timing=speech_timing
+    )
+
+def finalize_report_job(job_id: str, result: dict, params: dict) -> dict:
+    """Job finalizer: analyze_cognitive_assessment result -> DementiaReport"""
+    if result.get("status") == "error":
+        raise ValueError(result.get("error", "analysis failed"))
+    return report_from_analysis(
+        params["session_id"],
+        result.get("assessment", ""),
+        params["local_evidence"],
+        params.get("linguistic_features"),
+        params.get("speech_timing")
+    ).dict()
+
+job_results.register_finalizer("report", finalize_report_job)
 
 @router.post("/generate", response_model=DementiaReport)
-async def generate_report(request: ReportRequest):
-    """Generate dementia assessment report from transcript"""
+async def generate_report(request: ReportRequest, wait: bool = True):
+    """
+    Generate dementia assessment report from transcript
+    
+    Reports that need the LLM run as a job. wait=true (default) suspends
+    until it finishes without holding the event loop; wait=false - or a job
+    still running after JOB_WAIT_TIMEOUT_SECONDS - answers 202 with the job
+    id to follow at /api/jobs/{job_id} (poll, /events SSE or /ws).
+    """
     try:
-        # Queue the analysis task
-        task = analyze_cognitive_assessment.delay(
-            request.session_id or "demo_session",
-            request.transcript
-        )
-        
-        # Wait for task completion (in production, you'd use async polling)
-        result = task.get(timeout=60)
-        
-        # Parse the AI response to extract structured data
-        analysis = result.get("assessment", "")
-        
-        # Extract scores from AI analysis (simplified parsing)
-        # Parse the analysis text to extract scores
-        import re
-        
-        # Try to extract scores from the analysis text
-        score_pattern = r'(\w+)\s*[Ss]core[:\s]*(\d+)'
-        scores = {}
-        for match in re.finditer(score_pattern, analysis, re.IGNORECASE):
-            domain = match.group(1).lower()
-            score = int(match.group(2))
-            scores[domain] = score
+        # Speech markers (fillers, vocabulary, word-finding) are computed locally
+        features = extract_features(request.transcript)
+        timing = None
         
-        # Default scores if not found in analysis
-        memory_score = scores.get('memory', 7)
-        language_score = scores.get('language', 8)
-        attention_score = scores.get('attention', 6)
-        executive_score = scores.get('executive', 7)
-        orientation_score = scores.get('orientation', 9)
+        # Live sessions were scored answer by answer - no need to re-read the transcript
+        if request.session_id:
+            # Pauses and response latency from the STT word timings of the session
+            timing = timing_features(unpack_words(await session_store.get_timings(request.session_id)))
+            evidence = await session_store.get_evidence(request.session_id)
+            report = report_from_evidence(request.session_id, evidence, features, timing) if evidence else None
+            if report:
+                return report
         
-        # Calculate overall risk
-        avg_score = (memory_score + language_score + attention_score + 
-                    executive_score + orientation_score) / 5
+        # Objective items (orientation, recall, calculation, naming) score locally
+        local_evidence = score_transcript(request.transcript, request.recorded_at)
+        report = report_from_evidence(request.session_id or "demo_session", local_evidence, features, timing)
+        if report:
+            return report
         
-        if avg_score >= 8:
-            overall_risk = "Low"
-        elif avg_score >= 6:
-            overall_risk = "Medium"
-        else:
-            overall_risk = "High"
-        
-        return DementiaReport(
+        # Queue the analysis task; the report is built from its result by finalize_report_job
+        job = await job_results.submit(
+            "report",
+            analyze_cognitive_assessment,
+            params={
+                "session_id": request.session_id or "demo_session",
+                "local_evidence": local_evidence,
+                "linguistic_features": features,
+                "speech_timing": timing
+            },
             session_id=request.session_id or "demo_session",
-            memory_score=memory_score,
-            language_score=language_score,
-            attention_score=attention_score,
-            executive_score=executive_score,
-            orientation_score=orientation_score,
-            overall_risk=overall_risk,
-            recommendations="Continue regular monitoring. Consider scheduling follow-up assessment in 3 months.",
-            detailed_analysis=analysis
+            transcript=request.transcript
         )
+        if not wait:
+            return JSONResponse(status_code=202, content=job)
+        
+        result = await job_results.wait(job["job_id"])
+        if result["status"] == "failed":
+            raise RuntimeError(result.get("error"))
+        if result["status"] != "succeeded":
+            return JSONResponse(status_code=202, content={**job, "status": result["status"]})
+        return result["result"]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
+@router.post("/triage")
+async def triage_transcripts(request: TriageRequest):
+    """
+    Screen a batch of transcripts with local speech markers only
+    
+    Returns every transcript's markers and triage score, highest first;
+    needs_llm_review marks the ones worth the full /generate analysis.
+    """
+    if not request.transcripts:
+        return {"count": 0, "flagged": 0, "results": []}
+    
+    features = await run_blocking(
+        extract_features_batch, [item.transcript for item in request.transcripts]
+    )
+    scores = triage_scores(features)
+    
+    results = [
+        {
+            "id": item.id,
+            "triage_score": round(float(scores[index]), 3),
+            "needs_llm_review": bool(scores[index] >= TRIAGE_THRESHOLD),
+            "linguistic_features": {name: round(float(features[name][index]), 4) for name in FEATURE_NAMES}
+        }
+        for index, item in enumerate(request.transcripts)
+    ]
+    results.sort(key=lambda result: result["triage_score"], reverse=True)
+    
+    return {
+        "count": len(results),
+        "flagged": sum(result["needs_llm_review"] for result in results),
+        "results": results
+    }
+
 @router.post("/upload-transcript")
-async def upload_transcript(file: UploadFile = File(...)):
-    """Upload transcript file for analysis"""
+async def upload_transcript(
+    file: UploadFile = File(...),
+    wait: bool = True,
+    recorded_at: Optional[datetime] = None
+):
+    """Upload transcript file for analysis (recorded_at: when the conversation took place)"""
     if not file.filename.endswith('.txt'):
         raise HTTPException(status_code=400, detail="Only .txt files are supported")
     
@@ -92,8 +268,8 @@ async def upload_transcript(file: UploadFile = File(...)):
     transcript = content.decode('utf-8')
     
     # Generate report from uploaded transcript
-    request = ReportRequest(transcript=transcript)
-    return await generate_report(request)
+    request = ReportRequest(transcript=transcript, recorded_at=recorded_at)
+    return await generate_report(request, wait=wait)
 
 @router.get("/sample-transcript")
 async def get_sample_transcript():
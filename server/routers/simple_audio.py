@@ -9,11 +9,10 @@ from dotenv import load_dotenv
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 
-# Import AI services
+# Import AI services (shared, pooled clients from the provider registry)
 try:
-    from deepgram import DeepgramClient, PrerecordedOptions
-    import openai
-    from elevenlabs import generate, set_api_key
+    from server.services.provider_registry import provider_registry, AZURE_OPENAI_DEPLOYMENT
+    from server.services.speech_services import DEEPGRAM_KEY, transcribe_prerecorded, transcript_text
     SERVICES_AVAILABLE = True
 except ImportError:
     SERVICES_AVAILABLE = False
@@ -22,15 +21,6 @@ load_dotenv()
 
 router = APIRouter()
 
-# Initialize API clients
-if SERVICES_AVAILABLE:
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-    DEEPGRAM_KEY = os.getenv("DEEPGRAM_API_KEY")
-    ELEVENLABS_KEY = os.getenv("ELEVENLABS_API_KEY")
-    
-    if ELEVENLABS_KEY:
-        set_api_key(ELEVENLABS_KEY)
-
 class AudioTranscriptRequest(BaseModel):
     audio_base64: str
 
@@ -44,7 +34,7 @@ async def process_audio_simple(file: UploadFile = File(...)):
     if not SERVICES_AVAILABLE:
         raise HTTPException(
             status_code=503,
-            detail="AI services not available. Please install: pip install deepgram-sdk openai elevenlabs"
+            detail="AI services not available. Please install: pip install openai aiohttp httpx"
         )
     
     try:
@@ -54,32 +44,21 @@ async def process_audio_simple(file: UploadFile = File(...)):
         # Step 1: Speech-to-Text with Deepgram
         if DEEPGRAM_KEY:
             try:
-                deepgram = DeepgramClient(DEEPGRAM_KEY)
-                
-                payload = {"buffer": audio_bytes}
-                options = PrerecordedOptions(
-                    model="nova-2",
-                    smart_format=True,
-                    punctuate=True
-                )
-                
-                response = deepgram.listen.prerecorded.v("1").transcribe_file(
-                    payload, options
-                )
-                
-                transcript = response.results.channels[0].alternatives[0].transcript
+                response = await transcribe_prerecorded(audio_bytes)
+                transcript = transcript_text(response)
             except Exception as e:
                 transcript = f"[Speech-to-text error: {str(e)}]"
         else:
             transcript = "[No Deepgram API key configured]"
         
         # Step 2: Generate AI response with GPT-4
-        if openai.api_key and transcript:
+        openai_client = provider_registry.openai_client()
+        if openai_client and transcript:
             try:
                 from server.tasks.doctor_conversation import DOCTOR_SYSTEM_PROMPT
                 
-                response = openai.ChatCompletion.create(
-                    model="gpt-4",
+                response = await openai_client.chat.completions.create(
+                    model=AZURE_OPENAI_DEPLOYMENT,
                     messages=[
                         {"role": "system", "content": DOCTOR_SYSTEM_PROMPT},
                         {"role": "user", "content": transcript}
@@ -92,7 +71,7 @@ async def process_audio_simple(file: UploadFile = File(...)):
             except Exception as e:
                 ai_response = f"I apologize, but I encountered an error: {str(e)}"
         else:
-            ai_response = "OpenAI API key not configured."
+            ai_response = "Azure OpenAI not configured."
         
         # Step 3: Generate speech (optional, for future enhancement)
         # For now, just return text responses
@@ -112,7 +91,7 @@ async def check_services():
     """Check which AI services are available"""
     
     services = {
-        "openai": bool(os.getenv("OPENAI_API_KEY")),
+        "openai": provider_registry.openai_configured if SERVICES_AVAILABLE else False,
         "deepgram": bool(os.getenv("DEEPGRAM_API_KEY")),
         "elevenlabs": bool(os.getenv("ELEVENLABS_API_KEY")),
         "services_installed": SERVICES_AVAILABLE
@@ -0,0 +1,106 @@
+"""
+Audio Streaming Transports
+How Dr. Smith's TTS audio reaches the browser: sequenced binary frames, or the legacy base64 JSON message
+
+The JSON transport keeps the original protocol - exactly one
+{"type": "ai_audio", "audio": <base64>} per reply, sent once the whole reply
+is rendered - so existing clients work unchanged. Sentence-level streaming
+is only available with the binary transport.
+
+Binary frame layout (network byte order):
+
+    +------+-----------+----------+-----------------+
+    | kind | stream_id | sequence | payload         |
+    | u8   | u32       | u32      | remaining bytes |
+    +------+-----------+----------+-----------------+
+
+    kind 1 = START  payload: UTF-8 JSON {"mime": "audio/mpeg"}
+    kind 2 = CHUNK  payload: encoded audio bytes, sequence counts from 0
+    kind 3 = END    payload: empty, sequence = number of chunks sent
+"""
+
+import json
+import base64
+import struct
+import itertools
+from typing import Awaitable, Callable
+
+FRAME_START = 1
+FRAME_CHUNK = 2
+FRAME_END = 3
+
+FRAME_HEADER = struct.Struct("!BII")
+
+AUDIO_MIME = "audio/mpeg"
+
+# Values accepted in the client's {"type": "configure", "audio_transport": ...} message
+AUDIO_TRANSPORT_JSON = "json"
+AUDIO_TRANSPORT_BINARY = "binary"
+
+_stream_ids = itertools.count(1)
+
+
+def encode_frame(kind: int, stream_id: int, sequence: int, payload: bytes = b"") -> bytes:
+    """Pack one binary audio frame"""
+    return FRAME_HEADER.pack(kind, stream_id, sequence) + payload
+
+
+def decode_frame(frame: bytes):
+    """
+    Unpack one binary audio frame
+
+    Returns:
+        tuple: (kind, stream_id, sequence, payload)
+    """
+    kind, stream_id, sequence = FRAME_HEADER.unpack_from(frame)
+    return kind, stream_id, sequence, frame[FRAME_HEADER.size:]
+
+
+class BinaryAudioTransport:
+    """One reply = one stream of sequenced binary frames the client plays as they arrive"""
+
+    # Each write() reaches the client straight away
+    streams_chunks = True
+
+    def __init__(self, send_bytes: Callable[[bytes], Awaitable[None]], mime: str = AUDIO_MIME):
+        self.send_bytes = send_bytes
+        self.mime = mime
+        self.stream_id = next(_stream_ids)
+        self.sequence = 0
+        self.started = False
+
+    async def write(self, chunk: bytes):
+        if not self.started:
+            self.started = True
+            start = json.dumps({"mime": self.mime}).encode("utf-8")
+            await self.send_bytes(encode_frame(FRAME_START, self.stream_id, 0, start))
+        await self.send_bytes(encode_frame(FRAME_CHUNK, self.stream_id, self.sequence, chunk))
+        self.sequence += 1
+
+    async def close(self):
+        if self.started:
+            await self.send_bytes(encode_frame(FRAME_END, self.stream_id, self.sequence))
+
+
+class JsonAudioTransport:
+    """Compatibility mode: the whole reply is sent as one base64 ai_audio message"""
+
+    # Audio only leaves at close()
+    streams_chunks = False
+
+    def __init__(self, send_text: Callable[[str], Awaitable[None]]):
+        self.send_text = send_text
+        self._audio = bytearray()
+
+    async def write(self, chunk: bytes):
+        # Sentence clips are MP3 frames, so they concatenate into one playable file
+        self._audio.extend(chunk)
+
+    async def close(self):
+        if not self._audio:
+            return
+        await self.send_text(json.dumps({
+            "type": "ai_audio",
+            "audio": base64.b64encode(bytes(self._audio)).decode('utf-8')
+        }))
+        self._audio = bytearray()
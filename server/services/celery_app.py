@@ -1,14 +1,33 @@
-from celery import Celery
+from celery import Celery, current_task
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_revoked,
+    worker_init,
+    worker_process_init
+)
 import os
+import time
 from dotenv import load_dotenv
 
+from server.services import tracing
+from server.services.job_results import publish_job_done
+from server.services.task_queues import (
+    BROKER_TRANSPORT_OPTIONS,
+    PRIORITY_INTERACTIVE,
+    QUEUE_INTERACTIVE,
+    TASK_ROUTES
+)
+from server.services.task_deadlines import record_expired, request_header, stamp_deadline
+
 load_dotenv()
 
 celery_app = Celery(
     "dementia_detection",
     broker=os.getenv("REDIS_URL", "redis://localhost:6379"),
     backend=os.getenv("REDIS_URL", "redis://localhost:6379"),
-    include=['server.tasks.audio_processing', 'server.tasks.ai_processing']
+    include=['server.tasks.audio_processing', 'server.tasks.ai_processing', 'server.tasks.doctor_conversation']
 )
 
 # Celery configuration
@@ -23,4 +42,61 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    # Interactive vs batch queues and priorities (see task_queues): run
+    # worker -Q interactive,stt,llm,tts and worker -Q batch as separate pools
+    task_routes=TASK_ROUTES,
+    task_default_queue=QUEUE_INTERACTIVE,
+    task_default_priority=PRIORITY_INTERACTIVE,
+    broker_transport_options=BROKER_TRANSPORT_OPTIONS,
 )
+
+
+# Task spans: every task is timed as span "task"; spans inside a task (stt,
+# llm, tts) are labelled with its name. Workers write them to Redis and the
+# API's /metrics merges them (tracing.load_remote_spans).
+_task_started = {}
+
+
+@worker_init.connect
+@worker_process_init.connect
+def _init_worker_tracing(**kwargs):
+    tracing.enable_remote_spans()
+
+
+@before_task_publish.connect
+def _stamp_headers(headers=None, **kwargs):
+    if headers is None:
+        return
+    now = time.time()
+    # Queue age (task_queues.load_queue_stats) and the queue_wait span
+    headers.setdefault("published_at", now)
+    # Deadline and expiry; stages, replacements and retries inherit the publisher's
+    stamp_deadline(headers, now, current_task.request if current_task else None)
+
+
+@task_prerun.connect
+def _start_task_span(task_id=None, task=None, **kwargs):
+    tracing.current_task.set(task.name.rsplit(".", 1)[-1])
+    _task_started[task_id] = time.perf_counter()
+    published_at = request_header(task.request, "published_at")
+    if published_at:
+        tracing.observe_span("queue_wait", max(0.0, time.time() - float(published_at)))
+
+
+@task_postrun.connect
+def _end_task_span(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        tracing.observe_span("task", time.perf_counter() - started)
+    # The result is stored by now; wake API processes waiting on it (job_results)
+    if state in ("SUCCESS", "FAILURE"):
+        publish_job_done(task_id, state)
+
+
+@task_revoked.connect
+def _task_revoked(request=None, expired=False, sender=None, **kwargs):
+    # Past its deadline before a worker got to it: dropped, never run
+    if expired:
+        record_expired(getattr(sender, "name", None))
+    if request is not None:
+        publish_job_done(request.id, "REVOKED")
@@ -9,12 +9,19 @@ import asyncio
 import json
 from typing import Optional, Dict
 
+from .provider_registry import provider_registry, client_reuse
+
+HEYGEN_BASE_URL = os.getenv("HEYGEN_BASE_URL", "https://api.heygen.com")
+
+# One client per API key, reused across sessions
+_clients: Dict[str, "HeyGenStreamingAvatar"] = {}
+
 class HeyGenStreamingAvatar:
     """HeyGen Streaming Avatar API client for real-time talking avatars"""
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.heygen.com/v1"
+        self.base_url = f"{HEYGEN_BASE_URL}/v1"
         self.headers = {
             "X-Api-Key": api_key,
             "Content-Type": "application/json"
@@ -46,40 +53,40 @@ class HeyGenStreamingAvatar:
         print(f"HeyGen: Payload: {payload}")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(endpoint, json=payload, headers=self.headers) as response:
-                    response_text = await response.text()
-                    print(f"HeyGen: Response status: {response.status}")
-                    print(f"HeyGen: Response body: {response_text}")
+            session = provider_registry.http_session()
+            async with session.post(endpoint, json=payload, headers=self.headers) as response:
+                response_text = await response.text()
+                print(f"HeyGen: Response status: {response.status}")
+                print(f"HeyGen: Response body: {response_text}")
                     
-                    if response.status == 200:
-                        result = json.loads(response_text)
-                        print(f"HeyGen: Parsed response: {result}")
+                if response.status == 200:
+                    result = json.loads(response_text)
+                    print(f"HeyGen: Parsed response: {result}")
                         
-                        # HeyGen wraps data in {"code": 100, "data": {...}, "message": "success"}
-                        data = result.get("data", {})
+                    # HeyGen wraps data in {"code": 100, "data": {...}, "message": "success"}
+                    data = result.get("data", {})
                         
-                        # Extract ICE servers from ice_servers2 array
-                        ice_servers_raw = data.get("ice_servers2", [])
-                        ice_servers = []
-                        if isinstance(ice_servers_raw, list):
-                            ice_servers = ice_servers_raw
+                    # Extract ICE servers from ice_servers2 array
+                    ice_servers_raw = data.get("ice_servers2", [])
+                    ice_servers = []
+                    if isinstance(ice_servers_raw, list):
+                        ice_servers = ice_servers_raw
                         
-                        return {
-                            "success": True,
-                            "session_id": data.get("session_id"),
-                            "sdp": data.get("sdp", {}).get("sdp"),  # Extract sdp string from sdp object
-                            "ice_servers": ice_servers,
-                            "access_token": data.get("access_token"),
-                            "url": data.get("url")
-                        }
-                    else:
-                        error_msg = f"HeyGen API error: {response.status} - {response_text}"
-                        print(f"HeyGen: ERROR: {error_msg}")
-                        return {
-                            "success": False,
-                            "error": error_msg
-                        }
+                    return {
+                        "success": True,
+                        "session_id": data.get("session_id"),
+                        "sdp": data.get("sdp", {}).get("sdp"),  # Extract sdp string from sdp object
+                        "ice_servers": ice_servers,
+                        "access_token": data.get("access_token"),
+                        "url": data.get("url")
+                    }
+                else:
+                    error_msg = f"HeyGen API error: {response.status} - {response_text}"
+                    print(f"HeyGen: ERROR: {error_msg}")
+                    return {
+                        "success": False,
+                        "error": error_msg
+                    }
         except Exception as e:
             error_msg = f"Exception creating session: {str(e)}"
             print(f"HeyGen: EXCEPTION: {error_msg}")
@@ -112,23 +119,23 @@ class HeyGenStreamingAvatar:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(endpoint, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("code") == 100:
-                            return {"success": True, "data": result.get("data", {})}
-                        else:
-                            return {
-                                "success": False,
-                                "error": f"HeyGen returned code {result.get('code')}: {result.get('message')}"
-                            }
+            session = provider_registry.http_session()
+            async with session.post(endpoint, json=payload, headers=self.headers) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    if result.get("code") == 100:
+                        return {"success": True, "data": result.get("data", {})}
                     else:
-                        error_text = await response.text()
                         return {
                             "success": False,
-                            "error": f"Start streaming error: {response.status} - {error_text}"
+                            "error": f"HeyGen returned code {result.get('code')}: {result.get('message')}"
                         }
+                else:
+                    error_text = await response.text()
+                    return {
+                        "success": False,
+                        "error": f"Start streaming error: {response.status} - {error_text}"
+                    }
         except Exception as e:
             return {
                 "success": False,
@@ -156,34 +163,67 @@ class HeyGenStreamingAvatar:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(endpoint, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("code") == 100:
-                            data = result.get("data", {})
-                            return {
-                                "success": True,
-                                "task_id": data.get("task_id"),
-                                "duration_ms": data.get("duration_ms")
-                            }
-                        else:
-                            return {
-                                "success": False,
-                                "error": f"HeyGen returned code {result.get('code')}: {result.get('message')}"
-                            }
+            session = provider_registry.http_session()
+            async with session.post(endpoint, json=payload, headers=self.headers) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    if result.get("code") == 100:
+                        data = result.get("data", {})
+                        return {
+                            "success": True,
+                            "task_id": data.get("task_id"),
+                            "duration_ms": data.get("duration_ms")
+                        }
                     else:
-                        error_text = await response.text()
                         return {
                             "success": False,
-                            "error": f"Send message error: {response.status} - {error_text}"
+                            "error": f"HeyGen returned code {result.get('code')}: {result.get('message')}"
                         }
+                else:
+                    error_text = await response.text()
+                    return {
+                        "success": False,
+                        "error": f"Send message error: {response.status} - {error_text}"
+                    }
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Exception sending message: {str(e)}"
             }
     
+    async def interrupt(self, session_id: str) -> Dict:
+        """
+        Stop whatever the avatar is currently saying (barge-in)
+        
+        Args:
+            session_id: The active session ID
+            
+        Returns:
+            dict with success status
+        """
+        endpoint = f"{self.base_url}/streaming.interrupt"
+        
+        payload = {
+            "session_id": session_id
+        }
+        
+        try:
+            session = provider_registry.http_session()
+            async with session.post(endpoint, json=payload, headers=self.headers) as response:
+                if response.status == 200:
+                    return {"success": True}
+                else:
+                    error_text = await response.text()
+                    return {
+                        "success": False,
+                        "error": f"Interrupt error: {response.status} - {error_text}"
+                    }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception interrupting avatar: {str(e)}"
+            }
+    
     async def stop_session(self, session_id: str) -> Dict:
         """
         Stop a streaming session
@@ -201,16 +241,16 @@ class HeyGenStreamingAvatar:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(endpoint, json=payload, headers=self.headers) as response:
-                    if response.status == 200:
-                        return {"success": True}
-                    else:
-                        error_text = await response.text()
-                        return {
-                            "success": False,
-                            "error": f"Stop session error: {response.status} - {error_text}"
-                        }
+            session = provider_registry.http_session()
+            async with session.post(endpoint, json=payload, headers=self.headers) as response:
+                if response.status == 200:
+                    return {"success": True}
+                else:
+                    error_text = await response.text()
+                    return {
+                        "success": False,
+                        "error": f"Stop session error: {response.status} - {error_text}"
+                    }
         except Exception as e:
             return {
                 "success": False,
@@ -227,16 +267,16 @@ class HeyGenStreamingAvatar:
         endpoint = f"{self.base_url}/avatars"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(endpoint, headers=self.headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "success": True,
-                            "avatars": data.get("avatars", [])
-                        }
-                    else:
-                        return {"success": False, "error": "Failed to list avatars"}
+            session = provider_registry.http_session()
+            async with session.get(endpoint, headers=self.headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return {
+                        "success": True,
+                        "avatars": data.get("avatars", [])
+                    }
+                else:
+                    return {"success": False, "error": "Failed to list avatars"}
         except Exception as e:
             return {
                 "success": False,
@@ -245,6 +285,26 @@ class HeyGenStreamingAvatar:
 
 
 # Helper functions
+def get_heygen_client(api_key: str) -> HeyGenStreamingAvatar:
+    """
+    Shared HeyGen client for an API key
+    
+    Args:
+        api_key: HeyGen API key
+        
+    Returns:
+        HeyGenStreamingAvatar bound to the pooled HTTP session
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        client_reuse.inc(provider="heygen", outcome="miss")
+        client = HeyGenStreamingAvatar(api_key)
+        _clients[api_key] = client
+    else:
+        client_reuse.inc(provider="heygen", outcome="hit")
+    return client
+
+
 async def create_heygen_session(api_key: str) -> Dict:
     """
     Create a HeyGen streaming session
@@ -255,7 +315,7 @@ async def create_heygen_session(api_key: str) -> Dict:
     Returns:
         dict with session info
     """
-    client = HeyGenStreamingAvatar(api_key)
+    client = get_heygen_client(api_key)
     return await client.create_streaming_session()
 
 
@@ -271,6 +331,20 @@ async def send_heygen_message(api_key: str, session_id: str, text: str) -> Dict:
     Returns:
         dict with task info
     """
-    client = HeyGenStreamingAvatar(api_key)
+    client = get_heygen_client(api_key)
     return await client.send_message(session_id, text)
 
+
+async def interrupt_heygen_session(api_key: str, session_id: str) -> Dict:
+    """
+    Interrupt the HeyGen avatar mid-sentence
+    
+    Args:
+        api_key: HeyGen API key
+        session_id: Active session ID
+        
+    Returns:
+        dict with success status
+    """
+    client = get_heygen_client(api_key)
+    return await client.interrupt(session_id)
@@ -0,0 +1,396 @@
+"""
+Celery Job Results
+Non-blocking delivery of Celery task results to HTTP clients
+
+Endpoints backed by a Celery task submit it and get a job id back at once;
+nothing in the API process ever calls AsyncResult.get(). A job is:
+
+    job:{id}                hash - kind, submitted_at, params (JSON) - JOB_TTL_SECONDS
+    celery-task-meta-{id}   Celery's own result (the Redis result backend)
+    jobs:done:{id}          channel - workers publish here once the result is stored
+
+Every API process keeps one pattern subscription on jobs:done:* and wakes
+the coroutines waiting on those ids (await mode, SSE, WebSocket). Waiters
+also re-read the result every JOB_POLL_SECONDS, so a missed notification
+(Redis reconnect, job finished before the subscription) only costs latency.
+
+Each job kind can register a finalizer that turns the raw task result into
+the endpoint's response (e.g. the parsed report). Finalizers run on every
+read, so they must not change any state - reading a job is side-effect free.
+
+Work that must happen once when a job finishes (e.g. adding a reply to the
+session history) goes in an on_complete hook given to submit(). The hook
+runs exactly once, in the process that submitted the job, as soon as it
+finishes - whether or not anyone reads the job. It is triggered by the
+completion notification, by a waiter that sees the job finish, or by a
+sweep every JOB_POLL_SECONDS; hooks of jobs that never finish are dropped
+after JOB_TTL_SECONDS.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+from dotenv import load_dotenv
+
+from .metrics import metrics
+from .provider_executor import run_blocking
+from .redis_client import redis_client
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_WAIT_TIMEOUT_SECONDS = float(os.getenv("JOB_WAIT_TIMEOUT_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# Interval of keepalives on SSE / WebSocket followers while a job is running
+JOB_KEEPALIVE_SECONDS = float(os.getenv("JOB_KEEPALIVE_SECONDS", "15"))
+
+JOB_KEY_PREFIX = "job:"
+JOB_CHANNEL_PREFIX = "jobs:done:"
+CELERY_META_PREFIX = "celery-task-meta-"
+
+# Celery state -> job status
+JOB_STATUS = {
+    "PENDING": "pending",
+    "RECEIVED": "pending",
+    "STARTED": "running",
+    "RETRY": "retrying",
+    "SUCCESS": "succeeded",
+    "FAILURE": "failed",
+    "REVOKED": "failed"
+}
+FINISHED = {"succeeded", "failed"}
+
+jobs_submitted = metrics.counter(
+    "jobs_submitted_total",
+    "Celery-backed jobs submitted through the job API, by kind"
+)
+jobs_finished = metrics.counter(
+    "jobs_finished_total",
+    "Job completion notifications received by this process, by Celery state"
+)
+job_waiters = metrics.gauge(
+    "job_waiters",
+    "Requests (await mode, SSE, WebSocket) currently waiting on a job"
+)
+
+Finalizer = Callable[[str, Any, dict], Any]
+# (job status "succeeded"/"failed", raw task result or error) -> None
+CompletionHook = Callable[[str, Any], None]
+
+
+def job_channel(job_id: str) -> str:
+    return f"{JOB_CHANNEL_PREFIX}{job_id}"
+
+
+_publisher = None
+
+
+def publish_job_done(job_id: str, state: str):
+    """
+    Wake the API processes waiting on a job (called in the worker, after the
+    result is stored - see celery_app's task_postrun handler)
+    """
+    global _publisher
+    try:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(REDIS_URL)
+        _publisher.publish(job_channel(job_id), state)
+    except Exception as e:
+        # Waiters fall back to polling; a lost notification is not an error
+        print(f"Job notification error: {str(e)}")
+
+
+class JobResults:
+    """Submits Celery jobs and resolves them without blocking the event loop"""
+
+    def __init__(self, client=redis_client):
+        self._redis = client
+        self._finalizers: Dict[str, Finalizer] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        # job id -> (on_complete hook, monotonic time it was registered)
+        self._hooks: Dict[str, Tuple[CompletionHook, float]] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def register_finalizer(self, kind: str, finalizer: Finalizer):
+        """
+        Turn a kind's raw task result into its response
+
+        Args:
+            kind: Job kind given to submit()
+            finalizer: (job_id, task result, submit params) -> response
+        """
+        self._finalizers[kind] = finalizer
+
+    async def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_hooks())
+        if self._listener is not None:
+            return
+        try:
+            self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.psubscribe(f"{JOB_CHANNEL_PREFIX}*")
+        except Exception as e:
+            print(f"⚠️ Job notifications unavailable, polling only: {str(e)}")
+            self._pubsub = None
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        for task in (self._listener, self._sweeper):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        self._sweeper = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    async def submit(
+        self,
+        kind: str,
+        task,
+        params: Optional[dict] = None,
+        on_complete: Optional[CompletionHook] = None,
+        **task_kwargs
+    ) -> dict:
+        """
+        Queue a Celery task as a job and return immediately
+
+        Args:
+            kind: Job kind (selects the finalizer)
+            task: Celery task to run
+            params: JSON-serializable context the finalizer needs
+            on_complete: Called once when the job finishes, in this process
+            **task_kwargs: Task arguments
+
+        Returns:
+            dict: job_id, kind, status and the URLs to follow it
+        """
+        # The id is chosen here so the hook is in place before the task can finish
+        job_id = str(uuid.uuid4())
+        if on_complete is not None:
+            await self.start()
+            self._hooks[job_id] = (on_complete, time.monotonic())
+
+        try:
+            # The broker publish is a blocking socket write - keep it off the loop
+            await run_blocking(task.apply_async, kwargs=task_kwargs, task_id=job_id)
+        except Exception:
+            self._hooks.pop(job_id, None)
+            raise
+
+        key = f"{JOB_KEY_PREFIX}{job_id}"
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={
+                "kind": kind,
+                "submitted_at": time.time(),
+                "params": json.dumps(params or {})
+            })
+            pipe.expire(key, JOB_TTL_SECONDS)
+            await pipe.execute()
+
+        jobs_submitted.inc(kind=kind)
+        return {"job_id": job_id, "kind": kind, "status": "pending", **job_urls(job_id)}
+
+    async def status(self, job_id: str) -> Optional[dict]:
+        """
+        Current state of a job, with its (finalized) result once it succeeded
+
+        Returns:
+            dict: job_id, kind, status, submitted_at, and result or error;
+                  None for an unknown or expired job id
+        """
+        job, meta = await asyncio.gather(
+            self._redis.hgetall(f"{JOB_KEY_PREFIX}{job_id}"),
+            self._redis.get(f"{CELERY_META_PREFIX}{job_id}")
+        )
+        if not job:
+            return None
+
+        meta = json.loads(meta) if meta else {}
+        status = JOB_STATUS.get(meta.get("status", "PENDING"), "pending")
+        response = {
+            "job_id": job_id,
+            "kind": job["kind"],
+            "status": status,
+            "submitted_at": float(job["submitted_at"])
+        }
+
+        if status == "failed":
+            result = meta.get("result")
+            response["error"] = result.get("exc_message") if isinstance(result, dict) else str(result)
+        elif status == "succeeded":
+            result = meta.get("result")
+            finalizer = self._finalizers.get(job["kind"])
+            if finalizer is not None:
+                try:
+                    result = finalizer(job_id, result, json.loads(job.get("params") or "{}"))
+                except Exception as e:
+                    response["status"] = "failed"
+                    response["error"] = f"Result processing failed: {str(e)}"
+                    return response
+            response["result"] = result
+            response["finished_at"] = meta.get("date_done")
+        return response
+
+    async def wait(self, job_id: str, timeout: float = JOB_WAIT_TIMEOUT_SECONDS) -> Optional[dict]:
+        """
+        Suspend until the job finishes or the timeout passes (the loop stays free)
+
+        Returns:
+            dict: The job's status() - still pending/running if it timed out;
+                  None for an unknown job id
+        """
+        await self.start()
+        deadline = asyncio.get_running_loop().time() + timeout
+        job_waiters.inc()
+        try:
+            while True:
+                # Register before reading, so a notification in between is not lost
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.setdefault(job_id, []).append(future)
+                try:
+                    response = await self.status(job_id)
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if response is not None and response["status"] in FINISHED:
+                        # Callers see the job's completion work already done
+                        await self._run_hook(job_id)
+                        return response
+                    if response is None or remaining <= 0:
+                        return response
+                    await asyncio.wait_for(future, timeout=min(remaining, JOB_POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._forget(job_id, future)
+        finally:
+            job_waiters.dec()
+
+    async def updates(self, job_id: str):
+        """
+        Yield the job's status whenever it changes, ending once it finished or
+        expired (SSE and WebSocket delivery)
+
+        Followers are bounded by the job itself, not by a request timeout - a
+        batch job may run for many minutes. While nothing changes, None is
+        yielded every JOB_KEEPALIVE_SECONDS so the caller can keep the
+        connection alive.
+        """
+        last = None
+        while True:
+            response = await self.wait(job_id, timeout=JOB_KEEPALIVE_SECONDS)
+            if response is None:
+                return
+            if response["status"] != last:
+                last = response["status"]
+                yield response
+            elif response["status"] not in FINISHED:
+                yield None
+            if response["status"] in FINISHED:
+                return
+            if time.time() >= response["submitted_at"] + JOB_TTL_SECONDS:
+                # The job record is about to expire; nothing more will be seen
+                return
+
+    async def _run_hook(self, job_id: str):
+        """Run the job's on_complete hook if it has one and the job has finished"""
+        if job_id not in self._hooks:
+            return
+        meta = await self._redis.get(f"{CELERY_META_PREFIX}{job_id}")
+        meta = json.loads(meta) if meta else {}
+        status = JOB_STATUS.get(meta.get("status", "PENDING"), "pending")
+        if status not in FINISHED:
+            return
+
+        # No await between pop and call: another trigger cannot run it twice
+        hook = self._hooks.pop(job_id, None)
+        if hook is None:
+            return
+        try:
+            hook[0](status, meta.get("result"))
+        except Exception as e:
+            print(f"Job completion hook error for {job_id}: {str(e)}")
+
+    async def _sweep_hooks(self):
+        # Catches completions whose notification was missed
+        while True:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            expired = time.monotonic() - JOB_TTL_SECONDS
+            for job_id, (_, registered_at) in list(self._hooks.items()):
+                try:
+                    if registered_at < expired:
+                        self._hooks.pop(job_id, None)
+                        print(f"⚠️ Job {job_id} never finished, dropping its completion hook")
+                        continue
+                    await self._run_hook(job_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Job completion sweep error: {str(e)}")
+
+    def _forget(self, job_id: str, future: asyncio.Future):
+        waiters = self._waiters.get(job_id)
+        if waiters is None:
+            return
+        if future in waiters:
+            waiters.remove(future)
+        if not waiters:
+            del self._waiters[job_id]
+
+    def _notify(self, job_id: str):
+        for future in self._waiters.get(job_id, []):
+            if not future.done():
+                future.set_result(True)
+
+    async def _listen(self):
+        retry_delay = 1.0
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                retry_delay = 1.0
+                if message is None or message.get("type") != "pmessage":
+                    continue
+
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                state = message["data"]
+                if isinstance(state, bytes):
+                    state = state.decode()
+                jobs_finished.inc(state=state)
+                job_id = channel[len(JOB_CHANNEL_PREFIX):]
+                await self._run_hook(job_id)
+                self._notify(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Job notification listener error, retrying in {retry_delay:.0f}s: {str(e)}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+
+
+def job_urls(job_id: str) -> dict:
+    return {
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+        "websocket_url": f"/api/jobs/{job_id}/ws"
+    }
+
+
+job_results = JobResults()
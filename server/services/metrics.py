@@ -0,0 +1,226 @@
+"""
+In-Process Metrics
+Minimal counters, gauges and histograms rendered in the Prometheus text format at /metrics
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Seconds; covers a cached TTS chunk (ms) up to a slow diagnosis (tens of s)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 20.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in key
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def replace(self, key: LabelKey, value: float):
+        """Overwrite one label set, e.g. with a total kept by another process"""
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> Iterable[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class Gauge:
+    """Point-in-time value; either set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        callback: Optional[Callable[[], Dict[LabelKey, float]]] = None
+    ):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(_label_key(labels), None)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> Iterable[Tuple[str, LabelKey, float]]:
+        if self.callback:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, key, value
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: LabelKey) -> list:
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return entry
+
+    def observe(self, value: float, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._entry(_label_key(labels))
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def replace(self, key: LabelKey, counts: List[int], total: float, count: int):
+        """Overwrite one label set, e.g. with counts aggregated in another process"""
+        with self._lock:
+            self._values[key] = [list(counts), total, count]
+
+    def label_sets(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return [dict(key) for key in self._values]
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(_label_key(labels))
+        return entry[2] if entry else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate the q-quantile (0-1) from the buckets, like PromQL histogram_quantile
+
+        Returns:
+            Optional[float]: Seconds, or None without observations
+        """
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            if entry is None or not entry[2]:
+                return None
+            counts, _, count = list(entry[0]), entry[1], entry[2]
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    # Beyond the last bucket: the best bound we have
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def samples(self) -> Iterable[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket", key + (("le", le),), cumulative
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, count
+
+
+class MetricsRegistry:
+    """Holds every metric of this process"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str, callback=None) -> Gauge:
+        return self._register(Gauge(name, description, callback))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
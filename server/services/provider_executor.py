@@ -0,0 +1,39 @@
+"""
+Bounded executor for provider SDK calls that have no async client
+Keeps blocking network calls off the event loop so one slow turn cannot stall other sessions
+"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Upper bound on concurrent blocking provider calls per API process
+PROVIDER_EXECUTOR_WORKERS = int(os.getenv("PROVIDER_EXECUTOR_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=PROVIDER_EXECUTOR_WORKERS,
+    thread_name_prefix="provider"
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking provider call on the bounded thread pool
+
+    Args:
+        func: Synchronous callable (e.g. ElevenLabs generate)
+        *args, **kwargs: Passed through to func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Stop accepting work and let in-flight calls finish"""
+    _executor.shutdown(wait=False)
+
@@ -0,0 +1,148 @@
+"""
+Provider Registry
+Long-lived, pooled upstream clients shared by every session in this API process
+
+Created in the app lifespan and closed on shutdown. All HTTP providers
+(Deepgram, ElevenLabs, HeyGen) share one keep-alive aiohttp pool with a
+per-host limit; Azure OpenAI gets a single async client on its own httpx pool.
+"""
+
+import os
+from typing import Optional
+
+import aiohttp
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncAzureOpenAI
+
+from .metrics import metrics
+
+load_dotenv()
+
+# Azure OpenAI Configuration
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPEN_AI_ENDPOINT")
+AZURE_OPENAI_KEY = os.getenv("AZURE_OPEN_AI_KEY")
+AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
+AZURE_API_VERSION = os.getenv("AZURE_API_VERSION", "2024-02-15-preview")
+AZURE_DIAGNOSIS_DEPLOYMENT = os.getenv("AZURE_DIAGNOSIS_DEPLOYMENT", "gpt-4o")
+
+# Connection pool sizing
+PROVIDER_POOL_LIMIT = int(os.getenv("PROVIDER_POOL_LIMIT", "200"))
+PROVIDER_POOL_PER_HOST = int(os.getenv("PROVIDER_POOL_PER_HOST", "50"))
+PROVIDER_KEEPALIVE_SECONDS = float(os.getenv("PROVIDER_KEEPALIVE_SECONDS", "60"))
+PROVIDER_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "60"))
+
+pool_hits = metrics.counter(
+    "provider_pool_hits_total",
+    "Upstream requests served on a reused keep-alive connection"
+)
+pool_misses = metrics.counter(
+    "provider_pool_misses_total",
+    "Upstream requests that had to open a new TCP/TLS connection"
+)
+client_reuse = metrics.counter(
+    "provider_client_lookups_total",
+    "Provider client lookups by outcome (hit = shared client reused, miss = client created)"
+)
+
+
+async def _on_connection_reused(session, context, params):
+    pool_hits.inc(host=context.trace_request_ctx.get("host", "unknown"))
+
+
+async def _on_connection_created(session, context, params):
+    pool_misses.inc(host=context.trace_request_ctx.get("host", "unknown"))
+
+
+async def _on_request_start(session, context, params):
+    # Remember the host so the connection hooks can label hits and misses
+    context.trace_request_ctx.setdefault("host", params.url.host)
+
+
+class _TraceContext:
+    def __init__(self, trace_request_ctx=None):
+        self.trace_request_ctx = trace_request_ctx if trace_request_ctx is not None else {}
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace = aiohttp.TraceConfig(trace_config_ctx_factory=_TraceContext)
+    trace.on_request_start.append(_on_request_start)
+    trace.on_connection_reuseconn.append(_on_connection_reused)
+    trace.on_connection_create_end.append(_on_connection_created)
+    return trace
+
+
+class ProviderRegistry:
+    """Owns the shared upstream clients for this process"""
+
+    def __init__(self):
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._openai_client: Optional[AsyncAzureOpenAI] = None
+        self._openai_http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def openai_configured(self) -> bool:
+        return bool(AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_KEY)
+
+    async def start(self):
+        """Create the pools up front so the first session doesn't pay for it"""
+        self.http_session()
+        self.openai_client()
+
+    async def close(self):
+        """Drain and close every pool"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+        if self._openai_http is not None:
+            await self._openai_http.aclose()
+            self._openai_http = None
+        self._openai_client = None
+
+    def http_session(self) -> aiohttp.ClientSession:
+        """Shared keep-alive pool for Deepgram, ElevenLabs and HeyGen"""
+        if self._http_session is not None and not self._http_session.closed:
+            client_reuse.inc(provider="http", outcome="hit")
+            return self._http_session
+
+        client_reuse.inc(provider="http", outcome="miss")
+        connector = aiohttp.TCPConnector(
+            limit=PROVIDER_POOL_LIMIT,
+            limit_per_host=PROVIDER_POOL_PER_HOST,
+            keepalive_timeout=PROVIDER_KEEPALIVE_SECONDS,
+            ttl_dns_cache=300
+        )
+        self._http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=PROVIDER_TIMEOUT_SECONDS),
+            trace_configs=[_trace_config()]
+        )
+        return self._http_session
+
+    def openai_client(self) -> Optional[AsyncAzureOpenAI]:
+        """Shared async Azure OpenAI client, or None if not configured"""
+        if not self.openai_configured:
+            return None
+        if self._openai_client is not None:
+            client_reuse.inc(provider="azure_openai", outcome="hit")
+            return self._openai_client
+
+        client_reuse.inc(provider="azure_openai", outcome="miss")
+        self._openai_http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=PROVIDER_POOL_LIMIT,
+                max_keepalive_connections=PROVIDER_POOL_PER_HOST,
+                keepalive_expiry=PROVIDER_KEEPALIVE_SECONDS
+            ),
+            timeout=PROVIDER_TIMEOUT_SECONDS
+        )
+        self._openai_client = AsyncAzureOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_key=AZURE_OPENAI_KEY,
+            api_version=AZURE_API_VERSION,
+            http_client=self._openai_http
+        )
+        return self._openai_client
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,430 @@
+"""
+Session State Store
+Conversation history, assessment stage and HeyGen session per patient session
+
+Two implementations behind one interface:
+- InMemorySessionStore: single process (development, tests)
+- RedisSessionStore: shared by every uvicorn worker and node, survives restarts
+
+Select with SESSION_STORE=memory|redis. Sessions expire SESSION_TTL_SECONDS
+after their last write.
+
+Redis layout per session:
+    session:{id}:meta     hash   stage, heygen_session_id, context (JSON, see context_manager),
+                                 question_end (epoch seconds Dr. Smith's last question finished)
+    session:{id}:history  list   one compact JSON message per entry
+    session:{id}:stats    hash   per-session counters (turns, LLM calls, latency)
+    session:{id}:evidence hash   stage -> scored answer (JSON), see assessment_scoring
+    session:{id}:timings  list   packed STT word timings per answer (base64), see speech_timing
+"""
+
+import os
+import json
+import time
+import base64
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class SessionStore:
+    """Interface for per-session assessment state"""
+
+    async def ensure(self, session_id: str):
+        """Create the session at stage 0 if it does not exist, and refresh its TTL"""
+        raise NotImplementedError
+
+    async def reset(self, session_id: str, history: List[dict], stage: int):
+        """Replace the history and stage (e.g. when the greeting starts a new assessment)"""
+        raise NotImplementedError
+
+    async def get_history(self, session_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def append_messages(self, session_id: str, *messages: dict):
+        raise NotImplementedError
+
+    async def get_stage(self, session_id: str) -> int:
+        raise NotImplementedError
+
+    async def advance_stage(self, session_id: str, expected_stage: int) -> int:
+        """
+        Move from expected_stage to expected_stage + 1 atomically
+
+        A no-op if another worker already moved the session on, so a stage
+        is never skipped by two concurrent turns.
+
+        Returns:
+            int: The stage after the call
+        """
+        raise NotImplementedError
+
+    async def set_heygen_session(self, session_id: str, heygen_session_id: str):
+        raise NotImplementedError
+
+    async def get_heygen_session(self, session_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def incr_stats(self, session_id: str, **amounts: float):
+        """Add to per-session counters, e.g. incr_stats(sid, turns=1, llm_turns=1)"""
+        raise NotImplementedError
+
+    async def set_stats(self, session_id: str, **values: float):
+        """Overwrite per-session counters/flags"""
+        raise NotImplementedError
+
+    async def get_stats(self, session_id: str) -> Dict[str, float]:
+        raise NotImplementedError
+
+    async def record_evidence(self, session_id: str, stage: int, item: dict):
+        """Store the scored answer for a stage, replacing an earlier answer to it"""
+        raise NotImplementedError
+
+    async def get_evidence(self, session_id: str) -> Dict[int, dict]:
+        """Scored answers so far, keyed by stage"""
+        raise NotImplementedError
+
+    async def append_timings(self, session_id: str, records: bytes):
+        """Append packed word timing records for one answer"""
+        raise NotImplementedError
+
+    async def get_timings(self, session_id: str) -> bytes:
+        """Every packed word timing record of the session, in order"""
+        raise NotImplementedError
+
+    async def get_context(self, session_id: str) -> Optional[dict]:
+        """Rolling prompt context (summary and per-stage facts), None until the first turn"""
+        raise NotImplementedError
+
+    async def set_context(self, session_id: str, context: dict):
+        raise NotImplementedError
+
+    async def set_question_end(self, session_id: str, ends_at: float):
+        """When Dr. Smith's last question finished playing (epoch seconds)"""
+        raise NotImplementedError
+
+    async def pop_question_end(self, session_id: str) -> Optional[float]:
+        """Take the question end time, so one answer's latency is measured against it once"""
+        raise NotImplementedError
+
+    async def clear_question_end(self, session_id: str):
+        """Forget the question end time (question cut off, patient gone)"""
+        await self.pop_question_end(session_id)
+
+    async def delete(self, session_id: str):
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; only valid with a single uvicorn worker"""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._sessions: Dict[str, dict] = {}
+
+    def _get(self, session_id: str) -> Optional[dict]:
+        session = self._sessions.get(session_id)
+        if session and session["expires_at"] < time.monotonic():
+            del self._sessions[session_id]
+            return None
+        return session
+
+    def _touch(self, session_id: str) -> dict:
+        session = self._get(session_id)
+        if session is None:
+            session = {
+                "history": [], "stage": 0, "heygen_session_id": None,
+                "stats": {}, "evidence": {}, "timings": bytearray(), "context": None,
+                "question_end": None
+            }
+            self._sessions[session_id] = session
+        session["expires_at"] = time.monotonic() + self.ttl_seconds
+        return session
+
+    def _sweep(self):
+        now = time.monotonic()
+        expired = [sid for sid, session in self._sessions.items() if session["expires_at"] < now]
+        for session_id in expired:
+            del self._sessions[session_id]
+
+    async def ensure(self, session_id: str):
+        self._sweep()
+        self._touch(session_id)
+
+    async def reset(self, session_id: str, history: List[dict], stage: int):
+        session = self._touch(session_id)
+        session["history"] = list(history)
+        session["stage"] = stage
+        session["evidence"] = {}
+        session["timings"] = bytearray()
+        session["context"] = None
+        session["question_end"] = None
+
+    async def get_history(self, session_id: str) -> List[dict]:
+        session = self._get(session_id)
+        return list(session["history"]) if session else []
+
+    async def append_messages(self, session_id: str, *messages: dict):
+        self._touch(session_id)["history"].extend(messages)
+
+    async def get_stage(self, session_id: str) -> int:
+        session = self._get(session_id)
+        return session["stage"] if session else 0
+
+    async def advance_stage(self, session_id: str, expected_stage: int) -> int:
+        # No await between read and write, so this is atomic on the event loop
+        session = self._touch(session_id)
+        if session["stage"] == expected_stage:
+            session["stage"] = expected_stage + 1
+        return session["stage"]
+
+    async def set_heygen_session(self, session_id: str, heygen_session_id: str):
+        self._touch(session_id)["heygen_session_id"] = heygen_session_id
+
+    async def get_heygen_session(self, session_id: str) -> Optional[str]:
+        session = self._get(session_id)
+        return session["heygen_session_id"] if session else None
+
+    async def incr_stats(self, session_id: str, **amounts: float):
+        stats = self._touch(session_id)["stats"]
+        for name, amount in amounts.items():
+            stats[name] = stats.get(name, 0) + amount
+
+    async def set_stats(self, session_id: str, **values: float):
+        self._touch(session_id)["stats"].update(values)
+
+    async def get_stats(self, session_id: str) -> Dict[str, float]:
+        session = self._get(session_id)
+        return dict(session["stats"]) if session else {}
+
+    async def record_evidence(self, session_id: str, stage: int, item: dict):
+        self._touch(session_id)["evidence"][stage] = dict(item)
+
+    async def get_evidence(self, session_id: str) -> Dict[int, dict]:
+        session = self._get(session_id)
+        return dict(session["evidence"]) if session else {}
+
+    async def append_timings(self, session_id: str, records: bytes):
+        self._touch(session_id)["timings"].extend(records)
+
+    async def get_timings(self, session_id: str) -> bytes:
+        session = self._get(session_id)
+        return bytes(session["timings"]) if session else b""
+
+    async def get_context(self, session_id: str) -> Optional[dict]:
+        session = self._get(session_id)
+        return json.loads(json.dumps(session["context"])) if session and session["context"] else None
+
+    async def set_context(self, session_id: str, context: dict):
+        # Stored as a copy, like the Redis store's JSON round trip
+        self._touch(session_id)["context"] = json.loads(json.dumps(context))
+
+    async def set_question_end(self, session_id: str, ends_at: float):
+        self._touch(session_id)["question_end"] = ends_at
+
+    async def pop_question_end(self, session_id: str) -> Optional[float]:
+        session = self._get(session_id)
+        if session is None:
+            return None
+        ends_at, session["question_end"] = session["question_end"], None
+        return ends_at
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+
+# KEYS[1] = meta hash, KEYS[2] = history list; ARGV[1] = expected stage, ARGV[2] = TTL
+ADVANCE_STAGE_SCRIPT = """
+local stage = tonumber(redis.call('HGET', KEYS[1], 'stage') or '0')
+if stage == tonumber(ARGV[1]) then
+    stage = stage + 1
+    redis.call('HSET', KEYS[1], 'stage', stage)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return stage
+"""
+
+
+class RedisSessionStore(SessionStore):
+    """Shared store on the app's Redis; safe for multiple workers and nodes"""
+
+    def __init__(self, client=None, ttl_seconds: int = SESSION_TTL_SECONDS):
+        if client is None:
+            from .redis_client import redis_client
+            client = redis_client
+        self.redis = client
+        self.ttl_seconds = ttl_seconds
+        self._advance_stage = self.redis.register_script(ADVANCE_STAGE_SCRIPT)
+
+    @staticmethod
+    def _meta_key(session_id: str) -> str:
+        return f"session:{session_id}:meta"
+
+    @staticmethod
+    def _history_key(session_id: str) -> str:
+        return f"session:{session_id}:history"
+
+    @staticmethod
+    def _stats_key(session_id: str) -> str:
+        return f"session:{session_id}:stats"
+
+    @staticmethod
+    def _evidence_key(session_id: str) -> str:
+        return f"session:{session_id}:evidence"
+
+    @staticmethod
+    def _timings_key(session_id: str) -> str:
+        return f"session:{session_id}:timings"
+
+    def _expire(self, pipe, session_id: str):
+        pipe.expire(self._meta_key(session_id), self.ttl_seconds)
+        pipe.expire(self._history_key(session_id), self.ttl_seconds)
+
+    async def ensure(self, session_id: str):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self._meta_key(session_id), "stage", 0)
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def reset(self, session_id: str, history: List[dict], stage: int):
+        history_key = self._history_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(history_key)
+            if history:
+                pipe.rpush(history_key, *[_dumps(message) for message in history])
+            pipe.hset(self._meta_key(session_id), "stage", stage)
+            pipe.hdel(self._meta_key(session_id), "context", "question_end")
+            pipe.delete(self._evidence_key(session_id), self._timings_key(session_id))
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def get_history(self, session_id: str) -> List[dict]:
+        entries = await self.redis.lrange(self._history_key(session_id), 0, -1)
+        return [json.loads(entry) for entry in entries]
+
+    async def append_messages(self, session_id: str, *messages: dict):
+        if not messages:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._history_key(session_id), *[_dumps(message) for message in messages])
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def get_stage(self, session_id: str) -> int:
+        stage = await self.redis.hget(self._meta_key(session_id), "stage")
+        return int(stage) if stage is not None else 0
+
+    async def advance_stage(self, session_id: str, expected_stage: int) -> int:
+        stage = await self._advance_stage(
+            keys=[self._meta_key(session_id), self._history_key(session_id)],
+            args=[expected_stage, self.ttl_seconds]
+        )
+        return int(stage)
+
+    async def set_heygen_session(self, session_id: str, heygen_session_id: str):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._meta_key(session_id), "heygen_session_id", heygen_session_id)
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def get_heygen_session(self, session_id: str) -> Optional[str]:
+        return await self.redis.hget(self._meta_key(session_id), "heygen_session_id")
+
+    async def incr_stats(self, session_id: str, **amounts: float):
+        stats_key = self._stats_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for name, amount in amounts.items():
+                pipe.hincrbyfloat(stats_key, name, amount)
+            pipe.expire(stats_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def set_stats(self, session_id: str, **values: float):
+        stats_key = self._stats_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(stats_key, mapping=values)
+            pipe.expire(stats_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def get_stats(self, session_id: str) -> Dict[str, float]:
+        stats = await self.redis.hgetall(self._stats_key(session_id))
+        return {name: float(value) for name, value in stats.items()}
+
+    async def record_evidence(self, session_id: str, stage: int, item: dict):
+        evidence_key = self._evidence_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(evidence_key, stage, _dumps(item))
+            pipe.expire(evidence_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def get_evidence(self, session_id: str) -> Dict[int, dict]:
+        evidence = await self.redis.hgetall(self._evidence_key(session_id))
+        return {int(stage): json.loads(item) for stage, item in evidence.items()}
+
+    async def append_timings(self, session_id: str, records: bytes):
+        if not records:
+            return
+        # The shared client decodes responses, so the binary records travel as base64
+        timings_key = self._timings_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(timings_key, base64.b64encode(records).decode("ascii"))
+            pipe.expire(timings_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def get_timings(self, session_id: str) -> bytes:
+        entries = await self.redis.lrange(self._timings_key(session_id), 0, -1)
+        return b"".join(base64.b64decode(entry) for entry in entries)
+
+    async def get_context(self, session_id: str) -> Optional[dict]:
+        context = await self.redis.hget(self._meta_key(session_id), "context")
+        return json.loads(context) if context else None
+
+    async def set_context(self, session_id: str, context: dict):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._meta_key(session_id), "context", _dumps(context))
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def set_question_end(self, session_id: str, ends_at: float):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._meta_key(session_id), "question_end", repr(ends_at))
+            self._expire(pipe, session_id)
+            await pipe.execute()
+
+    async def pop_question_end(self, session_id: str) -> Optional[float]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hget(self._meta_key(session_id), "question_end")
+            pipe.hdel(self._meta_key(session_id), "question_end")
+            ends_at, _ = await pipe.execute()
+        return float(ends_at) if ends_at is not None else None
+
+    async def delete(self, session_id: str):
+        await self.redis.delete(
+            self._meta_key(session_id),
+            self._history_key(session_id),
+            self._stats_key(session_id),
+            self._evidence_key(session_id),
+            self._timings_key(session_id)
+        )
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    """Build the store selected by SESSION_STORE"""
+    if kind == "redis":
+        print("🗄️ Session state: Redis (multi-worker)")
+        return RedisSessionStore()
+    if kind != "memory":
+        print(f"⚠️ Unknown SESSION_STORE '{kind}', using in-memory session state")
+    return InMemorySessionStore()
+
+
+session_store = create_session_store()
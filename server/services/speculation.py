@@ -0,0 +1,163 @@
+"""
+Speculative Stage Prefetch
+Prepares the next assessment question while the patient is still answering
+
+The assessment script is deterministic, so as soon as Dr. Smith finishes a
+turn the question for the next turn is known. The prefetcher renders its TTS
+audio, snapshots the conversation history for the prompt and resolves the
+HeyGen session, all off the critical path. When the patient's answer
+advances the stage as expected, the turn uses the prepared material; if not,
+it is discarded.
+
+Bounded: at most one speculation per session, SPECULATION_MAX_CONCURRENT
+renders across the process.
+"""
+
+import os
+import asyncio
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from .metrics import metrics
+from .session_store import session_store
+from .tts_cache import cached_stream_tts
+
+load_dotenv()
+
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() == "true"
+SPECULATION_MAX_CONCURRENT = int(os.getenv("SPECULATION_MAX_CONCURRENT", "32"))
+# How long a turn waits for a speculation that is still rendering
+SPECULATION_WAIT_SECONDS = float(os.getenv("SPECULATION_WAIT_SECONDS", "0.5"))
+
+speculations_started = metrics.counter(
+    "speculation_started_total",
+    "Next-question prefetches started"
+)
+speculation_outcomes = metrics.counter(
+    "speculation_outcomes_total",
+    "How prefetches ended (hit = used by the turn; anything else = wasted work)"
+)
+
+
+def _hit_rate() -> dict:
+    hits = speculation_outcomes.value(outcome="hit")
+    total = sum(value for _, _, value in speculation_outcomes.samples())
+    return {(): hits / total if total else 0}
+
+
+metrics.gauge(
+    "speculation_hit_ratio",
+    "Share of finished prefetches that a turn actually used",
+    callback=_hit_rate
+)
+
+
+class PreparedTransition:
+    """Everything the next turn needs if the patient's answer advances the stage"""
+
+    def __init__(self, session_id: str, stage: int, question: str):
+        self.session_id = session_id
+        self.stage = stage
+        self.question = question
+        self.history: List[dict] = []
+        self.heygen_session_id: Optional[str] = None
+        self.audio: bytes = b""
+        self.task: Optional[asyncio.Task] = None
+
+
+class SpeculativePrefetcher:
+    """Per-session slot for one prepared stage transition"""
+
+    def __init__(self, max_concurrent: int = SPECULATION_MAX_CONCURRENT, enabled: bool = SPECULATION_ENABLED):
+        self.enabled = enabled
+        self._slots: Dict[str, PreparedTransition] = {}
+        self._limit = asyncio.Semaphore(max_concurrent)
+
+    def prepare(self, session_id: str, stage: int, question: str, render_audio: bool = True) -> bool:
+        """
+        Start preparing the transition to stage's question
+
+        Returns:
+            bool: True if a new speculation was started
+        """
+        if not self.enabled:
+            return False
+
+        existing = self._slots.get(session_id)
+        if existing is not None:
+            if existing.stage == stage:
+                return False
+            self.discard(session_id, "superseded")
+
+        prepared = PreparedTransition(session_id, stage, question)
+        prepared.task = asyncio.create_task(self._prepare(prepared, render_audio))
+        self._slots[session_id] = prepared
+        speculations_started.inc()
+        return True
+
+    async def _prepare(self, prepared: PreparedTransition, render_audio: bool):
+        async with self._limit:
+            # Prompt scaffold and avatar target, so the turn skips these round trips
+            prepared.history = await session_store.get_history(prepared.session_id)
+            prepared.heygen_session_id = await session_store.get_heygen_session(prepared.session_id)
+
+            if render_audio:
+                audio = bytearray()
+                async for chunk in cached_stream_tts(prepared.question):
+                    audio.extend(chunk)
+                prepared.audio = bytes(audio)
+
+    async def take(
+        self,
+        session_id: str,
+        stage: int,
+        advance: bool,
+        wait: float = SPECULATION_WAIT_SECONDS
+    ) -> Optional[PreparedTransition]:
+        """
+        Claim the prepared transition for this turn
+
+        Returns:
+            PreparedTransition if it matches the turn and is ready, otherwise None
+            (the speculation is discarded either way)
+        """
+        prepared = self._slots.pop(session_id, None)
+        if prepared is None:
+            return None
+
+        if prepared.stage != stage:
+            self._finish(prepared, "stale")
+            return None
+        if not advance:
+            self._finish(prepared, "not_advancing")
+            return None
+
+        if not prepared.task.done():
+            await asyncio.wait([prepared.task], timeout=wait)
+        if not prepared.task.done():
+            self._finish(prepared, "not_ready")
+            return None
+        if prepared.task.cancelled() or prepared.task.exception() is not None:
+            self._finish(prepared, "failed")
+            return None
+
+        speculation_outcomes.inc(outcome="hit")
+        return prepared
+
+    def discard(self, session_id: str, reason: str = "discarded"):
+        prepared = self._slots.pop(session_id, None)
+        if prepared is not None:
+            self._finish(prepared, reason)
+
+    @staticmethod
+    def _finish(prepared: PreparedTransition, outcome: str):
+        if prepared.task is not None:
+            if not prepared.task.done():
+                prepared.task.cancel()
+            elif not prepared.task.cancelled() and prepared.task.exception() is not None:
+                print(f"⚠️ Prefetch failed for {prepared.session_id}: {str(prepared.task.exception())}")
+        speculation_outcomes.inc(outcome=outcome)
+
+
+speculator = SpeculativePrefetcher()
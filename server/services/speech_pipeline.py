@@ -0,0 +1,178 @@
+"""
+Sentence-Chunked Speech Pipeline
+Sends each finished sentence of a streamed reply to TTS right away and delivers the audio in order
+"""
+
+import re
+import asyncio
+from typing import AsyncIterator, Callable, List, Optional
+
+from .tracing import mark_first_audio, span
+
+# Sentence end: terminal punctuation (optionally followed by a closing quote) then whitespace
+SENTENCE_END = re.compile(r'([.!?]+["\')\]]?)\s+')
+
+# Titles that end in a period but never end a sentence in Dr. Smith's replies
+ABBREVIATIONS = {"dr.", "mr.", "mrs.", "ms.", "e.g.", "i.e.", "etc.", "st."}
+
+# Very short fragments ("Okay.") are merged with the next sentence to avoid choppy audio
+MIN_SENTENCE_CHARS = 20
+
+# Sentences rendered concurrently per reply
+MAX_PARALLEL_TTS = 3
+
+
+class SentenceChunker:
+    """Accumulates streamed text deltas and yields complete sentences"""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add a text delta
+
+        Returns:
+            list: Sentences completed by this delta (possibly empty)
+        """
+        self._buffer += delta
+        sentences = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            last_word = self._buffer[start:match.end(1)].split()[-1].lower()
+
+            if last_word in ABBREVIATIONS or len(candidate) < self.min_chars:
+                continue
+
+            sentences.append(candidate)
+            start = match.end()
+
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+
+class SpeechPipeline:
+    """
+    Renders sentences concurrently and streams the audio strictly in sentence order
+
+    Args:
+        synthesize: text -> async iterator of encoded audio chunks
+        transport: BinaryAudioTransport or JsonAudioTransport from audio_stream
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], AsyncIterator[bytes]],
+        transport,
+        max_parallel: int = MAX_PARALLEL_TTS
+    ):
+        self.synthesize = synthesize
+        self.transport = transport
+        self._limit = asyncio.Semaphore(max_parallel)
+        self._renders: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._sender: Optional[asyncio.Task] = None
+        self.sentences_sent = 0
+        # For estimating when the client finishes playing the reply
+        self.audio_bytes_sent = 0
+        self.first_audio_at: Optional[float] = None
+
+    @property
+    def _streams_chunks(self) -> bool:
+        return getattr(self.transport, "streams_chunks", False)
+
+    def add_sentence(self, text: str):
+        """Start rendering a sentence immediately"""
+        if not text or not text.strip():
+            return
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._send_in_order())
+
+        chunks: asyncio.Queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._render(text, chunks)))
+        self._renders.put_nowait(chunks)
+
+    def add_audio(self, audio: bytes, chunk_bytes: int = 4096):
+        """Queue a sentence whose audio is already rendered (e.g. prefetched)"""
+        if not audio:
+            return
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._send_in_order())
+
+        chunks: asyncio.Queue = asyncio.Queue()
+        for offset in range(0, len(audio), chunk_bytes):
+            chunks.put_nowait(audio[offset:offset + chunk_bytes])
+        chunks.put_nowait(None)
+        self._renders.put_nowait(chunks)
+
+    async def finish(self) -> int:
+        """
+        Wait until every queued sentence has been sent, then close the audio stream
+
+        Returns:
+            int: Number of sentence clips delivered
+        """
+        if self._sender is not None:
+            self._renders.put_nowait(None)
+            await self._sender
+        with span("send"):
+            await self.transport.close()
+        if self.audio_bytes_sent and not self._streams_chunks:
+            # JSON transport: the reply's audio only left just now, in one message
+            self.first_audio_at = asyncio.get_running_loop().time()
+            mark_first_audio()
+        return self.sentences_sent
+
+    async def cancel(self):
+        """Drop any audio that has not been sent yet"""
+        for task in self._tasks:
+            task.cancel()
+        if self._sender is not None:
+            self._sender.cancel()
+
+    async def _render(self, text: str, chunks: asyncio.Queue):
+        async with self._limit:
+            try:
+                with span("tts"):
+                    async for chunk in self.synthesize(text):
+                        chunks.put_nowait(chunk)
+            except Exception as e:
+                print(f"ElevenLabs TTS error: {str(e)}")
+            finally:
+                chunks.put_nowait(None)
+
+    async def _send_in_order(self):
+        while True:
+            chunks = await self._renders.get()
+            if chunks is None:
+                return
+
+            # The first sentence streams straight through; later ones are
+            # already buffered by the time their turn comes
+            sent_any = False
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if self._streams_chunks:
+                    if self.first_audio_at is None:
+                        self.first_audio_at = asyncio.get_running_loop().time()
+                    with span("send"):
+                        await self.transport.write(chunk)
+                    mark_first_audio()
+                else:
+                    await self.transport.write(chunk)
+                self.audio_bytes_sent += len(chunk)
+                sent_any = True
+
+            if sent_any:
+                self.sentences_sent += 1
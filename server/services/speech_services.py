@@ -0,0 +1,110 @@
+"""
+Speech Provider Calls
+Deepgram prerecorded STT and ElevenLabs streaming TTS over the shared keep-alive pool
+
+The REST APIs are called directly: the Deepgram SDK opens a new HTTP client
+per request and the ElevenLabs 0.2.x SDK is synchronous, so neither can use
+the pooled connections in provider_registry.
+"""
+
+import os
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+
+from .provider_registry import provider_registry
+
+load_dotenv()
+
+DEEPGRAM_KEY = os.getenv("DEEPGRAM_API_KEY")
+DEEPGRAM_BASE_URL = os.getenv("DEEPGRAM_BASE_URL", "https://api.deepgram.com")
+
+ELEVENLABS_KEY = os.getenv("ELEVENLABS_API_KEY")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+# Same defaults as elevenlabs.generate() (voice "Bella")
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL")
+ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_monolingual_v1")
+
+TTS_CHUNK_BYTES = 4096
+# ElevenLabs' default output (mp3_44100_128), for estimating playback time
+TTS_AUDIO_BITS_PER_SECOND = 128000
+
+
+async def transcribe_prerecorded(audio_data: bytes, utterances: bool = False) -> dict:
+    """
+    Transcribe a complete recording with Deepgram
+
+    Args:
+        audio_data: Encoded audio (webm/wav/mp3 - Deepgram detects the container)
+        utterances: Also ask for utterance segmentation
+
+    Returns:
+        dict: Deepgram's JSON response
+    """
+    params = {
+        "model": "nova-2",
+        "smart_format": "true",
+        "punctuate": "true",
+        # Keep "um"/"uh" in the words - hesitations are an assessment marker
+        "filler_words": "true"
+    }
+    if utterances:
+        params["utterances"] = "true"
+
+    session = provider_registry.http_session()
+    async with session.post(
+        f"{DEEPGRAM_BASE_URL}/v1/listen",
+        params=params,
+        data=audio_data,
+        headers={
+            "Authorization": f"Token {DEEPGRAM_KEY}",
+            "Content-Type": "audio/*"
+        }
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise RuntimeError(f"Deepgram error: {response.status} - {error_text}")
+        return await response.json()
+
+
+def transcript_text(result: dict) -> str:
+    """Pull the best transcript out of a Deepgram response"""
+    channels = result.get("results", {}).get("channels", [])
+    if not channels or not channels[0].get("alternatives"):
+        return ""
+    return channels[0]["alternatives"][0].get("transcript", "")
+
+
+def transcript_words(result: dict) -> list:
+    """Word objects (word, start, end, confidence) of the best transcript"""
+    channels = result.get("results", {}).get("channels", [])
+    if not channels or not channels[0].get("alternatives"):
+        return []
+    return channels[0]["alternatives"][0].get("words", [])
+
+
+async def stream_tts(
+    text: str,
+    voice_id: str = ELEVENLABS_VOICE_ID,
+    model_id: str = ELEVENLABS_MODEL_ID
+) -> AsyncIterator[bytes]:
+    """
+    Stream MP3 audio for text from ElevenLabs as it is rendered
+
+    Yields:
+        bytes: Encoded audio chunks
+    """
+    session = provider_registry.http_session()
+    async with session.post(
+        f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/{voice_id}/stream",
+        json={"text": text, "model_id": model_id},
+        headers={
+            "xi-api-key": ELEVENLABS_KEY,
+            "Accept": "audio/mpeg"
+        }
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise RuntimeError(f"ElevenLabs error: {response.status} - {error_text}")
+        async for chunk in response.content.iter_chunked(TTS_CHUNK_BYTES):
+            yield chunk
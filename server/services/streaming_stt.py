@@ -0,0 +1,139 @@
+"""
+Live Streaming Speech-to-Text
+Forwards microphone frames to a Deepgram live session while the patient is still talking
+"""
+
+import os
+import json
+import time
+import asyncio
+from urllib.parse import urlencode
+from typing import Awaitable, Callable, List, Optional
+
+import websockets
+
+# Point this at a local fake server to exercise the streaming path offline
+DEEPGRAM_LIVE_URL = os.getenv("DEEPGRAM_LIVE_URL", "wss://api.deepgram.com/v1/listen")
+
+# Silence (ms) after which Deepgram finalizes a segment - kept short so the
+# final transcript is ready soon after the patient stops talking
+LIVE_ENDPOINTING_MS = int(os.getenv("DEEPGRAM_ENDPOINTING_MS", "300"))
+
+
+class LiveTranscriptionSession:
+    """One live STT stream for a single patient utterance"""
+
+    def __init__(
+        self,
+        api_key: str,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+        url: Optional[str] = None,
+        endpointing_ms: int = LIVE_ENDPOINTING_MS
+    ):
+        self.api_key = api_key
+        self.on_partial = on_partial
+        self.url = url or DEEPGRAM_LIVE_URL
+        self.endpointing_ms = endpointing_ms
+
+        self._connection = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._final_segments: List[str] = []
+        self._interim = ""
+        # Finalized STT words, times relative to the start of the stream
+        self.words: List[dict] = []
+        # Epoch time the stream (and so the patient's audio) started
+        self.started_at: Optional[float] = None
+
+    @property
+    def transcript(self) -> str:
+        """Finalized text so far"""
+        return " ".join(segment for segment in self._final_segments if segment).strip()
+
+    async def start(self):
+        """Open the upstream socket and start consuming results"""
+        params = urlencode({
+            "model": "nova-2",
+            "smart_format": "true",
+            "punctuate": "true",
+            "interim_results": "true",
+            "filler_words": "true",
+            "endpointing": self.endpointing_ms
+        })
+
+        self._connection = await websockets.connect(
+            f"{self.url}?{params}",
+            extra_headers={"Authorization": f"Token {self.api_key}"}
+        )
+        self.started_at = time.time()
+        self._receiver = asyncio.create_task(self._receive_results())
+
+    async def send_audio(self, chunk: bytes):
+        """Forward one microphone frame upstream"""
+        if self._connection is None:
+            raise RuntimeError("Live transcription session not started")
+        await self._connection.send(chunk)
+
+    async def finish(self, timeout: float = 2.0) -> str:
+        """
+        Flush the stream and return the final transcript
+
+        Args:
+            timeout: Seconds to wait for the last results after end of speech
+
+        Returns:
+            str: Final transcript (may be empty)
+        """
+        if self._connection is None:
+            return ""
+
+        try:
+            await self._connection.send(json.dumps({"type": "CloseStream"}))
+            await asyncio.wait_for(asyncio.shield(self._receiver), timeout=timeout)
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            pass
+        finally:
+            await self.close()
+
+        # Keep the last interim hypothesis if the upstream never finalized it
+        if self._interim:
+            self._final_segments.append(self._interim)
+            self._interim = ""
+
+        return self.transcript
+
+    async def close(self):
+        """Tear down the upstream socket without waiting for results"""
+        if self._receiver and not self._receiver.done():
+            self._receiver.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+
+    async def _receive_results(self):
+        try:
+            async for raw in self._connection:
+                if isinstance(raw, bytes):
+                    continue
+
+                result = json.loads(raw)
+                if result.get("type") != "Results":
+                    continue
+
+                alternatives = result.get("channel", {}).get("alternatives", [])
+                text = alternatives[0].get("transcript", "") if alternatives else ""
+
+                if result.get("is_final"):
+                    if text:
+                        self._final_segments.append(text)
+                        self.words.extend(alternatives[0].get("words", []))
+                    self._interim = ""
+                else:
+                    self._interim = text
+
+                if self.on_partial:
+                    partial = " ".join(
+                        part for part in (self.transcript, self._interim) if part
+                    )
+                    if partial:
+                        await self.on_partial(partial)
+        except websockets.ConnectionClosed:
+            pass
@@ -0,0 +1,172 @@
+"""
+Task Deadlines
+Deadline-aware retries for Celery tasks: short jittered backoff, no zombie work
+
+Every task message carries a deadline header (epoch seconds), stamped at
+publish time from its queue class (task_queues) and inherited by whatever
+it publishes while running - chain stages, replacements and retries all
+share the turn's deadline. The same instant goes into the message's
+expires, so a worker drops a task that waited past it instead of running it.
+
+On failure a task asks retry_with_deadline() for its next attempt:
+
+    backoff   full jitter, uniform(0, min(cap, base * 2**retries))
+    retry     only if the backoff plus a minimum run still fits before the deadline
+    otherwise the original error is raised and the task fails now
+
+A patient's reply whose HTTP caller gave up after 30 seconds is therefore
+not retried minutes later, and does not keep spending LLM quota.
+
+Workers have no /metrics: retry and drop counts are added to a Redis hash
+and loaded by the API at scrape time (load_retry_counts).
+"""
+
+import os
+import time
+import random
+from datetime import datetime, timezone
+from typing import Optional
+
+import redis
+from dotenv import load_dotenv
+
+from .metrics import metrics
+from .task_queues import QUEUE_CLASSES, QUEUE_INTERACTIVE, TASK_ROUTES
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Budget from publish to done, per queue class
+TASK_DEADLINES = {
+    "interactive": float(os.getenv("TASK_DEADLINE_INTERACTIVE_SECONDS", "30")),
+    "batch": float(os.getenv("TASK_DEADLINE_BATCH_SECONDS", "1800"))
+}
+
+# (base, cap, minimum seconds left for another attempt), per queue class
+RETRY_POLICIES = {
+    "interactive": (
+        float(os.getenv("TASK_RETRY_BASE_INTERACTIVE_SECONDS", "0.25")),
+        float(os.getenv("TASK_RETRY_CAP_INTERACTIVE_SECONDS", "2")),
+        float(os.getenv("TASK_RETRY_MIN_RUN_INTERACTIVE_SECONDS", "2"))
+    ),
+    "batch": (
+        float(os.getenv("TASK_RETRY_BASE_BATCH_SECONDS", "15")),
+        float(os.getenv("TASK_RETRY_CAP_BATCH_SECONDS", "240")),
+        float(os.getenv("TASK_RETRY_MIN_RUN_BATCH_SECONDS", "60"))
+    )
+}
+
+# Worker counts: fields "{counter}|{task}|{reason}"
+REMOTE_COUNTS_KEY = "metrics:celery_retries"
+
+task_retries = metrics.counter(
+    "celery_task_retries_total",
+    "Task retries scheduled within the deadline, by task"
+)
+task_dropped = metrics.counter(
+    "celery_task_dropped_total",
+    "Tasks given up on, by task and reason (expired before start, no budget for a retry, retries exhausted)"
+)
+REMOTE_COUNTERS = {"retries": task_retries, "dropped": task_dropped}
+
+_client = None
+
+
+def task_class(task_name: Optional[str]) -> str:
+    """Queue class (interactive/batch) a task is routed to"""
+    queue = TASK_ROUTES.get(task_name or "", {}).get("queue", QUEUE_INTERACTIVE)
+    return QUEUE_CLASSES.get(queue, "interactive")
+
+
+def request_header(request, name: str):
+    """A custom message header from a task request (attribute or headers dict)"""
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, "headers", None) or {}).get(name)
+    return value
+
+
+def stamp_deadline(headers: dict, now: float, parent_request=None):
+    """
+    Give an outgoing task message its deadline and matching expiry
+
+    Args:
+        headers: Message headers (before_task_publish), updated in place
+        now: Publish time
+        parent_request: Request of the task publishing it, if any - its
+                        deadline is inherited (chain stages, retries)
+    """
+    deadline = headers.get("deadline")
+    if deadline is None and parent_request is not None:
+        deadline = request_header(parent_request, "deadline")
+    if deadline is None:
+        deadline = now + TASK_DEADLINES[task_class(headers.get("task"))]
+    headers["deadline"] = float(deadline)
+    if headers.get("expires") is None:
+        headers["expires"] = datetime.fromtimestamp(float(deadline), timezone.utc).isoformat()
+
+
+def retry_with_deadline(task, exc: Exception, countdown: Optional[float] = None) -> Exception:
+    """
+    Schedule the next attempt if it can still finish before the deadline
+
+    Args:
+        task: The bound task (self)
+        exc: The error of this attempt
+        countdown: Minimum wait before the next attempt (e.g. a provider's Retry-After)
+
+    Returns:
+        Exception: To raise - celery's Retry, or exc itself when giving up
+    """
+    name = task.name.rsplit(".", 1)[-1]
+    base, cap, min_run = RETRY_POLICIES[task_class(task.name)]
+    retries = task.request.retries
+    backoff = random.uniform(0, min(cap, base * (2 ** retries)))
+    if countdown is not None:
+        backoff = max(backoff, countdown)
+
+    if task.max_retries is not None and retries >= task.max_retries:
+        _count("dropped", name, "exhausted")
+        return exc
+
+    deadline = request_header(task.request, "deadline")
+    remaining = float(deadline) - time.time() if deadline is not None else None
+    if remaining is not None and remaining < backoff + min_run:
+        _count("dropped", name, "no_budget")
+        print(f"⏰ {name}: {remaining:.1f}s left, not retrying ({exc})")
+        return exc
+
+    _count("retries", name, "")
+    return task.retry(exc=exc, countdown=backoff, throw=False)
+
+
+def record_expired(task_name: Optional[str]):
+    """A worker dropped a message whose deadline passed before it started"""
+    _count("dropped", (task_name or "unknown").rsplit(".", 1)[-1], "expired")
+
+
+def _count(counter: str, task: str, reason: str):
+    global _client
+    try:
+        if _client is None:
+            _client = redis.Redis.from_url(REDIS_URL)
+        _client.hincrby(REMOTE_COUNTS_KEY, f"{counter}|{task}|{reason}", 1)
+    except Exception as e:
+        # Metrics must never fail a task
+        print(f"Retry metrics export error: {str(e)}")
+
+
+async def load_retry_counts(redis_client) -> int:
+    """
+    Refresh the retry and drop counters from the counts the workers wrote to Redis
+
+    Returns:
+        int: Number of series loaded
+    """
+    fields = await redis_client.hgetall(REMOTE_COUNTS_KEY)
+    for field, value in fields.items():
+        counter, task, reason = field.split("|", 2)
+        key = (("task", task),) if counter == "retries" else (("reason", reason), ("task", task))
+        REMOTE_COUNTERS[counter].replace(key, int(value))
+    return len(fields)
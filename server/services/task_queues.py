@@ -0,0 +1,133 @@
+"""
+Celery Task Queues
+Interactive vs batch routing, priorities, and queue depth/age metrics
+
+A patient waiting on a turn must never queue behind report generation, so
+tasks are split by who is waiting:
+
+    interactive   doctor replies, audio turn entry point        priority 0
+    stt/llm/tts   audio turn stages (audio_processing chain)    priority 0
+    batch         cognitive analyses, end-of-session reports    priority 9
+
+Each class has its own worker pool (docker-compose: celery-interactive,
+celery-batch), so a nightly re-analysis run can fill the batch queue without
+taking a slot from a live session. Priorities order messages within a queue
+(Redis: 0 is highest) and let a worker that consumes both classes still
+take interactive work first.
+
+Every published task carries a published_at header. /metrics reports each
+queue's depth and the age of its oldest message straight from the broker
+lists, and workers record the publish-to-start wait as span "queue_wait".
+"""
+
+import json
+import time
+from typing import Dict, Optional
+
+from .metrics import metrics
+
+QUEUE_INTERACTIVE = "interactive"
+QUEUE_BATCH = "batch"
+STAGE_QUEUES = ("stt", "llm", "tts")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 9
+
+QUEUE_CLASSES = {
+    QUEUE_INTERACTIVE: "interactive",
+    **{queue: "interactive" for queue in STAGE_QUEUES},
+    QUEUE_BATCH: "batch"
+}
+
+# Redis emulates priorities with one list per step: "{queue}", "{queue}:3", ...
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_SEP = ":"
+
+BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": PRIORITY_STEPS,
+    "sep": PRIORITY_SEP,
+    # A worker on several queues drains them in the order given to -Q
+    "queue_order_strategy": "priority"
+}
+
+
+def _interactive(queue: str = QUEUE_INTERACTIVE) -> dict:
+    return {"queue": queue, "priority": PRIORITY_INTERACTIVE}
+
+
+def _batch() -> dict:
+    return {"queue": QUEUE_BATCH, "priority": PRIORITY_BATCH}
+
+
+TASK_ROUTES = {
+    # Live turns
+    "server.tasks.doctor_conversation.generate_doctor_response": _interactive(),
+    "server.tasks.audio_processing.process_audio": _interactive(),
+    "server.tasks.audio_processing.process_ai_response": _interactive(),
+    "server.tasks.audio_processing.transcribe_audio": _interactive("stt"),
+    "server.tasks.audio_processing.respond_to_transcript": _interactive("llm"),
+    "server.tasks.audio_processing.synthesize_reply": _interactive("tts"),
+    "server.tasks.audio_processing.generate_speech": _interactive("tts"),
+    # Reports (max_tokens 500-800) - nobody is waiting on these mid-conversation
+    "server.tasks.ai_processing.analyze_cognitive_assessment": _batch(),
+    "server.tasks.doctor_conversation.analyze_elderly_conversation": _batch()
+}
+
+queue_depth = metrics.gauge(
+    "celery_queue_depth",
+    "Messages waiting in each Celery queue (all priority levels), by queue and class"
+)
+queue_oldest_age = metrics.gauge(
+    "celery_queue_oldest_age_seconds",
+    "Age of the oldest waiting message in each Celery queue, by queue and class"
+)
+
+
+def _priority_lists(queue: str):
+    return [queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS]
+
+
+def _published_at(message: Optional[str]) -> Optional[float]:
+    if not message:
+        return None
+    try:
+        return float(json.loads(message)["headers"]["published_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def load_queue_stats(redis_client) -> Dict[str, dict]:
+    """
+    Refresh the queue depth and oldest-message age gauges from the broker
+
+    Returns:
+        dict: queue -> {"class", "depth", "oldest_age_seconds"}
+    """
+    lists = {queue: _priority_lists(queue) for queue in QUEUE_CLASSES}
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for names in lists.values():
+            for name in names:
+                pipe.llen(name)
+                # kombu LPUSHes and BRPOPs: the oldest message is the last element
+                pipe.lindex(name, -1)
+        replies = await pipe.execute()
+
+    now = time.time()
+    stats = {}
+    position = 0
+    for queue, names in lists.items():
+        depth = 0
+        oldest = None
+        for _ in names:
+            length, tail = replies[position], replies[position + 1]
+            position += 2
+            depth += length or 0
+            published = _published_at(tail)
+            if published is not None:
+                oldest = published if oldest is None else min(oldest, published)
+
+        age = max(0.0, now - oldest) if oldest is not None else 0.0
+        queue_depth.set(depth, queue=queue, **{"class": QUEUE_CLASSES[queue]})
+        queue_oldest_age.set(age, queue=queue, **{"class": QUEUE_CLASSES[queue]})
+        stats[queue] = {"class": QUEUE_CLASSES[queue], "depth": depth, "oldest_age_seconds": round(age, 3)}
+    return stats
@@ -0,0 +1,154 @@
+"""
+LLM Token Accounting
+Prompt, cached and completion tokens per call, per call kind and per session
+
+Azure OpenAI reuses the KV cache of a prompt prefix it has seen recently
+(1024 tokens or more, in 128-token steps) and reports the reused part as
+usage.prompt_tokens_details.cached_tokens. Prompts are laid out with a
+byte-stable prefix first (see dementia_assessment_flow.ASSESSMENT_PREFIX);
+these counters show how much of it the provider actually served from cache.
+The assessment prefix is currently below the 1024-token minimum, so its
+cached count stays at zero until the fixed content grows past it.
+
+Streaming calls only carry usage with LLM_STREAM_USAGE=true (stream_options
+needs Azure API version 2024-09-01-preview or later). Without it, prompt and
+completion tokens are counted locally and cached tokens are unknown.
+"""
+
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from .metrics import metrics
+from .session_store import session_store
+from server.tasks.context_manager import count_message_tokens, count_tokens
+
+load_dotenv()
+
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "false").lower() == "true"
+
+llm_calls = metrics.counter(
+    "llm_calls_total",
+    "Chat completion calls by call kind and whether usage came from the provider or a local count"
+)
+llm_prompt_tokens = metrics.counter(
+    "llm_prompt_tokens_total",
+    "Prompt tokens sent, by call kind"
+)
+llm_cached_tokens = metrics.counter(
+    "llm_cached_prompt_tokens_total",
+    "Prompt tokens the provider served from its prefix cache, by call kind"
+)
+llm_prefix_tokens = metrics.counter(
+    "llm_stable_prefix_tokens_total",
+    "Prompt tokens in the byte-stable prefix (the cacheable part), by call kind"
+)
+llm_completion_tokens = metrics.counter(
+    "llm_completion_tokens_total",
+    "Completion tokens generated, by call kind"
+)
+
+
+def stream_usage_options() -> dict:
+    """Extra create() arguments that make a streamed completion report its usage"""
+    # The pinned openai SDK (1.3.x) predates the stream_options parameter, so
+    # it goes into the request body as is
+    return {"extra_body": {"stream_options": {"include_usage": True}}} if LLM_STREAM_USAGE else {}
+
+
+def usage_from_response(
+    usage,
+    messages: List[dict],
+    completion: str,
+    prefix_messages: int = 1
+) -> dict:
+    """
+    Token usage of one call, from the provider when it reported it
+
+    Args:
+        usage: The response's usage object (or dict), or None
+        messages: The prompt that was sent
+        completion: The generated text
+        prefix_messages: Leading messages that form the stable prefix
+
+    Returns:
+        dict: prompt_tokens, cached_tokens (None if unknown), completion_tokens,
+              prefix_tokens, estimated
+    """
+    prefix_tokens = count_message_tokens(messages[:prefix_messages])
+
+    if usage is None:
+        return {
+            "prompt_tokens": count_message_tokens(messages),
+            "cached_tokens": None,
+            "completion_tokens": count_tokens(completion),
+            "prefix_tokens": prefix_tokens,
+            "estimated": True
+        }
+
+    if isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens")
+        prompt, generated = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    else:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details else None
+        prompt, generated = usage.prompt_tokens, usage.completion_tokens
+
+    return {
+        "prompt_tokens": prompt,
+        "cached_tokens": cached or 0,
+        "completion_tokens": generated,
+        "prefix_tokens": prefix_tokens,
+        "estimated": False
+    }
+
+
+async def record_usage(session_id: Optional[str], call: str, usage: dict):
+    """Add one call's usage to the process counters and the session's stats"""
+    source = "local" if usage["estimated"] else "provider"
+    cached = usage["cached_tokens"] or 0
+
+    llm_calls.inc(call=call, source=source)
+    llm_prompt_tokens.inc(usage["prompt_tokens"], call=call)
+    llm_cached_tokens.inc(cached, call=call)
+    llm_prefix_tokens.inc(usage["prefix_tokens"], call=call)
+    llm_completion_tokens.inc(usage["completion_tokens"], call=call)
+
+    cached_note = f", {cached} cached" if not usage["estimated"] else " (local count)"
+    print(
+        f"🔢 {call}: {usage['prompt_tokens']} prompt{cached_note}, "
+        f"{usage['completion_tokens']} completion tokens"
+    )
+
+    if session_id:
+        await session_store.incr_stats(
+            session_id,
+            llm_calls=1,
+            prompt_tokens=usage["prompt_tokens"],
+            cached_tokens=cached,
+            prefix_tokens=usage["prefix_tokens"],
+            completion_tokens=usage["completion_tokens"],
+            usage_reported_calls=0 if usage["estimated"] else 1,
+            reported_prompt_tokens=0 if usage["estimated"] else usage["prompt_tokens"]
+        )
+
+
+def usage_summary(stats: dict) -> dict:
+    """Token totals and cache hit rate from a session's stats"""
+    prompt = stats.get("prompt_tokens", 0)
+    cached = stats.get("cached_tokens", 0)
+    calls = stats.get("llm_calls", 0)
+    reported = stats.get("usage_reported_calls", 0)
+    reported_prompt = stats.get("reported_prompt_tokens", 0)
+    return {
+        "llm_calls": int(calls),
+        "prompt_tokens": int(prompt),
+        "cached_tokens": int(cached) if reported else None,
+        "completion_tokens": int(stats.get("completion_tokens", 0)),
+        "stable_prefix_tokens": int(stats.get("prefix_tokens", 0)),
+        "mean_prompt_tokens": prompt / calls if calls else None,
+        # Only calls the provider reported usage for can have cache hits
+        "cache_hit_rate": cached / reported_prompt if reported_prompt else None
+    }
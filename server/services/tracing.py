@@ -0,0 +1,193 @@
+"""
+Turn Tracing
+Timed spans for each stage of a patient turn, exported as histograms at /metrics
+
+A turn (run_patient_turn) opens a TurnTrace in a context variable; every
+span inside it - in the turn task or in tasks it starts, such as the TTS
+renders - is labelled with that turn's assessment stage. Spans:
+
+    receive    inbound message handling until the turn task starts
+    stt        final transcript (prerecorded request or live stream flush)
+    llm        streamed completion, request to last token
+    llm_first_token  request to first token
+    tts        one sentence rendered by ElevenLabs (or the cache)
+    send       audio chunk encoding and hand-off to the socket queue
+    heygen     avatar speak request
+
+time-to-first-audio (end of the patient's speech to the first audio chunk
+sent) is its own histogram per stage. Session ids only go to the span log
+(TRACE_SPANS=true), never into metric labels.
+
+Celery workers have no /metrics of their own: their spans are added to a
+Redis hash (enable_remote_spans) and the API merges them in at scrape time.
+"""
+
+import os
+import time
+import bisect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from .metrics import LATENCY_BUCKETS, metrics
+
+load_dotenv()
+
+# One structured log line per span (noisy; for debugging a single session)
+TRACE_SPANS = os.getenv("TRACE_SPANS", "false").lower() == "true"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+logger = logging.getLogger(__name__)
+
+# Worker spans: fields "{span}|{task}|{bucket index}", "...|sum", "...|count"
+REMOTE_SPANS_KEY = "metrics:celery_spans"
+
+turn_span_seconds = metrics.histogram(
+    "turn_span_seconds",
+    "Duration of each stage of a patient turn, by span and assessment stage"
+)
+time_to_first_audio_seconds = metrics.histogram(
+    "turn_time_to_first_audio_seconds",
+    "End of the patient's speech to the first audio chunk sent, by assessment stage"
+)
+celery_span_seconds = metrics.histogram(
+    "celery_span_seconds",
+    "Duration of Celery task spans (span=task is the whole task), aggregated from every worker"
+)
+
+
+class TurnTrace:
+    """Labels and start time shared by every span of one turn"""
+
+    def __init__(self, session_id: str, started_at: float):
+        self.session_id = session_id
+        # time.perf_counter() when the patient stopped speaking
+        self.started_at = started_at
+        self.stage: Optional[int] = None
+        self.first_audio_recorded = False
+
+
+current_turn: ContextVar[Optional[TurnTrace]] = ContextVar("current_turn", default=None)
+
+# Set in Celery worker processes: spans go to Redis instead of local histograms
+_remote_client = None
+current_task: ContextVar[str] = ContextVar("current_task", default="")
+
+
+def start_turn(session_id: str, started_at: Optional[float] = None) -> TurnTrace:
+    """Open a turn trace for the current task (and the tasks it starts from here on)"""
+    trace = TurnTrace(session_id, started_at if started_at is not None else time.perf_counter())
+    current_turn.set(trace)
+    return trace
+
+
+def set_turn_stage(stage: int):
+    """Label the rest of the turn's spans with its assessment stage"""
+    trace = current_turn.get()
+    if trace is not None:
+        trace.stage = stage
+
+
+def _stage_label(trace: Optional[TurnTrace]) -> str:
+    return str(trace.stage) if trace is not None and trace.stage is not None else "none"
+
+
+def observe_span(name: str, seconds: float):
+    """Record a span measured elsewhere (e.g. across callbacks)"""
+    if _remote_client is not None:
+        _record_remote(name, current_task.get() or "none", seconds)
+        return
+
+    trace = current_turn.get()
+    turn_span_seconds.observe(seconds, span=name, stage=_stage_label(trace))
+    if TRACE_SPANS:
+        session = trace.session_id if trace is not None else "-"
+        logger.info("⏱️ span=%s session=%s stage=%s ms=%.1f", name, session, _stage_label(trace), seconds * 1000)
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as one span of the current turn (or Celery task)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(name, time.perf_counter() - started)
+
+
+def mark_first_audio():
+    """Record time-to-first-audio once per turn, when its first audio chunk goes out"""
+    trace = current_turn.get()
+    if trace is None or trace.first_audio_recorded:
+        return
+    trace.first_audio_recorded = True
+    seconds = time.perf_counter() - trace.started_at
+    time_to_first_audio_seconds.observe(seconds, stage=_stage_label(trace))
+    if TRACE_SPANS:
+        logger.info("⏱️ first_audio session=%s stage=%s ms=%.1f", trace.session_id, _stage_label(trace), seconds * 1000)
+
+
+def latency_percentiles(quantiles=(0.5, 0.95, 0.99)) -> Dict[str, dict]:
+    """
+    Time-to-first-audio percentiles per assessment stage, estimated from the histogram
+
+    Returns:
+        dict: stage -> {"count": turns, "p50_ms": ..., "p95_ms": ..., "p99_ms": ...}
+    """
+    result = {}
+    for labels in sorted(time_to_first_audio_seconds.label_sets(), key=lambda labels: labels["stage"]):
+        stage = labels["stage"]
+        values = {"count": time_to_first_audio_seconds.count(stage=stage)}
+        for q in quantiles:
+            seconds = time_to_first_audio_seconds.quantile(q, stage=stage)
+            values[f"p{round(q * 100)}_ms"] = round(seconds * 1000, 1) if seconds is not None else None
+        result[stage] = values
+    return result
+
+
+def enable_remote_spans(redis_url: str = REDIS_URL):
+    """Send this process's spans to Redis (called in each Celery worker process)"""
+    global _remote_client
+    _remote_client = redis.Redis.from_url(redis_url)
+
+
+def _record_remote(name: str, task: str, seconds: float):
+    index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    prefix = f"{name}|{task}"
+    try:
+        with _remote_client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(REMOTE_SPANS_KEY, f"{prefix}|{index}", 1)
+            pipe.hincrbyfloat(REMOTE_SPANS_KEY, f"{prefix}|sum", seconds)
+            pipe.hincrby(REMOTE_SPANS_KEY, f"{prefix}|count", 1)
+            pipe.execute()
+    except Exception as e:
+        # Metrics must never fail a task
+        print(f"Span export error: {str(e)}")
+
+
+async def load_remote_spans(redis_client) -> int:
+    """
+    Refresh celery_span_seconds from the counts the workers wrote to Redis
+
+    Returns:
+        int: Number of (span, task) series loaded
+    """
+    fields = await redis_client.hgetall(REMOTE_SPANS_KEY)
+    series: Dict[tuple, list] = {}
+    for field, value in fields.items():
+        name, task, part = field.rsplit("|", 2)
+        entry = series.setdefault((name, task), [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0])
+        if part == "sum":
+            entry[1] = float(value)
+        elif part == "count":
+            entry[2] = int(value)
+        elif int(part) < len(entry[0]):
+            entry[0][int(part)] = int(value)
+
+    for (name, task), (counts, total, count) in series.items():
+        celery_span_seconds.replace((("span", name), ("task", task)), counts, total, count)
+    return len(series)
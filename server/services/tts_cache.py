@@ -0,0 +1,294 @@
+"""
+Content-Addressed TTS Cache
+Pre-rendered audio for Dr. Smith's fixed script, so scripted lines start with zero TTS latency
+
+Entries are keyed by sha256(voice, model, text). A byte-bounded LRU in memory
+sits in front of a size-bounded directory on disk; the disk tier evicts the
+least recently used files. Only scripted phrases are written by default, so
+one-off LLM sentences never push the script out of the cache.
+
+Pre-render the whole script at deploy time with:
+
+    python -m server.services.tts_cache warm
+"""
+
+import os
+import sys
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from .metrics import metrics
+from .provider_executor import run_blocking
+from .speech_services import ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_ID, TTS_CHUNK_BYTES, stream_tts
+
+load_dotenv()
+
+TTS_CACHE_DIR = os.path.expanduser(os.getenv("TTS_CACHE_DIR", os.path.join("~", ".cache", "dementia_tts")))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+# Also cache one-off (LLM-generated) sentences, not just the fixed script
+TTS_CACHE_ALL = os.getenv("TTS_CACHE_ALL", "false").lower() == "true"
+
+cache_hits = metrics.counter("tts_cache_hits_total", "TTS requests served from cache, by tier")
+cache_misses = metrics.counter("tts_cache_misses_total", "TTS requests that went to the upstream")
+cache_evictions = metrics.counter("tts_cache_evictions_total", "Cache entries evicted, by tier")
+
+
+def cache_key(text: str, voice_id: str = ELEVENLABS_VOICE_ID, model_id: str = ELEVENLABS_MODEL_ID) -> str:
+    """Content address for one rendering of text"""
+    digest = hashlib.sha256()
+    for part in (voice_id, model_id, text.strip()):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) audio cache"""
+
+    def __init__(
+        self,
+        directory: str = TTS_CACHE_DIR,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES
+    ):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+        metrics.gauge(
+            "tts_cache_bytes",
+            "Bytes held by each cache tier",
+            callback=lambda: {
+                (("tier", "memory"),): self._memory_used,
+                (("tier", "disk"),): self._disk_used or 0
+            }
+        )
+
+    # Memory tier
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+        return audio
+
+    def _memory_put(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            cache_evictions.inc(tier="memory")
+
+    # Disk tier (blocking - always called through the provider executor)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _scan_disk(self):
+        if self._disk_used is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._disk_used = sum(
+                entry.stat().st_size
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".mp3")
+            )
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime doubles as last-use time for eviction
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _disk_put(self, key: str, audio: bytes):
+        with self._disk_lock:
+            self._scan_disk()
+            path = self._path(key)
+            if os.path.exists(path):
+                return
+
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+            self._disk_used += len(audio)
+
+            if self._disk_used > self.disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory)
+             if entry.is_file() and entry.name.endswith(".mp3")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self._disk_used <= self.disk_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self._disk_used -= size
+            cache_evictions.inc(tier="disk")
+
+    # Public API
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Cached audio for key, promoting disk hits into memory"""
+        audio = self._memory_get(key)
+        if audio is not None:
+            cache_hits.inc(tier="memory")
+            return audio
+
+        audio = await run_blocking(self._disk_get, key)
+        if audio is not None:
+            cache_hits.inc(tier="disk")
+            self._memory_put(key, audio)
+            return audio
+
+        cache_misses.inc()
+        return None
+
+    async def put(self, key: str, audio: bytes):
+        """Store audio in both tiers"""
+        if not audio:
+            return
+        self._memory_put(key, audio)
+        await run_blocking(self._disk_put, key, audio)
+
+    async def preload(self, keys: Iterable[str]) -> int:
+        """Pull disk entries into memory ahead of the first session"""
+        await run_blocking(self._scan_disk)
+        loaded = 0
+        for key in keys:
+            if key in self._memory:
+                continue
+            audio = await run_blocking(self._disk_get, key)
+            if audio is not None:
+                self._memory_put(key, audio)
+                loaded += 1
+        return loaded
+
+    def contains(self, key: str) -> bool:
+        return key in self._memory or os.path.exists(self._path(key))
+
+
+tts_cache = TTSCache()
+
+# Phrases that are written to the cache on a miss (filled by register_scripted_phrases)
+_scripted_keys = set()
+
+
+def register_scripted_phrases(phrases: Iterable[str]):
+    """Mark fixed script lines as cacheable"""
+    for phrase in phrases:
+        _scripted_keys.add(cache_key(phrase))
+
+
+async def preload_scripted_phrases() -> int:
+    """Load every pre-rendered script line into the memory tier"""
+    return await tts_cache.preload(_scripted_keys)
+
+
+async def cached_stream_tts(text: str) -> AsyncIterator[bytes]:
+    """
+    stream_tts with the cache in front of it
+
+    Hits skip the upstream entirely; misses stream through unchanged and are
+    stored afterwards if the phrase is part of the script.
+    """
+    key = cache_key(text)
+    audio = await tts_cache.get(key)
+    if audio is not None:
+        for offset in range(0, len(audio), TTS_CHUNK_BYTES):
+            yield audio[offset:offset + TTS_CHUNK_BYTES]
+        return
+
+    store = TTS_CACHE_ALL or key in _scripted_keys
+    rendered = bytearray() if store else None
+
+    async for chunk in stream_tts(text):
+        if rendered is not None:
+            rendered.extend(chunk)
+        yield chunk
+
+    if rendered:
+        await tts_cache.put(key, bytes(rendered))
+
+
+async def warm_cache(phrases: Iterable[str], concurrency: int = 4) -> dict:
+    """
+    Render every phrase that is not cached yet
+
+    Returns:
+        dict: Counts of rendered, already cached and failed phrases
+    """
+    from .provider_registry import provider_registry
+
+    limit = asyncio.Semaphore(concurrency)
+    summary = {"rendered": 0, "cached": 0, "failed": 0}
+
+    async def render(phrase: str):
+        key = cache_key(phrase)
+        if tts_cache.contains(key):
+            summary["cached"] += 1
+            return
+        async with limit:
+            try:
+                audio = bytearray()
+                async for chunk in stream_tts(phrase):
+                    audio.extend(chunk)
+                await tts_cache.put(key, bytes(audio))
+                summary["rendered"] += 1
+                print(f"✅ Rendered: {phrase[:60]}...")
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"❌ Failed: {phrase[:60]}... ({str(e)})")
+
+    await provider_registry.start()
+    try:
+        await asyncio.gather(*[render(phrase) for phrase in phrases])
+    finally:
+        await provider_registry.close()
+    return summary
+
+
+def main():
+    from server.tasks.dementia_assessment_flow import get_scripted_phrases
+
+    if len(sys.argv) < 2 or sys.argv[1] != "warm":
+        print("Usage: python -m server.services.tts_cache warm")
+        sys.exit(1)
+
+    phrases = get_scripted_phrases()
+    print(f"🔊 Pre-rendering {len(phrases)} scripted phrases into {TTS_CACHE_DIR}")
+    summary = asyncio.run(warm_cache(phrases))
+    print(f"Done: {summary['rendered']} rendered, {summary['cached']} already cached, {summary['failed']} failed")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
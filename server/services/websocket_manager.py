@@ -1,33 +1,532 @@
-from fastapi import WebSocket
-from typing import Dict, List
+"""
+WebSocket Connection Manager
+Delivers messages to a session's socket from any API process or Celery worker
+
+Each API process subscribes to ws:session:{id} for the sockets it holds.
+Messages for a session whose socket lives elsewhere (another uvicorn worker,
+another node, a Celery task) are published to that channel and forwarded by
+the owning process. Publishes are batched: everything queued for a session
+within WS_PUBSUB_BATCH_MS goes out as one envelope.
+
+Envelope (JSON): {"m": [["t", "<text frame>"], ["b", "<base64 binary frame>"], ...]}
+
+Only plain PUBLISH/SUBSCRIBE is used, so a stock redis-server is enough.
+
+Every local socket is written by its own OutboundQueue task, so a stalled
+client never blocks the session handler. Frames are sent in priority order
+(control, then text, then audio); within a lane order is preserved.
+"""
+
+import os
 import json
+import base64
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from fastapi import WebSocket
+
+from .metrics import metrics
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+WS_PUBSUB_ENABLED = os.getenv("WS_PUBSUB_ENABLED", "true").lower() == "true"
+WS_PUBSUB_BATCH_MS = float(os.getenv("WS_PUBSUB_BATCH_MS", "5"))
+WS_PUBSUB_BATCH_SIZE = int(os.getenv("WS_PUBSUB_BATCH_SIZE", "64"))
+
+# Outbound queue bounds per socket, and how long a send or a producer waiting
+# for audio space may stall before the client is dropped as unresponsive
+WS_QUEUE_CONTROL_MAX = int(os.getenv("WS_QUEUE_CONTROL_MAX", "256"))
+WS_QUEUE_TEXT_MAX = int(os.getenv("WS_QUEUE_TEXT_MAX", "1024"))
+WS_QUEUE_AUDIO_MAX = int(os.getenv("WS_QUEUE_AUDIO_MAX", "512"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+CHANNEL_PREFIX = "ws:session:"
+
+Frame = Tuple[str, Union[str, bytes]]  # ("t", text) or ("b", bytes)
+
+# Priority lanes, highest first
+LANE_CONTROL = 0
+LANE_TEXT = 1
+LANE_AUDIO = 2
+LANE_NAMES = ("control", "text", "audio")
+
+CONTROL_MESSAGES = {
+    "pong", "configured", "processing", "error",
+    "stream_started", "assessment_complete", "turn_cancelled"
+}
+AUDIO_MESSAGES = {"ai_audio", "audio_response"}
+
+# Coalescing policies for frames that are superseded by newer ones
+COALESCE_REPLACE = "replace"  # only the latest pending frame matters
+COALESCE_MERGE = "merge"      # concatenate "text" into the pending frame
+
+published_batches = metrics.counter(
+    "ws_pubsub_batches_published_total",
+    "Envelopes published for sessions held by another process"
+)
+published_frames = metrics.counter(
+    "ws_pubsub_frames_published_total",
+    "Frames published for sessions held by another process"
+)
+forwarded_frames = metrics.counter(
+    "ws_pubsub_frames_forwarded_total",
+    "Frames received over pub/sub and sent to a local socket, by outcome"
+)
+outbound_coalesced = metrics.counter(
+    "ws_outbound_coalesced_total",
+    "Queued frames superseded before they were sent, by lane"
+)
+outbound_dropped = metrics.counter(
+    "ws_outbound_dropped_total",
+    "Frames dropped instead of sent, by lane and reason"
+)
+slow_consumers = metrics.counter(
+    "ws_slow_consumer_disconnects_total",
+    "Sockets closed because the client stopped reading, by lane"
+)
+
+
+def classify_message(payload: dict) -> Tuple[int, Optional[str], Optional[str]]:
+    """
+    Lane and coalescing policy for a JSON message
+
+    Returns:
+        tuple: (lane, coalesce_key, coalesce_policy)
+    """
+    message_type = payload.get("type")
+    if message_type in AUDIO_MESSAGES:
+        return LANE_AUDIO, None, None
+    if message_type in CONTROL_MESSAGES:
+        return LANE_CONTROL, None, None
+    if message_type == "user_transcript" and not payload.get("is_final", True):
+        # An interim transcript is stale as soon as a newer one exists
+        return LANE_TEXT, "partial_transcript", COALESCE_REPLACE
+    if message_type == "ai_response_delta":
+        return LANE_TEXT, "ai_response_delta", COALESCE_MERGE
+    return LANE_TEXT, None, None
+
+
+def session_channel(session_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{session_id}"
+
+
+def encode_envelope(frames: List[Frame]) -> str:
+    encoded = []
+    for kind, data in frames:
+        if kind == "b":
+            data = base64.b64encode(data).decode("ascii")
+        encoded.append([kind, data])
+    return json.dumps({"m": encoded}, separators=(",", ":"))
+
+
+def decode_envelope(payload: str) -> List[Frame]:
+    frames = []
+    for kind, data in json.loads(payload)["m"]:
+        if kind == "b":
+            data = base64.b64decode(data)
+        frames.append((kind, data))
+    return frames
+
+
+# Synchronous publishing for Celery workers (no event loop there)
+_sync_client: Optional[redis.Redis] = None
+
+
+def publish_to_session(session_id: str, *messages: Union[str, bytes]) -> int:
+    """
+    Deliver messages to a session's socket from outside the API processes
+
+    All messages go out as one envelope. str is sent as a text frame,
+    bytes as a binary frame.
+
+    Returns:
+        int: Number of API processes that received the envelope (0 = not connected)
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(REDIS_URL)
+
+    frames = [("b", m) if isinstance(m, bytes) else ("t", m) for m in messages]
+    published_batches.inc(source="sync")
+    published_frames.inc(len(frames), source="sync")
+    return _sync_client.publish(session_channel(session_id), encode_envelope(frames))
+
+
+class OutboundQueue:
+    """Bounded, prioritised send queue plus the single task that writes to one socket"""
+
+    def __init__(self, websocket: WebSocket, session_id: str):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.limits = (WS_QUEUE_CONTROL_MAX, WS_QUEUE_TEXT_MAX, WS_QUEUE_AUDIO_MAX)
+        self.lanes: Tuple[Deque[list], ...] = (deque(), deque(), deque())
+        self.closed = False
+
+        # coalesce_key -> queued entry [frame, coalesce_key], while still unsent
+        self._pending: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._writer = asyncio.create_task(self._run())
+
+    def depth(self, lane: int) -> int:
+        return len(self.lanes[lane])
+
+    async def put(
+        self,
+        frame: Frame,
+        lane: int,
+        coalesce_key: Optional[str] = None,
+        coalesce_policy: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a frame for sending
+
+        Control and text frames never wait: a full lane means the client has
+        stopped reading, and the socket is closed. Audio producers wait for
+        space (backpressure on TTS) up to WS_SEND_TIMEOUT_SECONDS.
+
+        Returns:
+            bool: False if the frame was dropped
+        """
+        if self.closed:
+            outbound_dropped.inc(lane=LANE_NAMES[lane], reason="closed")
+            return False
+
+        if coalesce_key and self._coalesce(frame, lane, coalesce_key, coalesce_policy):
+            return True
+
+        queue = self.lanes[lane]
+        if len(queue) >= self.limits[lane]:
+            if lane != LANE_AUDIO:
+                await self._drop_slow_consumer(lane)
+                return False
+            try:
+                while len(queue) >= self.limits[lane] and not self.closed:
+                    self._space.clear()
+                    await asyncio.wait_for(self._space.wait(), timeout=WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await self._drop_slow_consumer(lane)
+                return False
+            if self.closed:
+                outbound_dropped.inc(lane=LANE_NAMES[lane], reason="closed")
+                return False
+
+        entry = [frame, coalesce_key]
+        if coalesce_key:
+            self._pending[coalesce_key] = entry
+        queue.append(entry)
+        self._ready.set()
+        return True
+
+    def _coalesce(self, frame: Frame, lane: int, key: str, policy: Optional[str]) -> bool:
+        entry = self._pending.get(key)
+        if entry is None:
+            return False
+
+        if policy == COALESCE_REPLACE:
+            entry[0] = frame
+        elif policy == COALESCE_MERGE:
+            # Only merge into the tail, so nothing queued after it is reordered
+            if not self.lanes[lane] or self.lanes[lane][-1] is not entry:
+                return False
+            queued = json.loads(entry[0][1])
+            queued["text"] += json.loads(frame[1])["text"]
+            entry[0] = ("t", json.dumps(queued))
+        else:
+            return False
+
+        outbound_coalesced.inc(lane=LANE_NAMES[lane])
+        return True
+
+    def _pop(self) -> Optional[Frame]:
+        for queue in self.lanes:
+            if queue:
+                entry = queue.popleft()
+                frame, key = entry
+                if key and self._pending.get(key) is entry:
+                    del self._pending[key]
+                self._space.set()
+                return frame
+        return None
+
+    async def _run(self):
+        while not self.closed:
+            frame = self._pop()
+            if frame is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            kind, data = frame
+            try:
+                if kind == "b":
+                    await asyncio.wait_for(self.websocket.send_bytes(data), timeout=WS_SEND_TIMEOUT_SECONDS)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(data), timeout=WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await self._drop_slow_consumer(None)
+            except Exception:
+                # Socket already gone - the session handler cleans up
+                self._discard("disconnected")
+
+    async def _drop_slow_consumer(self, lane: Optional[int]):
+        if self.closed:
+            return
+        print(f"⚠️ Client for {self.session_id} stopped reading, closing socket")
+        slow_consumers.inc(lane=LANE_NAMES[lane] if lane is not None else "send")
+        self._discard("slow_consumer")
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def discard(self, lane: int) -> int:
+        """Drop everything still queued in one lane (e.g. audio of a cancelled turn)"""
+        queue = self.lanes[lane]
+        dropped = len(queue)
+        if dropped:
+            outbound_dropped.inc(dropped, lane=LANE_NAMES[lane], reason="cancelled")
+            for _, key in queue:
+                if key:
+                    self._pending.pop(key, None)
+            queue.clear()
+            self._space.set()
+        return dropped
+
+    def _discard(self, reason: str):
+        self.closed = True
+        for lane, queue in enumerate(self.lanes):
+            if queue:
+                outbound_dropped.inc(len(queue), lane=LANE_NAMES[lane], reason=reason)
+                queue.clear()
+        self._pending.clear()
+        self._ready.set()
+        self._space.set()
+
+    def close(self):
+        """Stop the writer; anything still queued is dropped"""
+        self._discard("disconnected")
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, redis_url: str = REDIS_URL, pubsub_enabled: bool = WS_PUBSUB_ENABLED):
         self.active_connections: Dict[str, WebSocket] = {}
+        self.queues: Dict[str, OutboundQueue] = {}
+
+        # Aggregated per lane - a per-session label would add a series for
+        # every session ever connected
+        metrics.gauge(
+            "ws_outbound_queue_depth",
+            "Frames waiting in the outbound queues of all sockets, by lane",
+            callback=lambda: self._queue_depths(sum)
+        )
+        metrics.gauge(
+            "ws_outbound_queue_depth_max",
+            "Deepest outbound queue of any socket, by lane",
+            callback=lambda: self._queue_depths(max)
+        )
+
+        self.redis_url = redis_url
+        self.pubsub_enabled = pubsub_enabled
+        self._redis: Optional[aioredis.Redis] = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._outbox: Dict[str, List[Frame]] = {}
+        self._outbox_ready = asyncio.Event()
+
+    def _queue_depths(self, aggregate) -> Dict[tuple, float]:
+        queues = list(self.queues.values())
+        depths = {}
+        for lane in (LANE_CONTROL, LANE_TEXT, LANE_AUDIO):
+            values = [queue.depth(lane) for queue in queues]
+            depths[(("lane", LANE_NAMES[lane]),)] = aggregate(values) if values else 0
+        return depths
+
+    # Lifecycle (called from the app lifespan)
+
+    async def start(self):
+        if not self.pubsub_enabled or self._listener:
+            return
+        self._redis = aioredis.from_url(self.redis_url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._listener = asyncio.create_task(self._listen())
+        self._flusher = asyncio.create_task(self._flush_outbox())
+
+    async def close(self):
+        for task in (self._listener, self._flusher):
+            if task:
+                task.cancel()
+        self._listener = self._flusher = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    # Connections
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
+        previous = self.queues.pop(session_id, None)
+        if previous is not None:
+            previous.close()
         self.active_connections[session_id] = websocket
+        self.queues[session_id] = OutboundQueue(websocket, session_id)
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.subscribe(session_channel(session_id))
+            except Exception as e:
+                print(f"⚠️ Pub/sub subscribe failed for {session_id}: {str(e)}")
 
-    def disconnect(self, session_id: str):
+    def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        # A reconnect may already have replaced this socket - leave the new one alone
+        if websocket is not None and self.active_connections.get(session_id) is not websocket:
+            return
         if session_id in self.active_connections:
             del self.active_connections[session_id]
+            queue = self.queues.pop(session_id, None)
+            if queue is not None:
+                queue.close()
+            if self._pubsub is not None:
+                asyncio.create_task(self._unsubscribe(session_id))
+
+    async def _unsubscribe(self, session_id: str):
+        try:
+            await self._pubsub.unsubscribe(session_channel(session_id))
+        except Exception:
+            pass
+
+    # Sending
+
+    async def send_json(self, session_id: str, payload: dict) -> bool:
+        """Queue a JSON message; its type picks the lane and coalescing policy"""
+        lane, coalesce_key, coalesce_policy = classify_message(payload)
+        return await self._deliver(session_id, ("t", json.dumps(payload)), lane, coalesce_key, coalesce_policy)
+
+    async def send_text(self, session_id: str, message: str, lane: Optional[int] = None) -> bool:
+        """Queue an already-encoded text frame (lane inferred from its JSON type if not given)"""
+        if lane is None:
+            return await self._deliver_text(session_id, message)
+        return await self._deliver(session_id, ("t", message), lane)
+
+    async def send_bytes(self, session_id: str, data: bytes) -> bool:
+        """Queue a binary (audio) frame"""
+        return await self._deliver(session_id, ("b", data), LANE_AUDIO)
+
+    def discard_queued(self, session_id: str, lane: int) -> int:
+        """Drop unsent frames in one lane of a local socket"""
+        queue = self.queues.get(session_id)
+        return queue.discard(lane) if queue is not None else 0
 
     async def send_personal_message(self, message: str, session_id: str):
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
-            await websocket.send_text(message)
+        await self.send_text(session_id, message)
 
     async def send_audio_response(self, audio_data: bytes, session_id: str):
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
-            await websocket.send_bytes(audio_data)
+        await self.send_bytes(session_id, audio_data)
 
     async def send_text_response(self, text: str, session_id: str, is_user: bool = False):
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
-            await websocket.send_text(json.dumps({
-                "type": "user_transcript" if is_user else "ai_response",
-                "text": text
-            }))
+        await self.send_json(session_id, {
+            "type": "user_transcript" if is_user else "ai_response",
+            "text": text
+        })
+
+    async def _deliver_text(self, session_id: str, message: str) -> bool:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            lane, coalesce_key, coalesce_policy = classify_message(payload)
+        else:
+            lane, coalesce_key, coalesce_policy = LANE_TEXT, None, None
+        return await self._deliver(session_id, ("t", message), lane, coalesce_key, coalesce_policy)
+
+    async def _deliver(
+        self,
+        session_id: str,
+        frame: Frame,
+        lane: int,
+        coalesce_key: Optional[str] = None,
+        coalesce_policy: Optional[str] = None
+    ) -> bool:
+        queue = self.queues.get(session_id)
+        if queue is not None:
+            return await queue.put(frame, lane, coalesce_key, coalesce_policy)
+        if self._redis is not None:
+            # Socket is held by another process - queue for the next batch
+            self._outbox.setdefault(session_id, []).append(frame)
+            self._outbox_ready.set()
+            return True
+        outbound_dropped.inc(lane=LANE_NAMES[lane], reason="not_connected")
+        return False
+
+    # Pub/sub loops
+
+    async def _flush_outbox(self):
+        while True:
+            await self._outbox_ready.wait()
+            # Give concurrent sends a moment to join the batch
+            await asyncio.sleep(WS_PUBSUB_BATCH_MS / 1000)
+            self._outbox_ready.clear()
+            outbox, self._outbox = self._outbox, {}
+
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for session_id, frames in outbox.items():
+                        for start in range(0, len(frames), WS_PUBSUB_BATCH_SIZE):
+                            batch = frames[start:start + WS_PUBSUB_BATCH_SIZE]
+                            pipe.publish(session_channel(session_id), encode_envelope(batch))
+                            published_batches.inc(source="api")
+                            published_frames.inc(len(batch), source="api")
+                    await pipe.execute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Pub/sub publish failed, dropped {sum(map(len, outbox.values()))} frames: {str(e)}")
+
+    async def _listen(self):
+        retry_delay = 1.0
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                retry_delay = 1.0
+                if message is None or message.get("type") != "message":
+                    continue
+
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                session_id = channel[len(CHANNEL_PREFIX):]
+                await self._forward(session_id, decode_envelope(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Pub/sub listener error, retrying in {retry_delay:.0f}s: {str(e)}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+
+    async def _forward(self, session_id: str, frames: List[Frame]):
+        if session_id not in self.queues:
+            forwarded_frames.inc(len(frames), outcome="not_connected")
+            return
+        for kind, data in frames:
+            if kind == "b":
+                queued = await self.send_bytes(session_id, data)
+            else:
+                queued = await self._deliver_text(session_id, data)
+            forwarded_frames.inc(outcome="queued" if queued else "dropped")
@@ -2,6 +2,7 @@ import openai
 import os
 from dotenv import load_dotenv
 from server.services.celery_app import celery_app
+from server.services.task_deadlines import retry_with_deadline
 
 load_dotenv()
 
@@ -78,4 +79,4 @@ def analyze_cognitive_assessment(self, session_id: str, transcript: str):
         }
         
     except Exception as exc:
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        raise retry_with_deadline(self, exc)
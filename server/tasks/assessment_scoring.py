@@ -0,0 +1,289 @@
+"""
+Incremental Assessment Scoring
+Scores each answer against its stage while the assessment is still running
+
+Every patient turn scores the answer to the question that was just asked and
+stores the result with the session (session_store.record_evidence). The
+per-domain score vector is derived from that evidence, so the final diagnosis
+and the report read a handful of scored items instead of the whole transcript.
+
+The objective items (orientation, recall, calculation, naming) are checked
+against the server clock and the scoring_lexicon index - no model calls.
+Uploaded transcripts go through the same scorers (score_transcript), checked
+against the time they were recorded; without one, the orientation items
+stay unscored rather than being judged against today's date.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+from server.tasks.dementia_assessment_flow import ASSESSMENT_STAGES, classify_response
+from server.tasks.scoring_lexicon import (
+    AMBIGUOUS_MONTHS,
+    MONTHS,
+    WEEKDAYS,
+    lexicon,
+    parse_numbers,
+    tokenize
+)
+
+# Domains that make up the score vector (introduction/social/conclusion are not scored)
+SCORED_DOMAINS = ("orientation", "memory", "attention", "language", "reasoning")
+
+# Animals scored as a full naming item
+NAMING_TARGET = 10
+# Operands of the calculation question, ignored when looking for the answer
+CALCULATION_OPERANDS = (10, 3)
+CALCULATION_ANSWER = 7
+
+REASONING_FULL = ("mail", "post", "postbox", "mailbox", "post office", "send it")
+REASONING_PARTIAL = ("return", "give it", "hand it", "police", "owner", "address")
+
+# Phrases that identify each scored question in a free-form transcript, for
+# reports on uploaded transcripts (delayed recall before immediate recall -
+# both mention the three words)
+QUESTION_CUES = (
+    (7, ("those three words", "words i asked you to remember", "words from earlier")),
+    (4, ("apple, table", "apple table", "three words")),
+    (1, ("day of the week", "what day is it")),
+    (2, ("today's date", "what is the date", "what's the date")),
+    (3, ("breakfast",)),
+    (5, ("how much money", "dollars", "minus", "subtract")),
+    (6, ("animals",)),
+    (8, ("envelope",))
+)
+ASSISTANT_SPEAKERS = ("assistant", "dr. smith", "dr smith", "doctor", "ai")
+SPEAKER_LINE = re.compile(r"^\s*([A-Za-z][A-Za-z. ]{0,20}):\s*(.*)$")
+
+
+def _score_weekday(answer: str, now: datetime) -> tuple:
+    today = now.weekday()
+    named = [WEEKDAYS.index(day) for day, _ in lexicon.scan(tokenize(answer), "weekday")]
+    if not named:
+        return 0, "did not name a day"
+    # Patients often correct themselves ("Tuesday? No, Wednesday") - the last day counts
+    day = named[-1]
+    if day == today:
+        return 2, f"named the correct day ({WEEKDAYS[today].title()})"
+    if (day - today) % 7 in (1, 6):
+        return 1, f"named a day one off from today ({WEEKDAYS[day].title()})"
+    return 0, f"named the wrong day ({WEEKDAYS[day].title()})"
+
+
+def _score_date(answer: str, now: datetime) -> tuple:
+    tokens = tokenize(answer)
+    numbers = parse_numbers(tokens)
+    number_positions = {position for _, position in numbers}
+
+    months = [
+        month for month, position in lexicon.scan(tokens, "month")
+        if month not in AMBIGUOUS_MONTHS or {position - 1, position + 1} & number_positions
+    ]
+    values = [value for value, _ in numbers]
+
+    found = []
+    if MONTHS[now.month - 1] in months or (not months and now.month in values and now.year in values):
+        found.append("month")
+    if now.year in values:
+        found.append("year")
+    if any(value != now.year and abs(value - now.day) <= 1 for value in values):
+        found.append("day")
+    if not found:
+        return 0, "could not give the date"
+    return len(found), f"correct {', '.join(found)}"
+
+
+def _score_recent_memory(answer: str, now: datetime) -> tuple:
+    if classify_response(answer) in ("unsure", "no_answer"):
+        return 0, "could not recall breakfast"
+    return 1, "described breakfast"
+
+
+def _score_recall(answer: str, now: datetime) -> tuple:
+    recalled = sorted({word for word, _ in lexicon.scan(tokenize(answer), "recall")})
+    return len(recalled), f"recalled {len(recalled)}/3 words" + (f" ({', '.join(recalled)})" if recalled else "")
+
+
+def _score_calculation(answer: str, now: datetime) -> tuple:
+    values = [value for value, _ in parse_numbers(tokenize(answer)) if value not in CALCULATION_OPERANDS]
+    if not values:
+        return 0, "did not give an amount"
+    # The last amount is the final answer after any self-correction
+    if values[-1] == CALCULATION_ANSWER:
+        return 1, "answered 10 - 3 correctly"
+    return 0, f"answered {values[-1]} for 10 - 3"
+
+
+def _score_naming(answer: str, now: datetime) -> tuple:
+    animals = {animal for animal, _ in lexicon.scan(tokenize(answer), "animal")}
+    return min(len(animals), NAMING_TARGET), f"named {len(animals)} animals"
+
+
+def _score_reasoning(answer: str, now: datetime) -> tuple:
+    text = answer.lower()
+    if any(phrase in text for phrase in REASONING_FULL):
+        return 2, "would post the envelope"
+    if any(phrase in text for phrase in REASONING_PARTIAL):
+        return 1, "reasonable but incomplete plan"
+    return 0, "no sensible plan for the envelope"
+
+
+# Items whose right answer depends on when the question was asked
+CLOCK_STAGES = {"orientation_time", "orientation_date"}
+
+# stage name -> (scorer, max points)
+STAGE_SCORERS = {
+    "orientation_time": (_score_weekday, 2),
+    "orientation_date": (_score_date, 3),
+    "memory_recent": (_score_recent_memory, 1),
+    "memory_recall": (_score_recall, 3),
+    "attention_calculation": (_score_calculation, 1),
+    "language_naming": (_score_naming, NAMING_TARGET),
+    "memory_delayed_recall": (_score_recall, 3),
+    "reasoning": (_score_reasoning, 2)
+}
+
+
+def score_answer(stage_number: int, answer: str, now: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Score one answer against the question of stage_number
+
+    Args:
+        stage_number: Stage whose question the patient was answering
+        answer: Final transcript of the answer
+        now: Clock for the orientation items (defaults to server time)
+
+    Returns:
+        dict: Evidence item (stage, domain, points, max_points, note), or None
+              for stages that are not scored
+    """
+    stage = ASSESSMENT_STAGES.get(stage_number)
+    if not stage or stage["stage"] not in STAGE_SCORERS:
+        return None
+
+    scorer, max_points = STAGE_SCORERS[stage["stage"]]
+    points, note = scorer(answer or "", now or datetime.now())
+    return {
+        "stage": stage_number,
+        "stage_name": stage["stage"],
+        "domain": stage["domain"],
+        "points": points,
+        "max_points": max_points,
+        "note": note
+    }
+
+
+def _asked_stage(text: str) -> Optional[int]:
+    # The question usually closes the turn, so the latest cue wins
+    text = text.lower()
+    asked, latest = None, -1
+    for stage_number, cues in QUESTION_CUES:
+        for cue in cues:
+            position = text.rfind(cue)
+            if position > latest:
+                asked, latest = stage_number, position
+    return asked
+
+
+def score_transcript(transcript: str, now: Optional[datetime] = None) -> Dict[int, dict]:
+    """
+    Score a "Speaker: text" transcript with the same local scorers as the live flow
+
+    Each patient turn is scored against the assessment question in the
+    doctor's turn before it; unrecognised questions are skipped.
+
+    Args:
+        transcript: The conversation, one "Speaker: text" line per turn
+        now: When the conversation took place. Without it the weekday and
+             date answers are not scored - today's date says nothing about
+             a transcript recorded on another day.
+
+    Returns:
+        dict: stage -> evidence item (the last answer to a question counts)
+    """
+    evidence = {}
+    asked = None
+    answer = []
+
+    def flush():
+        if asked is None or not answer:
+            return
+        if now is None and ASSESSMENT_STAGES[asked]["stage"] in CLOCK_STAGES:
+            # Undated transcript: orientation is left to the model
+            return
+        item = score_answer(asked, " ".join(answer), now)
+        if item:
+            evidence[asked] = item
+
+    for line in transcript.splitlines():
+        match = SPEAKER_LINE.match(line)
+        if not match:
+            if line.strip() and asked is not None:
+                answer.append(line.strip())
+            continue
+        speaker, text = match.group(1).strip().lower(), match.group(2)
+        if speaker in ASSISTANT_SPEAKERS:
+            flush()
+            asked, answer = _asked_stage(text), []
+        else:
+            answer.append(text)
+    flush()
+    return evidence
+
+
+def domain_scores(evidence: Dict[int, dict]) -> Dict[str, dict]:
+    """
+    Running per-domain score vector from the evidence gathered so far
+
+    Returns:
+        dict: domain -> {score (0-10, None until an item is scored), points, max_points, items}
+    """
+    scores = {domain: {"score": None, "points": 0, "max_points": 0, "items": 0} for domain in SCORED_DOMAINS}
+    for item in evidence.values():
+        domain = scores.get(item["domain"])
+        if domain is None:
+            continue
+        domain["points"] += item["points"]
+        domain["max_points"] += item["max_points"]
+        domain["items"] += 1
+
+    for domain in scores.values():
+        if domain["max_points"]:
+            domain["score"] = round(10 * domain["points"] / domain["max_points"], 1)
+    return scores
+
+
+def is_complete(scores: Dict[str, dict]) -> bool:
+    """True once every domain has at least one scored answer"""
+    return all(scores[domain]["items"] for domain in SCORED_DOMAINS)
+
+
+def risk_level(scores: Dict[str, dict]) -> str:
+    """Low / Medium / High from the average domain score (same bands as the report)"""
+    values = [domain["score"] for domain in scores.values() if domain["score"] is not None]
+    if not values:
+        return "Unknown"
+    average = sum(values) / len(values)
+    if average >= 8:
+        return "Low"
+    if average >= 6:
+        return "Medium"
+    return "High"
+
+
+def summarize_evidence(evidence: Dict[int, dict]) -> str:
+    """Compact text summary of the scored answers, one line per domain and item"""
+    scores = domain_scores(evidence)
+    lines = []
+    for name in SCORED_DOMAINS:
+        domain = scores[name]
+        if domain["score"] is None:
+            lines.append(f"- {name.title()}: not assessed")
+            continue
+        notes = "; ".join(
+            f"{item['stage_name']}: {item['note']}"
+            for _, item in sorted(evidence.items()) if item["domain"] == name
+        )
+        lines.append(f"- {name.title()}: {domain['score']}/10 ({notes})")
+    return "\n".join(lines)
@@ -1,11 +1,14 @@
-import asyncio
 import base64
 import io
+import json
+from celery import chain
 from deepgram import DeepgramClient, PrerecordedOptions, FileSource
 import openai
 import elevenlabs
-from server.services.websocket_manager import ConnectionManager
+from server.services.websocket_manager import publish_to_session
 from server.services.celery_app import celery_app
+from server.services.task_deadlines import retry_with_deadline
+from server.services.tracing import span
 import os
 from dotenv import load_dotenv
 
@@ -16,13 +19,46 @@ deepgram = DeepgramClient(os.getenv("DEEPGRAM_API_KEY"))
 openai.api_key = os.getenv("OPENAI_API_KEY")
 elevenlabs.set_api_key(os.getenv("ELEVENLABS_API_KEY"))
 
-# WebSocket manager
-manager = ConnectionManager()
+# A turn is a chain - each stage hands its result to the next as a message,
+# so no worker ever waits on another task. Stages are routed to their own
+# queues (celery_app task_routes) so STT, LLM and TTS slots can be sized apart.
+
+
+def audio_pipeline(session_id: str, audio_data):
+    """
+    Celery canvas for one patient turn: STT -> LLM -> TTS
+
+    Args:
+        session_id: Session whose socket receives each stage's result
+        audio_data: Recorded utterance (bytes, or base64 for the JSON serializer)
+
+    Returns:
+        celery.canvas.chain: Apply it, or replace a task with it
+    """
+    return chain(
+        transcribe_audio.s(session_id, audio_data),
+        respond_to_transcript.s(),
+        synthesize_reply.s()
+    )
+
 
 @celery_app.task(bind=True, max_retries=3)
-def process_audio(self, session_id: str, audio_data: bytes):
-    """Process audio through speech-to-text, AI analysis, and text-to-speech"""
+def process_audio(self, session_id: str, audio_data):
+    """
+    Process audio through speech-to-text, AI analysis, and text-to-speech
+    
+    Replaced by the stage chain: the caller's result is the last stage's
+    {"status", "transcript", "user_transcript", "words", "response", "delivered"}.
+    """
+    raise self.replace(audio_pipeline(session_id, audio_data))
+
+@celery_app.task(bind=True, max_retries=3)
+def transcribe_audio(self, session_id: str, audio_data):
+    """Pipeline stage 1: Deepgram speech-to-text; pushes the user transcript to the session"""
     try:
+        if isinstance(audio_data, str):
+            audio_data = base64.b64decode(audio_data)
+        
         # Step 1: Speech-to-Text with Deepgram
         audio_file = io.BytesIO(audio_data)
         payload: FileSource = {
@@ -36,35 +72,64 @@ def process_audio(self, session_id: str, audio_data: bytes):
             utterances=True
         )
         
-        response = deepgram.listen.prerecorded.v("1").transcribe_file(
-            payload, options
-        )
+        with span("stt"):
+            response = deepgram.listen.prerecorded.v("1").transcribe_file(
+                payload, options
+            )
         
         transcript = response.results.channels[0].alternatives[0].transcript
+        # Word timings feed the pause and latency markers (speech_timing)
+        words = [
+            {"word": word.word, "start": word.start, "end": word.end, "confidence": word.confidence}
+            for word in (response.results.channels[0].alternatives[0].words or [])
+        ]
         
-        # Step 2: Process AI response and wait for completion
-        ai_task = process_ai_response.delay(session_id, transcript)
-        ai_result = ai_task.get(timeout=30)
+        with span("send"):
+            publish_to_session(session_id, json.dumps({"type": "user_transcript", "text": transcript}))
         
         return {
-            "status": "success", 
+            "status": "success",
+            "session_id": session_id,
             "transcript": transcript,
             "user_transcript": transcript,
-            "response": ai_result.get("response", "")
+            "words": words
         }
         
     except Exception as exc:
-        # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        # Retry with jittered backoff while the deadline allows
+        raise retry_with_deadline(self, exc)
 
 @celery_app.task(bind=True, max_retries=3)
-def process_ai_response(self, session_id: str, transcript: str):
-    """Process transcript through GPT-4 and generate response using Dr. Smith personality"""
+def respond_to_transcript(self, turn: dict):
+    """Pipeline stage 2: Dr. Smith's reply to the transcript; pushes the reply text"""
     try:
-        # Import Doctor personality
-        from server.tasks.doctor_conversation import DOCTOR_SYSTEM_PROMPT
+        ai_response = doctor_reply(turn["transcript"])
         
-        # GPT-4 conversation with Dr. Smith personality for elderly care
+        with span("send"):
+            publish_to_session(turn["session_id"], json.dumps({"type": "ai_response", "text": ai_response}))
+        
+        return {**turn, "response": ai_response}
+        
+    except Exception as exc:
+        raise retry_with_deadline(self, exc)
+
+@celery_app.task(bind=True, max_retries=3)
+def synthesize_reply(self, turn: dict):
+    """Pipeline stage 3: ElevenLabs speech for the reply, sent to the session"""
+    try:
+        delivered = speak(turn["session_id"], turn["response"])
+        return {**turn, "delivered": delivered}
+        
+    except Exception as exc:
+        raise retry_with_deadline(self, exc)
+
+def doctor_reply(transcript: str) -> str:
+    """GPT-4 reply in the Dr. Smith personality"""
+    # Import Doctor personality
+    from server.tasks.doctor_conversation import DOCTOR_SYSTEM_PROMPT
+    
+    # GPT-4 conversation with Dr. Smith personality for elderly care
+    with span("llm"):
         response = openai.ChatCompletion.create(
             model="gpt-4",
             messages=[
@@ -80,36 +145,36 @@ def process_ai_response(self, session_id: str, transcript: str):
             max_tokens=150,  # Keep responses short for elderly patients
             temperature=0.7
         )
-        
-        ai_response = response.choices[0].message.content
-        
-        # Step 3: Convert to speech with elderly-friendly voice
-        generate_speech.delay(session_id, ai_response)
-        
-        return {
-            "status": "success", 
-            "response": ai_response,
-            "user_transcript": transcript
-        }
-        
-    except Exception as exc:
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+    
+    return response.choices[0].message.content
 
-@celery_app.task(bind=True, max_retries=3)
-def generate_speech(self, session_id: str, text: str):
-    """Convert text to speech using ElevenLabs"""
-    try:
-        # Generate speech using ElevenLabs
+def speak(session_id: str, text: str) -> bool:
+    """Render text with ElevenLabs and send the audio to the session's socket"""
+    # Generate speech using ElevenLabs
+    with span("tts"):
         audio = elevenlabs.generate(
             text=text,
             voice="Rachel",  # Warm, friendly voice
             model="eleven_monolingual_v1"
         )
-        
-        # Send audio to frontend
-        asyncio.create_task(manager.send_audio_response(audio, session_id))
-        
-        return {"status": "success"}
+    
+    # Send audio to frontend via whichever API process holds the socket
+    with span("send"):
+        receivers = publish_to_session(session_id, audio)
+    return receivers > 0
+
+@celery_app.task(bind=True, max_retries=3)
+def process_ai_response(self, session_id: str, transcript: str):
+    """Process transcript through GPT-4 and generate response using Dr. Smith personality"""
+    turn = {"status": "success", "session_id": session_id, "transcript": transcript, "user_transcript": transcript}
+    # Step 3 (speech) runs as its own stage instead of a fire-and-forget task
+    raise self.replace(chain(respond_to_transcript.s(turn), synthesize_reply.s()))
+
+@celery_app.task(bind=True, max_retries=3)
+def generate_speech(self, session_id: str, text: str):
+    """Convert text to speech using ElevenLabs"""
+    try:
+        return {"status": "success", "delivered": speak(session_id, text)}
         
     except Exception as exc:
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        raise retry_with_deadline(self, exc)
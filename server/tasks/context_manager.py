@@ -0,0 +1,212 @@
+"""
+Conversation Context Manager
+Bounded prompts: a rolling summary plus per-stage facts instead of an ever-growing history
+
+Each turn folds the messages that have left the recent window into a
+compact summary and records the patient's answer for the stage it belongs
+to. Prompts are then built from the system prompt, that context block and
+the most recent messages, trimmed to PROMPT_TOKEN_BUDGET - so a session's
+prompt size stays flat no matter how long it runs, and early answers are
+still in front of the model.
+
+The context is a plain dict so it can live in the session store.
+Token counts use tiktoken (cl100k_base, pinned in requirements.txt). If it
+cannot be loaded - not installed, or no network to fetch the encoding - a
+~4 characters per token heuristic is used and a warning is printed at
+startup, since budgets and prefix sizes are then only estimates.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception as e:
+    _ENCODING = None
+    print(
+        f"⚠️ tiktoken unavailable ({type(e).__name__}: {str(e)[:100]}) - token counts "
+        f"fall back to ~4 characters per token; prompt budgets and prefix sizes are estimates"
+    )
+
+load_dotenv()
+
+# Upper bound for every prompt built from the context (system prompt included)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2500"))
+# Messages kept verbatim after the context block
+RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "6"))
+# Size of the rolling summary; the oldest lines are dropped beyond it
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+# Length of one answer kept as a per-stage fact
+FACT_ANSWER_TOKENS = 40
+SUMMARY_LINE_TOKENS = 30
+
+# Chat format overhead per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text (tiktoken cl100k_base, or ~4 characters per token)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+def count_message_tokens(messages: List[dict]) -> int:
+    """Prompt tokens for a chat message list"""
+    return sum(count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens, marking the cut with an ellipsis"""
+    text = " ".join(text.split())
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text)[:max_tokens]).rstrip() + "..."
+    return text[:max_tokens * 4].rstrip() + "..."
+
+
+def new_context() -> dict:
+    return {"summary": [], "dropped": 0, "facts": {}, "folded": 0}
+
+
+def _summary_line(message: dict) -> str:
+    speaker = "Patient" if message.get("role") == "user" else "Dr. Smith"
+    return f"{speaker}: {truncate_tokens(message.get('content', ''), SUMMARY_LINE_TOKENS)}"
+
+
+def update_context(
+    context: Optional[dict],
+    history: List[dict],
+    answered_stage: Optional[int] = None,
+    stage_name: Optional[str] = None,
+    answer: Optional[str] = None,
+    note: Optional[str] = None,
+    recent_messages: int = RECENT_MESSAGES
+) -> dict:
+    """
+    Fold one turn into the context
+
+    Args:
+        context: Stored context (None for a new session)
+        history: Conversation so far, ending with the patient's answer
+        answered_stage: Stage whose question the answer belongs to
+        stage_name: Its name in ASSESSMENT_STAGES
+        answer: The patient's answer
+        note: Scorer finding for the answer (assessment_scoring), if any
+
+    Returns:
+        dict: The updated context (the same object when one was given)
+    """
+    context = context or new_context()
+
+    if answered_stage is not None and answer:
+        context["facts"][str(answered_stage)] = {
+            "stage": stage_name or str(answered_stage),
+            "answer": truncate_tokens(answer, FACT_ANSWER_TOKENS),
+            "note": note
+        }
+
+    # A reset history (new assessment) starts the summary over
+    if context["folded"] > len(history):
+        context.update(summary=[], dropped=0, folded=0)
+
+    # Messages leaving the verbatim window go into the summary, once each
+    fold_until = max(len(history) - recent_messages, 0)
+    for message in history[context["folded"]:fold_until]:
+        context["summary"].append(_summary_line(message))
+    context["folded"] = max(context["folded"], fold_until)
+
+    while context["summary"] and count_tokens("\n".join(context["summary"])) > SUMMARY_TOKEN_BUDGET:
+        context["summary"].pop(0)
+        context["dropped"] += 1
+
+    return context
+
+
+def render_context(context: Optional[dict]) -> str:
+    """The context block for a prompt (empty if there is nothing to add)"""
+    if not context:
+        return ""
+
+    sections = []
+    if context["facts"]:
+        lines = []
+        for stage_number, fact in sorted(context["facts"].items(), key=lambda item: int(item[0])):
+            finding = f" ({fact['note']})" if fact.get("note") else ""
+            lines.append(f"- {fact['stage']}: \"{fact['answer']}\"{finding}")
+        sections.append("ANSWERS SO FAR, BY STAGE:\n" + "\n".join(lines))
+    if context["summary"]:
+        header = "EARLIER IN THE CONVERSATION"
+        if context["dropped"]:
+            header += f" ({context['dropped']} older lines omitted)"
+        sections.append(header + ":\n" + "\n".join(context["summary"]))
+    return "\n\n".join(sections)
+
+
+def fit_to_budget(head: List[dict], recent: List[dict], tail: List[dict], budget: int = PROMPT_TOKEN_BUDGET) -> List[dict]:
+    """
+    Assemble head + recent + tail within budget
+
+    The oldest recent messages are dropped first; head and tail (system
+    prompt, context block, guidance) are always kept.
+    """
+    fixed = count_message_tokens(head) + count_message_tokens(tail)
+    kept = list(recent)
+    while kept and fixed + count_message_tokens(kept) > budget:
+        kept.pop(0)
+    return head + kept + tail
+
+
+def bounded_transcript(
+    messages: List[dict],
+    budget: int = PROMPT_TOKEN_BUDGET,
+    patient_label: str = "Patient",
+    doctor_label: str = "Dr. Smith"
+) -> str:
+    """
+    A transcript of messages that fits in budget tokens
+
+    The newest messages are kept verbatim; older ones are condensed to one
+    short line each, and the oldest condensed lines are dropped last of all.
+    """
+    def line(message: dict, max_tokens: Optional[int] = None) -> str:
+        speaker = patient_label if message.get("role") == "user" else doctor_label
+        content = message.get("content", "")
+        return f"{speaker}: {truncate_tokens(content, max_tokens) if max_tokens else content}"
+
+    verbatim: List[str] = []
+    used = 0
+    index = len(messages)
+    while index > 0:
+        candidate = line(messages[index - 1])
+        cost = count_tokens(candidate) + 1
+        if used + cost > budget * 3 // 4:
+            break
+        verbatim.insert(0, candidate)
+        used += cost
+        index -= 1
+
+    condensed: List[str] = []
+    while index > 0:
+        candidate = line(messages[index - 1], SUMMARY_LINE_TOKENS)
+        cost = count_tokens(candidate) + 1
+        if used + cost > budget:
+            break
+        condensed.insert(0, candidate)
+        used += cost
+        index -= 1
+
+    parts = []
+    if index:
+        parts.append(f"[{index} earlier messages omitted]")
+    if condensed:
+        parts.append("[Earlier conversation, condensed]")
+        parts += condensed
+        parts.append("[Most recent conversation]")
+    return "\n".join(parts + verbatim)
@@ -3,6 +3,8 @@ Structured Dementia Assessment Flow
 Dr. Smith actively guides the patient through assessment questions
 """
 
+from server.tasks.context_manager import RECENT_MESSAGES, fit_to_budget, render_context
+
 ASSESSMENT_STAGES = {
     0: {
         "stage": "greeting",
@@ -61,6 +63,9 @@ ASSESSMENT_STAGES = {
     }
 }
 
+# The answer at this stage ends the interview and leads to the diagnosis
+FINAL_STAGE = max(ASSESSMENT_STAGES)
+
 # Enhanced system prompt for active professional assessment
 ACTIVE_ASSESSMENT_PROMPT = """You are Dr. Smith, a professional and caring virtual interviewer conducting a systematic cognitive health assessment for elderly individuals.
 
@@ -106,6 +111,176 @@ CRITICAL REMINDERS:
 Remember: You are like a professional doctor conducting a bedside examination - caring, thorough, systematic, and professional throughout.
 """
 
+
+def _assessment_script():
+    lines = ["ASSESSMENT SCRIPT (stage number, domain, question):"]
+    for number, stage in sorted(ASSESSMENT_STAGES.items()):
+        lines.append(f"{number}. [{stage['domain']}] {stage['question']}")
+    return "\n".join(lines)
+
+
+# The first message of every assessment and diagnosis prompt. It must stay
+# byte-identical across turns and sessions - no names, dates, stage or
+# per-session state - so the provider can reuse its cached prefix; anything
+# that changes per turn goes in the last message instead.
+#
+# At its current size (the persona plus the stage script, under 1,000
+# tokens) the prefix is below PREFIX_CACHE_MIN_TOKENS, so the provider does
+# not cache it yet and usage reports no cached tokens. The layout is kept so
+# caching applies as soon as the fixed content outgrows the minimum.
+ASSESSMENT_PREFIX = ACTIVE_ASSESSMENT_PROMPT + "\n" + _assessment_script()
+
+# Providers only cache prompt prefixes of at least this many tokens
+PREFIX_CACHE_MIN_TOKENS = 1024
+
+# Fixed replies used when the LLM is unavailable or the patient could not be heard
+INTRODUCTION_FALLBACK = "I'm Dr. Smith, your AI doctor. I'll be asking you some questions to understand your cognitive health better. Please make sure you speak clearly into your microphone."
+DIAGNOSIS_FALLBACK = "Thank you for completing the assessment. Based on our conversation, I recommend scheduling a follow-up appointment with a healthcare professional to discuss your cognitive health in more detail."
+COMPLETION_MESSAGE = "Thank you for completing the assessment. I'll now analyze our conversation and prepare your cognitive health report."
+
+# Final turn prompt: Dr. Smith summarizes the whole assessment for the patient
+DIAGNOSIS_PROMPT = """Based on the assessment above, provide a brief dementia risk assessment as Dr. Smith speaking directly to the patient.
+
+Analyze their performance across:
+- Orientation (time, date awareness)
+- Memory (recent events, immediate and delayed recall)
+- Attention and calculation
+- Language and verbal fluency
+- Reasoning and judgment
+
+Provide a compassionate but clear assessment in this format:
+
+"Thank you for completing this assessment with me. Based on our conversation today, I observed [KEY FINDINGS - mention specific issues like memory problems, disorientation, difficulty with recall, etc.].
+
+Your cognitive status appears to be [NORMAL / MILD COGNITIVE IMPAIRMENT / MODERATE COGNITIVE DECLINE / SIGNIFICANT COGNITIVE CONCERNS].
+
+[If concerning signs detected]: I'm concerned about some signs that suggest possible dementia or significant cognitive decline. I strongly recommend that you visit a hospital or neurologist as soon as possible for a comprehensive evaluation and brain imaging.
+
+[If mild concerns]: I recommend scheduling a follow-up appointment with your doctor within the next 1-3 months to monitor your cognitive health.
+
+[If normal]: Your cognitive function appears to be within normal range. Continue with regular health check-ups and maintain a healthy lifestyle.
+
+[End with]: Is there anything you'd like to ask me about these findings?"
+
+Be direct, professional, and compassionate. If you detect signs of dementia, clearly state "you may have dementia" and urgently recommend hospital visit."""
+
+# Scored findings handed to the diagnosis instead of the full transcript
+DIAGNOSIS_FINDINGS_PROMPT = """FINDINGS SCORED DURING THIS ASSESSMENT (0-10 per domain, higher is better):
+{findings}
+
+Base your assessment on these findings. Only the end of the conversation is shown above."""
+
+# Messages of conversation tail kept alongside the findings
+DIAGNOSIS_TAIL_MESSAGES = 4
+
+# Template fast path: acknowledgements joined with the scripted question instead
+# of an LLM reply. Keyed by the local response class; the stage number picks a
+# variant so consecutive turns don't sound identical.
+ACKNOWLEDGEMENT_TEMPLATES = {
+    "answered": ["I see.", "Thank you.", "Alright, thank you.", "Okay."],
+    "short": ["Thank you.", "Okay, thank you."],
+    "unsure": [
+        "That's perfectly alright, there are no wrong answers here.",
+        "That's okay, don't worry about it."
+    ],
+    "repeat": ["Of course, let me ask that again."],
+    "no_answer": ["Take your time, there's no rush."]
+}
+
+# Response classes the templates cannot handle well - these still go to the LLM
+LLM_RESPONSE_CLASSES = {"distressed", "off_script"}
+
+DISTRESS_MARKERS = (
+    "scared", "afraid", "frightened", "help me", "pain", "hurt", "crying", "cry",
+    "upset", "lonely", "alone", "depressed", "can't breathe", "cannot breathe",
+    "chest", "want to die", "kill myself", "emergency", "fell", "fallen"
+)
+REPEAT_MARKERS = (
+    "repeat", "say that again", "say it again", "pardon", "didn't hear",
+    "didn't catch", "what was the question", "what do you mean", "come again"
+)
+UNSURE_MARKERS = (
+    "don't know", "dont know", "do not know", "not sure", "no idea",
+    "don't remember", "dont remember", "can't remember", "cannot remember",
+    "forgot", "forget"
+)
+
+# Answers longer than this are treated as the patient going off-script
+OFF_SCRIPT_WORDS = 40
+
+# Praise the scripted questions open with; dropped when a template
+# acknowledgement takes its place ("That's okay..." + "Excellent." reads badly)
+QUESTION_LEAD_INS = (
+    "Thank you for sharing that with me.", "That's good!", "Excellent.",
+    "Thank you.", "Very good!", "Great!", "Wonderful!", "That makes sense."
+)
+
+
+def strip_lead_in(question):
+    """Scripted question without its opening acknowledgement"""
+    for lead_in in QUESTION_LEAD_INS:
+        if question.startswith(lead_in + " "):
+            return question[len(lead_in):].strip()
+    return question
+
+
+def classify_response(patient_response):
+    """
+    Cheap local classification of a patient's answer (no model calls)
+    
+    Returns:
+        str: One of no_answer, repeat, unsure, short, answered (template-safe)
+             or distressed, off_script (handled by the LLM)
+    """
+    text = (patient_response or "").strip().lower()
+    words = text.split()
+    
+    if not words or len(text) <= 5:
+        return "no_answer"
+    if any(marker in text for marker in DISTRESS_MARKERS):
+        return "distressed"
+    if any(marker in text for marker in REPEAT_MARKERS):
+        return "repeat"
+    if any(marker in text for marker in UNSURE_MARKERS):
+        return "unsure"
+    if len(words) > OFF_SCRIPT_WORDS or (text.endswith("?") and len(words) > 3):
+        # Long monologues and questions back to Dr. Smith need a real reply
+        return "off_script"
+    if len(words) < 3:
+        return "short"
+    return "answered"
+
+
+def needs_llm(response_class):
+    """True if the answer should get a generated reply rather than a template"""
+    return response_class in LLM_RESPONSE_CLASSES
+
+
+def build_template_reply(response_class, current_stage, advance):
+    """
+    Acknowledgement + scripted question for the template fast path
+    
+    Args:
+        response_class: Result of classify_response
+        current_stage: Stage whose question comes next if the assessment advances
+        advance: Whether the answer moves the assessment on
+        
+    Returns:
+        tuple: (acknowledgement, question) - spoken as two separate sentences;
+               acknowledgement is empty when the question's own lead-in suffices
+    """
+    # Not advancing: ask again the question the patient was answering
+    stage = current_stage if advance else max(current_stage - 1, 0)
+    question = get_next_question(stage)["question"]
+    
+    stripped = strip_lead_in(question)
+    if response_class == "answered" and stripped != question:
+        return "", question
+    
+    variants = ACKNOWLEDGEMENT_TEMPLATES.get(response_class, ACKNOWLEDGEMENT_TEMPLATES["answered"])
+    return variants[current_stage % len(variants)], stripped
+
+
 def get_next_question(stage_number, patient_response=None):
     """
     Get the next assessment question based on current stage
@@ -121,7 +296,7 @@ def get_next_question(stage_number, patient_response=None):
     if stage_number >= len(ASSESSMENT_STAGES):
         return {
             "stage": "complete",
-            "question": "Thank you for completing the assessment. I'll now analyze our conversation and prepare your cognitive health report.",
+            "question": COMPLETION_MESSAGE,
             "domain": "complete",
             "is_final": True
         }
@@ -137,29 +312,72 @@ def get_next_question(stage_number, patient_response=None):
     }
 
 
-def build_assessment_context(conversation_history, current_stage):
-    """
-    Build conversation context for OpenAI including assessment progress
+def _prompt(conversation, instructions, context=None, prefix=ASSESSMENT_PREFIX):
     """
+    Stable prefix + conversation + one volatile system message, within budget
     
-    messages = [
-        {"role": "system", "content": ACTIVE_ASSESSMENT_PROMPT}
-    ]
+    The rolling context and per-turn instructions share the final message so
+    that everything before the conversation is cacheable.
+    """
+    volatile = [render_context(context), instructions]
+    tail = [{"role": "system", "content": "\n\n".join(part for part in volatile if part)}]
+    return fit_to_budget([{"role": "system", "content": prefix}], conversation, tail)
+
+
+def build_assessment_context(conversation_history, current_stage, question_follows=False, context=None, advance=True):
+    """
+    Build conversation context for OpenAI including assessment progress
     
-    # Add conversation history
-    for entry in conversation_history[-6:]:  # Last 6 messages for context
-        messages.append(entry)
+    Args:
+        conversation_history: Messages so far, ending with the patient's answer
+        current_stage: Stage whose question comes next if the assessment advances
+        question_follows: The stage question is spoken verbatim right after the
+            reply (prefetched audio), so only ask for a short acknowledgement
+        context: Rolling summary and per-stage answers (context_manager); the
+            prompt stays within PROMPT_TOKEN_BUDGET however long the session runs
+        advance: Whether the answer moves the assessment on; if not, the
+            question the patient was answering is asked again
+    """
     
     # Add assessment guidance
+    if not advance:
+        stage = max(current_stage - 1, 0)
+        stage_info = ASSESSMENT_STAGES.get(stage, {})
+        assessment_guidance = f"CURRENT ASSESSMENT STAGE: {stage}. {stage_info.get('domain', 'ongoing')}\nThe patient has not answered this question yet. Ask it again, more simply if they did not understand: {stage_info.get('question', '')}"
+        return _prompt(conversation_history[-RECENT_MESSAGES:], assessment_guidance, context)
+    
     stage_info = ASSESSMENT_STAGES.get(current_stage, {})
-    assessment_guidance = f"\n\nCURRENT ASSESSMENT STAGE: {stage_info.get('domain', 'ongoing')}\nYou should naturally transition to ask: {stage_info.get('question', '')}"
+    if question_follows:
+        assessment_guidance = f"CURRENT ASSESSMENT STAGE: {current_stage}. {stage_info.get('domain', 'ongoing')}\nAcknowledge the patient's answer in ONE short, warm sentence. Do NOT ask a question - your next line follows immediately, word for word: {stage_info.get('question', '')}"
+    else:
+        assessment_guidance = f"CURRENT ASSESSMENT STAGE: {current_stage}. {stage_info.get('domain', 'ongoing')}\nYou should naturally transition to ask: {stage_info.get('question', '')}"
     
-    messages.append({
-        "role": "system",
-        "content": assessment_guidance
-    })
+    # Recent messages verbatim, oldest dropped first if over budget
+    return _prompt(conversation_history[-RECENT_MESSAGES:], assessment_guidance, context)
+
+
+def build_diagnosis_context(conversation_history, findings=None, context=None):
+    """
+    Build the final diagnosis prompt
     
-    return messages
+    Args:
+        conversation_history: Messages so far, ending with the patient's last answer
+        findings: Per-domain summary scored turn by turn (assessment_scoring)
+        context: Rolling summary and per-stage answers (context_manager)
+    
+    Without findings the conversation is sent as context block plus recent
+    messages, still within PROMPT_TOKEN_BUDGET. Either way the prompt opens
+    with the same ASSESSMENT_PREFIX as every assessment turn.
+    """
+    if not findings:
+        if context is None:
+            return _prompt(conversation_history, DIAGNOSIS_PROMPT)
+        return _prompt(conversation_history[-RECENT_MESSAGES:], DIAGNOSIS_PROMPT, context)
+    
+    return _prompt(
+        conversation_history[-DIAGNOSIS_TAIL_MESSAGES:],
+        DIAGNOSIS_FINDINGS_PROMPT.format(findings=findings) + "\n\n" + DIAGNOSIS_PROMPT
+    )
 
 
 def should_advance_stage(patient_response, current_stage):
@@ -172,3 +390,17 @@ def should_advance_stage(patient_response, current_stage):
         return True
     return False
 
+
+def get_scripted_phrases():
+    """
+    Every fixed line Dr. Smith can speak, for pre-rendering TTS at deploy time
+    
+    Returns:
+        list: Unique phrases in script order
+    """
+    phrases = [stage["question"] for _, stage in sorted(ASSESSMENT_STAGES.items())]
+    phrases += [strip_lead_in(stage["question"]) for _, stage in sorted(ASSESSMENT_STAGES.items())]
+    phrases += [COMPLETION_MESSAGE, INTRODUCTION_FALLBACK, DIAGNOSIS_FALLBACK]
+    for variants in ACKNOWLEDGEMENT_TEMPLATES.values():
+        phrases += variants
+    return list(dict.fromkeys(phrases))
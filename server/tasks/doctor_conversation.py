@@ -7,7 +7,11 @@ import openai
 import os
 from dotenv import load_dotenv
 from server.services.celery_app import celery_app
+from server.services.task_deadlines import retry_with_deadline
+from server.services.tracing import span
 from typing import List, Dict
+from datetime import datetime
+from server.tasks.context_manager import fit_to_budget
 
 load_dotenv()
 
@@ -71,32 +75,27 @@ def generate_doctor_response(self, session_id: str, user_message: str, conversat
         dict: Response text and metadata
     """
     try:
-        # Build conversation history
-        messages = [{"role": "system", "content": DOCTOR_SYSTEM_PROMPT}]
-        
-        # Add conversation history if available
-        if conversation_history:
-            for msg in conversation_history[-10:]:  # Last 10 messages for context
-                messages.append({
-                    "role": msg.get("role", "user"),
-                    "content": msg.get("content", "")
-                })
-        
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        # Recent conversation history, oldest messages dropped if over the token budget
+        recent = [
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in (conversation_history or [])[-10:]  # Last 10 messages for context
+        ]
+        messages = fit_to_budget(
+            [{"role": "system", "content": DOCTOR_SYSTEM_PROMPT}],
+            recent,
+            [{"role": "user", "content": user_message}]
+        )
         
         # Generate response
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=messages,
-            max_tokens=150,  # Keep responses concise
-            temperature=0.7,  # Warm and natural
-            presence_penalty=0.6,  # Encourage diverse responses
-            frequency_penalty=0.3
-        )
+        with span("llm"):
+            response = openai.ChatCompletion.create(
+                model="gpt-4",
+                messages=messages,
+                max_tokens=150,  # Keep responses concise
+                temperature=0.7,  # Warm and natural
+                presence_penalty=0.6,  # Encourage diverse responses
+                frequency_penalty=0.3
+            )
         
         doctor_response = response.choices[0].message.content.strip()
         
@@ -104,19 +103,24 @@ def generate_doctor_response(self, session_id: str, user_message: str, conversat
             "status": "success",
             "session_id": session_id,
             "response": doctor_response,
+            "timestamp": datetime.now().isoformat(),
             "metadata": {
                 "tokens_used": response.usage.total_tokens,
+                "prompt_tokens": response.usage.prompt_tokens,
+                # Prompt tokens served from the provider's prefix cache (DOCTOR_SYSTEM_PROMPT leads every call)
+                "cached_tokens": (response.usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+                "completion_tokens": response.usage.completion_tokens,
                 "model": "gpt-4"
             }
         }
         
     except openai.error.RateLimitError:
-        # Handle rate limiting with retry
-        raise self.retry(exc=Exception("Rate limit reached"), countdown=30)
+        # Handle rate limiting with retry - at least a second, within the deadline
+        raise retry_with_deadline(self, Exception("Rate limit reached"), countdown=1)
     
     except Exception as exc:
         print(f"Error generating doctor response: {exc}")
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        raise retry_with_deadline(self, exc)
 
 
 @celery_app.task(bind=True)
@@ -205,7 +209,7 @@ def analyze_elderly_conversation(self, session_id: str, full_transcript: str):
         
     except Exception as exc:
         print(f"Error analyzing conversation: {exc}")
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        raise retry_with_deadline(self, exc)
 
 
 def get_conversation_starter_prompts():
@@ -0,0 +1,212 @@
+"""
+Linguistic Feature Extraction
+Vectorized speech markers over one transcript or thousands at once
+
+Counts the patient's words only. A batch is flattened into two integer
+arrays (document id, token id) and every marker is a NumPy reduction over
+them, so screening a cohort costs one tokenization pass plus a few
+bincounts - no model calls.
+
+Markers:
+- type_token_ratio: distinct words / words (low = reduced vocabulary)
+- filler_rate: "um", "uh", "er"... per word
+- self_correction_rate: "I mean", "no wait", "sorry"... per utterance
+- word_finding_rate: "what's the word", "thingy", "I can't think of"... per utterance
+- repetition_rate: immediately repeated words ("the the") per word
+- mean_utterance_length: words per patient turn
+"""
+
+import re
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from server.tasks.assessment_scoring import ASSISTANT_SPEAKERS, SPEAKER_LINE
+
+FEATURE_NAMES = (
+    "words",
+    "utterances",
+    "type_token_ratio",
+    "filler_rate",
+    "self_correction_rate",
+    "word_finding_rate",
+    "repetition_rate",
+    "mean_utterance_length"
+)
+
+FILLER_PHRASES = ("um", "uh", "er", "erm", "uhm", "hmm", "mm", "ah")
+SELF_CORRECTION_PHRASES = (
+    "i mean", "no wait", "no no", "sorry", "actually", "or rather", "let me rephrase",
+    "thats not right", "wait no", "i meant"
+)
+WORD_FINDING_PHRASES = (
+    "whats the word", "whats it called", "whatchamacallit", "thingy", "thingamajig",
+    "i cant think of", "on the tip of my tongue", "i forget the word", "you know the",
+    "what do you call", "that thing"
+)
+
+# Triage: a transcript whose marker score reaches this goes to the LLM analysis
+TRIAGE_THRESHOLD = 2.0
+# Each marker contributes (value - reference) / spread, clipped at zero;
+# references are typical values for healthy older adults in this interview
+TRIAGE_MARKERS = {
+    "type_token_ratio": (0.55, -0.1),
+    "filler_rate": (0.04, 0.03),
+    "self_correction_rate": (0.1, 0.15),
+    "word_finding_rate": (0.05, 0.1),
+    "repetition_rate": (0.01, 0.02),
+    "mean_utterance_length": (6.0, -2.5)
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def patient_utterances(transcript: str) -> List[str]:
+    """
+    Patient turns of a "Speaker: text" transcript
+
+    Transcripts without speaker labels are treated as patient speech only.
+    """
+    utterances = []
+    labelled = False
+    for line in transcript.splitlines():
+        match = SPEAKER_LINE.match(line)
+        if match:
+            labelled = True
+            if match.group(1).strip().lower() not in ASSISTANT_SPEAKERS:
+                utterances.append(match.group(2))
+        elif line.strip() and not labelled:
+            utterances.append(line)
+    return utterances
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower().replace("'", ""))
+
+
+class Vocabulary:
+    """Grows a word -> id map while tokenizing a batch"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def encode(self, words: Iterable[str]) -> List[int]:
+        ids = self.ids
+        return [ids.setdefault(word, len(ids)) for word in words]
+
+
+def _ngram_keys(tokens: np.ndarray, length: int, base: int) -> np.ndarray:
+    # Mixed-radix key of each window of `length` tokens, aligned to its first token
+    keys = tokens[:len(tokens) - length + 1].astype(np.int64)
+    for offset in range(1, length):
+        keys = keys * base + tokens[offset:len(tokens) - length + 1 + offset]
+    return keys
+
+
+def _phrase_counts(
+    tokens: np.ndarray,
+    docs: np.ndarray,
+    boundaries: np.ndarray,
+    vocabulary: Vocabulary,
+    phrases: Sequence[str],
+    n_docs: int
+) -> np.ndarray:
+    """Occurrences of any phrase per document (windows never span utterances)"""
+    counts = np.zeros(n_docs, dtype=np.float64)
+    base = len(vocabulary.ids) + 1
+    for length in sorted({len(phrase.split()) for phrase in phrases}):
+        if len(tokens) < length:
+            continue
+        phrase_ids = np.array(
+            [vocabulary.encode(phrase.split()) for phrase in phrases if len(phrase.split()) == length],
+            dtype=np.int64
+        )
+        phrase_keys = np.array([_ngram_keys(row, length, base)[0] for row in phrase_ids], dtype=np.int64)
+        windows = _ngram_keys(tokens, length, base)
+        # A window is valid if no utterance boundary falls inside it
+        valid = np.ones(len(windows), dtype=bool)
+        for offset in range(1, length):
+            valid &= boundaries[offset:len(tokens) - length + 1 + offset] == 0
+        hits = np.isin(windows, phrase_keys) & valid
+        counts += np.bincount(docs[:len(windows)][hits], minlength=n_docs)
+    return counts
+
+
+def extract_features_batch(transcripts: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Markers for many transcripts at once
+
+    Returns:
+        dict: feature name -> array with one value per transcript (see FEATURE_NAMES)
+    """
+    n_docs = len(transcripts)
+    vocabulary = Vocabulary()
+    # Phrase words get ids first so phrase keys never change mid-batch
+    for phrase in FILLER_PHRASES + SELF_CORRECTION_PHRASES + WORD_FINDING_PHRASES:
+        vocabulary.encode(phrase.split())
+
+    token_ids: List[int] = []
+    doc_ids: List[int] = []
+    starts: List[int] = []  # 1 where a new utterance begins
+    utterance_counts = np.zeros(n_docs, dtype=np.float64)
+
+    for doc, transcript in enumerate(transcripts):
+        for utterance in patient_utterances(transcript):
+            words = _words(utterance)
+            if not words:
+                continue
+            utterance_counts[doc] += 1
+            token_ids.extend(vocabulary.encode(words))
+            doc_ids.extend([doc] * len(words))
+            starts.extend([1] + [0] * (len(words) - 1))
+
+    tokens = np.array(token_ids, dtype=np.int64)
+    docs = np.array(doc_ids, dtype=np.int64)
+    boundaries = np.array(starts, dtype=np.int8)
+    base = len(vocabulary.ids) + 1
+
+    words = np.bincount(docs, minlength=n_docs).astype(np.float64)
+
+    # Distinct (document, word) pairs
+    distinct = np.bincount(np.unique(docs * base + tokens) // base, minlength=n_docs)
+
+    filler_ids = np.array([vocabulary.ids[word] for word in FILLER_PHRASES], dtype=np.int64)
+    fillers = np.bincount(docs[np.isin(tokens, filler_ids)], minlength=n_docs)
+
+    # "the the": same word twice in a row within one utterance (fillers excluded)
+    repeated = (tokens[1:] == tokens[:-1]) & (boundaries[1:] == 0) & ~np.isin(tokens[1:], filler_ids)
+    repetitions = np.bincount(docs[1:][repeated], minlength=n_docs)
+
+    corrections = _phrase_counts(tokens, docs, boundaries, vocabulary, SELF_CORRECTION_PHRASES, n_docs)
+    word_finding = _phrase_counts(tokens, docs, boundaries, vocabulary, WORD_FINDING_PHRASES, n_docs)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_word = lambda counts: np.where(words > 0, counts / words, 0.0)
+        per_utterance = lambda counts: np.where(utterance_counts > 0, counts / utterance_counts, 0.0)
+        return {
+            "words": words,
+            "utterances": utterance_counts,
+            "type_token_ratio": per_word(distinct),
+            "filler_rate": per_word(fillers),
+            "self_correction_rate": per_utterance(corrections),
+            "word_finding_rate": per_utterance(word_finding),
+            "repetition_rate": per_word(repetitions),
+            "mean_utterance_length": per_utterance(words)
+        }
+
+
+def triage_scores(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """Marker score per transcript - higher means more signs worth a closer look"""
+    score = np.zeros(len(features["words"]), dtype=np.float64)
+    for name, (reference, spread) in TRIAGE_MARKERS.items():
+        score += np.clip((features[name] - reference) / spread, 0, None)
+    # No speech to judge is itself a reason for review
+    return np.where(features["words"] > 0, score, TRIAGE_THRESHOLD)
+
+
+def extract_features(transcript: str) -> Dict[str, float]:
+    """Markers for a single transcript, rounded for reports"""
+    features = extract_features_batch([transcript])
+    values = {name: round(float(features[name][0]), 4) for name in FEATURE_NAMES}
+    values["triage_score"] = round(float(triage_scores(features)[0]), 3)
+    return values
@@ -0,0 +1,299 @@
+"""
+Scoring Lexicon
+Precomputed word index for the objective assessment items
+
+Maps spoken tokens to canonical terms (weekdays, months, the three recall
+words, animals) in one dict lookup. Tokens that miss the exact index fall
+back to a phonetic bucket (Soundex) and a bounded edit distance, so common
+STT slips ("wensday", "febuary", "elefant", "penney") still count. Longer
+slips that drop a consonant land in another bucket, so a miss there
+retries the terms of the category with the same first letter. Fuzzy
+results are memoised per token. Number words ("seven", "seventeenth",
+"twenty twenty six") are parsed into integers.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MONTHS = (
+    "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december"
+)
+RECALL_WORDS = ("apple", "table", "penny")
+ANIMALS = (
+    "dog", "cat", "horse", "cow", "pig", "sheep", "goat", "chicken", "duck", "goose",
+    "lion", "tiger", "bear", "wolf", "fox", "deer", "rabbit", "mouse", "rat", "squirrel",
+    "elephant", "giraffe", "zebra", "monkey", "gorilla", "kangaroo", "camel", "hippopotamus",
+    "rhinoceros", "bird", "eagle", "owl", "parrot", "fish", "shark", "whale", "dolphin",
+    "snake", "frog", "turtle", "donkey", "bull", "leopard", "cheetah", "panda", "bat",
+    "hamster", "ox", "mule", "llama", "alpaca", "buffalo", "bison", "moose", "elk",
+    "badger", "otter", "beaver", "hedgehog", "raccoon", "skunk", "possum", "chipmunk",
+    "crocodile", "alligator", "lizard", "tortoise", "penguin", "ostrich", "flamingo",
+    "peacock", "pigeon", "sparrow", "robin", "crow", "swan", "turkey", "hen", "rooster",
+    "seal", "walrus", "octopus", "squid", "crab", "lobster", "jellyfish", "salmon",
+    "bee", "ant", "spider", "butterfly", "worm", "snail", "ferret", "chimpanzee",
+    "orangutan", "jaguar", "panther", "cougar", "hyena", "koala", "lamb", "calf",
+    "pony", "puppy", "kitten", "canary", "goldfish", "guinea pig", "polar bear"
+)
+# Spoken shorthand and irregular plurals -> canonical animal
+ANIMAL_ALIASES = {
+    "hippo": "hippopotamus", "rhino": "rhinoceros", "chimp": "chimpanzee",
+    "mice": "mouse", "geese": "goose", "wolves": "wolf", "oxen": "ox",
+    "calves": "calf", "puppies": "puppy", "ponies": "pony", "kitty": "kitten",
+    "doggy": "dog", "horsey": "horse", "piggy": "pig", "bunny": "rabbit",
+    "cattle": "cow", "sheeps": "sheep", "fishes": "fish", "deers": "deer",
+    "opossum": "possum", "monkies": "monkey", "turkeys": "turkey"
+}
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19
+}
+TENS_WORDS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90
+}
+ORDINAL_WORDS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6,
+    "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11,
+    "twelfth": 12, "thirteenth": 13, "fourteenth": 14, "fifteenth": 15,
+    "sixteenth": 16, "seventeenth": 17, "eighteenth": 18, "nineteenth": 19,
+    "twentieth": 20, "thirtieth": 30
+}
+# Months that are also everyday words only count next to a number ("May 3rd")
+AMBIGUOUS_MONTHS = {"may", "march"}
+
+# Tokens shorter than this never fuzzy-match ("cat" must not become "bat")
+FUZZY_MIN_LENGTH = 4
+# Shorter tokens only match within their phonetic bucket ("from" is not "frog")
+FUZZY_WIDE_MIN_LENGTH = 7
+# Everyday words one edit away from a vocabulary term ("dear" -> deer, "bell" -> bull)
+FUZZY_STOPWORDS = {
+    "dear", "bell", "sell", "well", "warm", "tail", "tale", "able", "maybe", "mark",
+    "match", "marsh", "june", "just", "july", "mayo", "apply", "penne", "tablet",
+    "cable", "hears", "heard", "herd", "pigs", "foxy", "crown", "crowd", "aunt"
+}
+
+TOKEN_PATTERN = re.compile(r"\d+(?:st|nd|rd|th)?|[a-z]+")
+ORDINAL_SUFFIX = re.compile(r"(?<=\d)(st|nd|rd|th)$")
+# Leading halves of spoken years ("nineteen fifty", "twenty twenty six")
+CENTURY_WORDS = {"nineteen": 19, "twenty": 20}
+
+SOUNDEX_CODES = {}
+for letters, code in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+    for letter in letters:
+        SOUNDEX_CODES[letter] = code
+
+
+def soundex(word: str) -> str:
+    """Four-character Soundex code (phonetic bucket for fuzzy matching)"""
+    if not word:
+        return ""
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], "")
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance with adjacent transpositions ("tabel" -> "table" is 1),
+    giving up (returning limit + 1) once it exceeds limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _plurals(word: str) -> List[str]:
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return [word[:-1] + "ies"]
+    if word.endswith(("s", "x", "ch", "sh")):
+        return [word + "es"]
+    return [word + "s"]
+
+
+class Lexicon:
+    """Exact + phonetic index over the scoring vocabulary"""
+
+    def __init__(self):
+        # token (or "two words") -> (category, canonical)
+        self.exact: Dict[str, Tuple[str, str]] = {}
+        # (category, soundex code) -> [(term, canonical)] for fuzzy lookups
+        self.phonetic: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        # (category, first letter) -> [(term, canonical)] when the bucket misses
+        self.initials: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+        for day in WEEKDAYS:
+            self._add(day, "weekday", day)
+        for month in MONTHS:
+            self._add(month, "month", month)
+        for word in RECALL_WORDS:
+            self._add(word, "recall", word)
+            for plural in _plurals(word):
+                self._add(plural, "recall", word, fuzzy=False)
+        for animal in ANIMALS:
+            self._add(animal, "animal", animal)
+            for plural in _plurals(animal.split()[-1]):
+                self._add(" ".join(animal.split()[:-1] + [plural]), "animal", animal, fuzzy=False)
+        for alias, animal in ANIMAL_ALIASES.items():
+            self._add(alias, "animal", animal)
+
+    def _add(self, term: str, category: str, canonical: str, fuzzy: bool = True):
+        self.exact.setdefault(term, (category, canonical))
+        if fuzzy and " " not in term and len(term) >= FUZZY_MIN_LENGTH:
+            self.phonetic.setdefault((category, soundex(term)), []).append((term, canonical))
+            self.initials.setdefault((category, term[0]), []).append((term, canonical))
+
+    def lookup(self, token: str, category: str) -> Optional[str]:
+        """Canonical term of category for one token, exact first, then fuzzy"""
+        match = self.exact.get(token)
+        if match is None and token.endswith("s"):
+            # Regular plurals the index does not spell out ("ponys", "gooses")
+            match = self.exact.get(token[:-1])
+        if match is not None:
+            return match[1] if match[0] == category else None
+        if len(token) < FUZZY_MIN_LENGTH or token in FUZZY_STOPWORDS or token[0].isdigit():
+            return None
+        canonical = self._fuzzy(token, category)
+        if canonical is None and token.endswith("s") and len(token) > FUZZY_MIN_LENGTH:
+            canonical = self._fuzzy(token[:-1], category)
+        return canonical
+
+    @lru_cache(maxsize=16384)
+    def _fuzzy(self, token: str, category: str) -> Optional[str]:
+        best = self._closest(token, self.phonetic.get((category, soundex(token)), ()))
+        if best is None and len(token) >= FUZZY_WIDE_MIN_LENGTH:
+            best = self._closest(token, self.initials.get((category, token[0]), ()))
+        return best
+
+    @staticmethod
+    def _closest(token: str, candidates) -> Optional[str]:
+        limit = 1 if len(token) < 7 else 2
+        best = None
+        best_distance = limit + 1
+        for term, canonical in candidates:
+            if term[0] != token[0]:
+                continue
+            distance = edit_distance(token, term, limit)
+            if distance < best_distance:
+                best, best_distance = canonical, distance
+        return best
+
+    def scan(self, tokens: List[str], category: str) -> List[Tuple[str, int]]:
+        """
+        Every term of category in a token list, two-word terms first
+
+        Returns:
+            list: (canonical, token index) in spoken order
+        """
+        hits = []
+        index = 0
+        while index < len(tokens):
+            if index + 1 < len(tokens):
+                pair = self.exact.get(f"{tokens[index]} {tokens[index + 1]}")
+                if pair is not None and pair[0] == category:
+                    hits.append((pair[1], index))
+                    index += 2
+                    continue
+            canonical = self.lookup(tokens[index], category)
+            if canonical is not None:
+                hits.append((canonical, index))
+            index += 1
+        return hits
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and digit tokens ("$7" -> "7", "Oct. 17th" -> "oct", "17th")"""
+    return TOKEN_PATTERN.findall(text.lower().replace("-", " ").replace("'", ""))
+
+
+def parse_numbers(tokens: List[str]) -> List[Tuple[int, int]]:
+    """
+    Integers spoken in a token list
+
+    Handles digits, ordinals, compound number words ("twenty one") and
+    spoken years ("twenty twenty six", "two thousand twenty six").
+
+    Returns:
+        list: (value, token index) in spoken order
+    """
+    numbers = []
+    index = 0
+    while index < len(tokens):
+        start = index
+        value = _small_number(tokens, index)
+        if value is None:
+            index += 1
+            continue
+        number, index = value
+
+        # "two thousand (and) twenty six"
+        if index < len(tokens) and tokens[index] == "thousand":
+            index += 1
+            if index < len(tokens) and tokens[index] == "and":
+                index += 1
+            rest = _small_number(tokens, index)
+            number *= 1000
+            if rest is not None:
+                number += rest[0]
+                index = rest[1]
+        # "twenty twenty six" / "nineteen fifty"
+        elif tokens[start] in CENTURY_WORDS and index == start + 1 and index < len(tokens):
+            rest = _small_number(tokens, index)
+            if rest is not None and 10 <= rest[0] <= 99 and not tokens[index][0].isdigit():
+                number = CENTURY_WORDS[tokens[start]] * 100 + rest[0]
+                index = rest[1]
+        numbers.append((number, start))
+    return numbers
+
+
+def _small_number(tokens: List[str], index: int) -> Optional[Tuple[int, int]]:
+    token = tokens[index]
+    if token[0].isdigit():
+        return int(ORDINAL_SUFFIX.sub("", token)), index + 1
+    if token in ORDINAL_WORDS:
+        return ORDINAL_WORDS[token], index + 1
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token], index + 1
+    if token in TENS_WORDS:
+        value = TENS_WORDS[token]
+        if index + 1 < len(tokens):
+            following = tokens[index + 1]
+            unit = NUMBER_WORDS.get(following)
+            if unit is None:
+                unit = ORDINAL_WORDS.get(following)
+            if unit is not None and 0 < unit < 10:
+                return value + unit, index + 2
+        return value, index + 1
+    return None
+
+
+lexicon = Lexicon()
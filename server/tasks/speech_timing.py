@@ -0,0 +1,162 @@
+"""
+Speech Timing Features
+Word timings and confidences from STT, packed per session, and the pause markers derived from them
+
+Each recognised word is one 14-byte record (stage, start, end, confidence,
+flags). Times are seconds from the moment Dr. Smith finished asking the
+question, so the first word of an answer carries the response latency.
+Answers are appended to the session store as packed bytes and read back
+as one NumPy structured array - no per-word objects are kept.
+
+Deepgram already returns these timings with every transcript, so none of
+this costs an extra API call.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from server.tasks.dementia_assessment_flow import ASSESSMENT_STAGES
+
+WORD_DTYPE = np.dtype([
+    ("stage", "u1"),
+    ("start", "<f4"),
+    ("end", "<f4"),
+    ("confidence", "<f4"),
+    ("flags", "u1")
+])
+
+FLAG_UTTERANCE_START = 1
+FLAG_FILLER = 2
+# Dr. Smith's speech end was not known (cut off, or no audio) - no latency
+FLAG_NO_LATENCY = 4
+
+# Deepgram returns these when asked for filler_words=true
+FILLER_WORDS = {"um", "uh", "uhm", "umm", "er", "erm", "hmm", "mm", "ah"}
+
+# Gaps between words shorter than this are ordinary articulation
+PAUSE_MIN_SECONDS = 0.25
+# Pauses this long count as hesitations
+LONG_PAUSE_SECONDS = 1.0
+
+
+def pack_words(stage: int, words: List[dict], offset: Optional[float]) -> bytes:
+    """
+    Pack one answer's STT words into timeline records
+
+    Args:
+        stage: Stage whose question was being answered
+        words: Deepgram word objects (word, start, end, confidence), times
+            relative to the start of the answer's audio
+        offset: Seconds from the end of the question to the start of the
+            answer's audio, or None if unknown
+
+    Returns:
+        bytes: len(words) records of WORD_DTYPE
+    """
+    records = np.zeros(len(words), dtype=WORD_DTYPE)
+    if not words:
+        return records.tobytes()
+
+    shift = offset if offset is not None else 0.0
+    records["stage"] = stage
+    records["start"] = [word.get("start", 0.0) + shift for word in words]
+    records["end"] = [word.get("end", 0.0) + shift for word in words]
+    records["confidence"] = [word.get("confidence", 0.0) for word in words]
+    records["flags"] = [
+        FLAG_FILLER if word.get("word", "").lower().strip(".,?!") in FILLER_WORDS else 0
+        for word in words
+    ]
+    records["flags"][0] |= FLAG_UTTERANCE_START
+    if offset is None:
+        records["flags"] |= FLAG_NO_LATENCY
+    return records.tobytes()
+
+
+def unpack_words(blob: bytes) -> np.ndarray:
+    """Timeline records from packed bytes (a view, not a copy)"""
+    usable = len(blob) - len(blob) % WORD_DTYPE.itemsize
+    return np.frombuffer(blob[:usable], dtype=WORD_DTYPE)
+
+
+def _distribution(values: np.ndarray) -> dict:
+    if not len(values):
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "max": None}
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "max": round(float(values.max()), 3)
+    }
+
+
+def timing_features(records: np.ndarray) -> Optional[Dict[str, object]]:
+    """
+    Speech rate, pauses, response latency and hesitations from a session timeline
+
+    Returns:
+        dict: Session-wide markers plus a per_stage breakdown, or None without words
+    """
+    if not len(records):
+        return None
+
+    starts = records["start"].astype(np.float64)
+    ends = records["end"].astype(np.float64)
+    flags = records["flags"]
+    stages = records["stage"]
+
+    utterance_start = (flags & FLAG_UTTERANCE_START) > 0
+    utterance_ids = np.cumsum(utterance_start) - 1
+    n_utterances = int(utterance_ids[-1]) + 1
+
+    # Speaking time per answer: first word start to last word end
+    first_start = np.full(n_utterances, np.inf)
+    last_end = np.full(n_utterances, -np.inf)
+    np.minimum.at(first_start, utterance_ids, starts)
+    np.maximum.at(last_end, utterance_ids, ends)
+    speaking_seconds = float(np.clip(last_end - first_start, 0, None).sum())
+
+    # Pauses between consecutive words of the same answer
+    gaps = starts[1:] - ends[:-1]
+    within = ~utterance_start[1:]
+    pause_mask = within & (gaps >= PAUSE_MIN_SECONDS)
+    long_pause_mask = within & (gaps >= LONG_PAUSE_SECONDS)
+    pauses = gaps[pause_mask]
+
+    # Response latency: first word of each answer, if the question end was known
+    first_words = np.flatnonzero(utterance_start)
+    known = (flags[first_words] & FLAG_NO_LATENCY) == 0
+    latencies = np.clip(starts[first_words][known], 0, None)
+
+    fillers = (flags & FLAG_FILLER) > 0
+    # A long pause is attributed to the answer (stage) of the word after it
+    hesitations = fillers.astype(np.int64)
+    hesitations[1:] += long_pause_mask
+
+    per_stage = {}
+    for stage in np.unique(stages):
+        in_stage = stages == stage
+        stage_first = first_words[stages[first_words] == stage]
+        stage_known = stage_first[(flags[stage_first] & FLAG_NO_LATENCY) == 0]
+        name = ASSESSMENT_STAGES.get(int(stage), {}).get("stage", str(int(stage)))
+        per_stage[name] = {
+            "words": int(in_stage.sum()),
+            "response_latency_seconds": round(float(np.clip(starts[stage_known], 0, None).mean()), 3) if len(stage_known) else None,
+            "hesitations": int(hesitations[in_stage].sum()),
+            "fillers": int(fillers[in_stage].sum()),
+            "long_pauses": int(long_pause_mask[in_stage[1:]].sum())
+        }
+
+    return {
+        "words": int(len(records)),
+        "answers": n_utterances,
+        "speech_rate_wpm": round(60 * int((~fillers).sum()) / speaking_seconds, 1) if speaking_seconds > 0 else None,
+        "mean_confidence": round(float(records["confidence"].mean()), 3),
+        "pauses_seconds": _distribution(pauses),
+        "long_pauses": int(long_pause_mask.sum()),
+        "fillers": int(fillers.sum()),
+        "hesitations": int(hesitations.sum()),
+        "response_latency_seconds": _distribution(latencies),
+        "per_stage": per_stage
+    }
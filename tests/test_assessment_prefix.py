@@ -0,0 +1,28 @@
+from server.tasks.dementia_assessment_flow import (
+    ASSESSMENT_PREFIX,
+    build_assessment_context,
+    build_diagnosis_context
+)
+
+
+def test_every_prompt_opens_with_the_prefix():
+    history = [
+        {"role": "assistant", "content": "Can you tell me what day of the week it is today?"},
+        {"role": "user", "content": "I think it's Tuesday."}
+    ]
+    prompts = [
+        build_assessment_context(history, 2),
+        build_assessment_context(history, 2, question_follows=True),
+        build_assessment_context(history, 2, advance=False),
+        build_diagnosis_context(history)
+    ]
+    for messages in prompts:
+        assert messages[0] == {"role": "system", "content": ASSESSMENT_PREFIX}
+
+
+def test_prefix_has_no_per_session_state():
+    # Byte-identical across turns and sessions, or no two calls share a prefix
+    assert "{" not in ASSESSMENT_PREFIX
+    first = build_assessment_context([{"role": "user", "content": "Hello"}], 1)[0]
+    later = build_assessment_context([{"role": "user", "content": "Seven dollars."}], 6)[0]
+    assert first == later
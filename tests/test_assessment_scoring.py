@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from server.tasks.assessment_scoring import (
+    SCORED_DOMAINS,
+    domain_scores,
+    is_complete,
+    risk_level,
+    score_answer,
+    score_transcript,
+    summarize_evidence
+)
+
+# A Tuesday
+NOW = datetime(2026, 10, 20, 10, 0)
+
+
+def points(stage, answer):
+    return score_answer(stage, answer, NOW)["points"]
+
+
+def test_weekday_is_scored_on_the_last_day_named():
+    assert points(1, "It's Tuesday") == 2
+    assert points(1, "Monday I think") == 1
+    assert points(1, "Friday? No, Tuesday") == 2
+    assert points(1, "I don't know") == 0
+
+
+def test_date_counts_month_year_and_day():
+    assert points(2, "October the twentieth, twenty twenty six") == 3
+    assert points(2, "It's October") == 1
+    assert points(2, "May be the nineteenth") == 1
+
+
+def test_recall_counts_each_word_once():
+    assert points(4, "Apple, table, penny") == 3
+    assert points(7, "apple, um, apple and a tabel") == 2
+    assert points(7, "I can't remember") == 0
+
+
+def test_calculation_uses_the_final_amount():
+    assert points(5, "Seven dollars") == 1
+    assert points(5, "Eight... no, seven") == 1
+    assert points(5, "Ten minus three is six") == 0
+
+
+def test_naming_and_reasoning():
+    assert points(6, "Dog, cat, horse, cow, dogs") == 4
+    assert points(8, "I'd post it in the mailbox") == 2
+    assert points(8, "Give it to the police") == 1
+
+
+def test_unscored_stages():
+    assert score_answer(0, "Hello, I'm Margaret", NOW) is None
+    assert score_answer(9, "I live with my daughter", NOW) is None
+
+
+def test_domain_scores_risk_and_completeness():
+    evidence = {
+        stage: score_answer(stage, answer, NOW)
+        for stage, answer in (
+            (1, "Tuesday"),
+            (2, "October 20th 2026"),
+            (4, "apple table penny"),
+            (5, "seven"),
+            (6, "dog cat horse cow sheep lion tiger bear wolf fox"),
+            (8, "post it")
+        )
+    }
+    scores = domain_scores(evidence)
+    assert scores["orientation"]["score"] == 10.0
+    assert scores["language"]["score"] == 10.0
+    assert is_complete(scores)
+    assert risk_level(scores) == "Low"
+    assert "Orientation: 10.0/10" in summarize_evidence(evidence)
+
+    empty = domain_scores({})
+    assert set(empty) == set(SCORED_DOMAINS)
+    assert not is_complete(empty)
+    assert risk_level(empty) == "Unknown"
+
+
+def test_risk_bands():
+    poor = domain_scores({5: score_answer(5, "nine", NOW), 1: score_answer(1, "Saturday", NOW)})
+    assert risk_level(poor) == "High"
+
+
+def test_score_transcript_matches_answers_to_questions():
+    transcript = "\n".join([
+        "Dr. Smith: Can you tell me what day of the week it is today?",
+        "Patient: Tuesday.",
+        "Dr. Smith: If you have 10 dollars and you spend 3 dollars, how much money do you have left?",
+        "Patient: Eight.",
+        "Patient: No wait, seven.",
+        "Dr. Smith: How has your week been?",
+        "Patient: Lovely, thank you."
+    ])
+    evidence = score_transcript(transcript, NOW)
+    assert sorted(evidence) == [1, 5]
+    assert evidence[1]["points"] == 2
+    assert evidence[5]["points"] == 1
+
+
+ORIENTATION_TRANSCRIPT = "\n".join([
+    "Dr. Smith: Can you tell me what day of the week it is today?",
+    "Patient: Wednesday.",
+    "Dr. Smith: And what is today's date?",
+    "Patient: March the 3rd, 2024.",
+    "Dr. Smith: What would you do if you found a stamped, addressed envelope?",
+    "Patient: Post it."
+])
+
+
+def test_score_transcript_checks_orientation_against_the_recording_date():
+    evidence = score_transcript(ORIENTATION_TRANSCRIPT, datetime(2024, 3, 6, 9, 0))
+    assert evidence[1]["points"] == 2
+    assert evidence[2]["points"] == 2
+
+
+def test_score_transcript_leaves_orientation_unscored_without_a_date():
+    evidence = score_transcript(ORIENTATION_TRANSCRIPT)
+    assert sorted(evidence) == [8]
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from server.services.audio_stream import (
+    FRAME_CHUNK,
+    FRAME_END,
+    FRAME_HEADER,
+    FRAME_START,
+    BinaryAudioTransport,
+    JsonAudioTransport,
+    decode_frame,
+    encode_frame
+)
+from server.services.speech_pipeline import SpeechPipeline
+
+
+@pytest.mark.parametrize("kind, stream_id, sequence, payload", [
+    (FRAME_START, 1, 0, b'{"mime": "audio/mpeg"}'),
+    (FRAME_CHUNK, 7, 3, b"\xff\xfb\x90\x00" * 100),
+    (FRAME_END, 2 ** 32 - 1, 12, b"")
+])
+def test_frame_round_trip(kind, stream_id, sequence, payload):
+    frame = encode_frame(kind, stream_id, sequence, payload)
+    assert len(frame) == FRAME_HEADER.size + len(payload)
+    assert decode_frame(frame) == (kind, stream_id, sequence, payload)
+
+
+def test_frame_header_is_network_byte_order():
+    assert encode_frame(FRAME_CHUNK, 1, 2) == b"\x02\x00\x00\x00\x01\x00\x00\x00\x02"
+
+
+async def fake_synthesize(text):
+    # Later sentences finish rendering first - delivery must stay in order
+    await asyncio.sleep(0.01 if text.startswith("First") else 0)
+    for index in range(2):
+        yield f"{text[:5]}{index}".encode()
+
+
+def test_binary_transport_streams_sentences_in_order():
+    frames = []
+
+    async def send_bytes(frame):
+        frames.append(decode_frame(frame))
+
+    async def run():
+        speech = SpeechPipeline(fake_synthesize, BinaryAudioTransport(send_bytes))
+        speech.add_sentence("First sentence.")
+        speech.add_sentence("Second sentence.")
+        return await speech.finish()
+
+    assert asyncio.run(run()) == 2
+    kinds = [kind for kind, _, _, _ in frames]
+    assert kinds == [FRAME_START, FRAME_CHUNK, FRAME_CHUNK, FRAME_CHUNK, FRAME_CHUNK, FRAME_END]
+    assert [payload for kind, _, _, payload in frames if kind == FRAME_CHUNK] == [
+        b"First0", b"First1", b"Secon0", b"Secon1"
+    ]
+    assert [sequence for kind, _, sequence, _ in frames if kind == FRAME_CHUNK] == [0, 1, 2, 3]
+    assert frames[-1][2] == 4
+
+
+def test_json_transport_sends_one_ai_audio_per_reply():
+    messages = []
+
+    async def send_text(text):
+        messages.append(json.loads(text))
+
+    async def run():
+        speech = SpeechPipeline(fake_synthesize, JsonAudioTransport(send_text))
+        speech.add_sentence("First sentence.")
+        speech.add_audio(b"prefetched question")
+        await speech.finish()
+        return speech
+
+    speech = asyncio.run(run())
+    assert [message["type"] for message in messages] == ["ai_audio"]
+    assert speech.audio_bytes_sent == len(b"First0First1prefetched question")
+    assert speech.first_audio_at is not None
@@ -0,0 +1,48 @@
+import pytest
+
+from server.services.metrics import Histogram, MetricsRegistry
+
+
+def test_quantile_without_observations():
+    histogram = Histogram("latency_seconds", "test", buckets=(0.1, 0.5, 1.0))
+    assert histogram.quantile(0.5) is None
+    histogram.observe(0.2, stage="a")
+    assert histogram.quantile(0.5, stage="b") is None
+
+
+def test_quantile_interpolates_within_the_bucket():
+    histogram = Histogram("latency_seconds", "test", buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.05, 0.3, 0.3, 0.3, 0.3, 0.7, 0.7, 0.7, 0.7):
+        histogram.observe(value)
+    # Ranks 0-2 in (0, 0.1], 2-6 in (0.1, 0.5], 6-10 in (0.5, 1.0]
+    assert histogram.quantile(0.1) == pytest.approx(0.05)
+    assert histogram.quantile(0.4) == pytest.approx(0.3)
+    assert histogram.quantile(0.8) == pytest.approx(0.75)
+    assert histogram.quantile(1.0) == pytest.approx(1.0)
+
+
+def test_quantile_beyond_the_last_bucket_is_capped():
+    histogram = Histogram("latency_seconds", "test", buckets=(0.1, 0.5, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(30.0)
+    assert histogram.quantile(0.99) == 1.0
+
+
+def test_quantile_is_per_label_set():
+    histogram = Histogram("latency_seconds", "test", buckets=(0.1, 0.5, 1.0))
+    histogram.observe(0.05, stage="greeting")
+    histogram.observe(0.9, stage="diagnosis")
+    assert histogram.quantile(0.5, stage="greeting") <= 0.1
+    assert histogram.quantile(0.5, stage="diagnosis") > 0.5
+
+
+def test_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Turn latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{stage="a"} 2' in text
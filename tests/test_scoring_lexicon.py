@@ -0,0 +1,62 @@
+import pytest
+
+from server.tasks.scoring_lexicon import edit_distance, lexicon, parse_numbers, soundex, tokenize
+
+
+def test_tokenize_splits_digits_and_drops_punctuation():
+    assert tokenize("It's Oct. 17th - $7, twenty-one") == ["its", "oct", "17th", "7", "twenty", "one"]
+
+
+@pytest.mark.parametrize("token, category, expected", [
+    ("tuesday", "weekday", "tuesday"),
+    ("wensday", "weekday", "wednesday"),
+    ("febuary", "month", "february"),
+    ("penney", "recall", "penny"),
+    ("tabel", "recall", "table"),
+    ("apples", "recall", "apple"),
+    ("elefant", "animal", "elephant"),
+    ("geese", "animal", "goose"),
+    ("hippos", "animal", "hippopotamus"),
+    ("horses", "animal", "horse")
+])
+def test_lookup_matches_exact_plural_and_misheard_terms(token, category, expected):
+    assert lexicon.lookup(token, category) == expected
+
+
+@pytest.mark.parametrize("token, category", [
+    ("table", "animal"),
+    ("from", "animal"),
+    ("money", "animal"),
+    ("today", "weekday"),
+    ("people", "recall"),
+    # Too short to fuzzy-match "bat"
+    ("bap", "animal")
+])
+def test_lookup_rejects_everyday_words(token, category):
+    assert lexicon.lookup(token, category) is None
+
+
+def test_scan_prefers_two_word_terms_in_spoken_order():
+    hits = lexicon.scan(tokenize("A guinea pig, a dog and polar bears"), "animal")
+    assert [canonical for canonical, _ in hits] == ["guinea pig", "dog", "polar bear"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("seven dollars", [7]),
+    ("twenty one", [21]),
+    ("the seventeenth of October", [17]),
+    ("twenty twenty six", [2026]),
+    ("nineteen fifty", [1950]),
+    ("two thousand and twenty six", [2026]),
+    ("October 17th, 2026", [17, 2026])
+])
+def test_parse_numbers(text, expected):
+    assert [value for value, _ in parse_numbers(tokenize(text))] == expected
+
+
+def test_soundex_and_edit_distance():
+    assert soundex("robert") == soundex("rupert") == "R163"
+    assert edit_distance("tabel", "table", 2) == 1
+    assert edit_distance("kitten", "sitting", 5) == 3
+    # Gives up past the limit
+    assert edit_distance("apple", "penny", 1) == 2
@@ -0,0 +1,29 @@
+from server.services.speech_pipeline import SentenceChunker
+
+
+def test_chunker_yields_complete_sentences():
+    chunker = SentenceChunker()
+    assert chunker.feed("Thank you for sharing that with me. Now, what") == ["Thank you for sharing that with me."]
+    assert chunker.feed(" day of the week is it today? ") == ["Now, what day of the week is it today?"]
+    assert chunker.flush() is None
+
+
+def test_chunker_skips_abbreviations_and_merges_short_fragments():
+    chunker = SentenceChunker()
+    sentences = chunker.feed("Okay. I'm Dr. Smith and I will ask a few questions. ")
+    assert sentences == ["Okay. I'm Dr. Smith and I will ask a few questions."]
+
+
+def test_chunker_flushes_the_unterminated_tail():
+    chunker = SentenceChunker()
+    assert chunker.feed("Take your time") == []
+    assert chunker.flush() == "Take your time"
+    assert chunker.flush() is None
+
+
+def test_chunker_keeps_closing_quotes_with_the_sentence():
+    chunker = SentenceChunker()
+    assert chunker.feed('You said "apple, table, penny." Well done, that is right. ') == [
+        'You said "apple, table, penny."',
+        "Well done, that is right."
+    ]
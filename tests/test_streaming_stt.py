@@ -0,0 +1,61 @@
+import asyncio
+
+from aiohttp import web
+
+from benchmarks.fake_providers import TRANSCRIPTS, create_app
+from server.services.streaming_stt import LiveTranscriptionSession
+
+# Half a second of 16 kHz 16-bit mono audio, what the browser recorder sends
+AUDIO_FRAME = b"\x00" * 16000
+
+
+async def fake_deepgram():
+    """The fake provider server on a free local port, without latency"""
+    runner = web.AppRunner(create_app({"stt_live": {"latency": 0.0}}, seed=1))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+    return runner, f"ws://127.0.0.1:{port}/v1/listen"
+
+
+def test_live_transcription_round_trip():
+    async def run():
+        runner, url = await fake_deepgram()
+        partials = []
+
+        async def on_partial(text):
+            partials.append(text)
+
+        try:
+            session = LiveTranscriptionSession("test-key", on_partial=on_partial, url=url)
+            await session.start()
+            for _ in range(4):
+                await session.send_audio(AUDIO_FRAME)
+                await asyncio.sleep(0.01)
+            transcript = await session.finish()
+        finally:
+            await runner.cleanup()
+        return session, transcript, partials
+
+    session, transcript, partials = asyncio.run(run())
+    expected = TRANSCRIPTS[0]
+    assert transcript == expected
+    assert [word["punctuated_word"] for word in session.words] == expected.split()
+    assert session.started_at is not None
+    # Interim hypotheses arrive while audio is still streaming, then the final one
+    assert len(partials) >= 2
+    assert all(expected.startswith(partial) for partial in partials)
+    assert partials[-1] == expected
+
+
+def test_live_transcription_without_audio_is_empty():
+    async def run():
+        runner, url = await fake_deepgram()
+        try:
+            session = LiveTranscriptionSession("test-key", url=url)
+            await session.start()
+            return await session.finish()
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == ""
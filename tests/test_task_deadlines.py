@@ -0,0 +1,90 @@
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from server.services import task_deadlines
+from server.services.task_deadlines import RETRY_POLICIES, TASK_DEADLINES, retry_with_deadline, stamp_deadline
+
+REPLY_TASK = "server.tasks.doctor_conversation.generate_doctor_response"
+REPORT_TASK = "server.tasks.ai_processing.analyze_cognitive_assessment"
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    """Retry/drop counts, recorded here instead of in Redis"""
+    recorded = []
+    monkeypatch.setattr(task_deadlines, "_count", lambda *key: recorded.append(key))
+    return recorded
+
+
+def fake_task(name=REPLY_TASK, retries=0, max_retries=3, deadline=None):
+    headers = {"deadline": deadline} if deadline is not None else {}
+    return SimpleNamespace(
+        name=name,
+        max_retries=max_retries,
+        request=SimpleNamespace(retries=retries, headers=headers),
+        retry=lambda exc, countdown, throw: ("retry", countdown)
+    )
+
+
+def test_stamp_deadline_uses_the_queue_class_budget():
+    now = 1000.0
+    interactive = {"task": REPLY_TASK}
+    batch = {"task": REPORT_TASK}
+    stamp_deadline(interactive, now)
+    stamp_deadline(batch, now)
+    assert interactive["deadline"] == now + TASK_DEADLINES["interactive"]
+    assert batch["deadline"] == now + TASK_DEADLINES["batch"]
+    expires = datetime.fromisoformat(interactive["expires"])
+    assert expires.timestamp() == pytest.approx(interactive["deadline"])
+
+
+def test_stamp_deadline_inherits_the_parent_deadline():
+    parent = SimpleNamespace(deadline=None, headers={"deadline": 1234.5})
+    headers = {"task": REPORT_TASK}
+    stamp_deadline(headers, 1000.0, parent)
+    assert headers["deadline"] == 1234.5
+
+
+def test_stamp_deadline_keeps_an_explicit_deadline_and_expiry():
+    headers = {"task": REPLY_TASK, "deadline": 1100, "expires": "2030-01-01T00:00:00+00:00"}
+    stamp_deadline(headers, 1000.0)
+    assert headers["deadline"] == 1100.0
+    assert headers["expires"] == "2030-01-01T00:00:00+00:00"
+
+
+def test_retry_within_the_deadline(counts):
+    task = fake_task(retries=2, deadline=time.time() + 60)
+    outcome = retry_with_deadline(task, ValueError("upstream 503"))
+    base, cap, _ = RETRY_POLICIES["interactive"]
+    assert outcome[0] == "retry"
+    assert 0 <= outcome[1] <= min(cap, base * 4)
+    assert counts == [("retries", "generate_doctor_response", "")]
+
+
+def test_retry_after_is_a_minimum_wait(counts):
+    task = fake_task(deadline=time.time() + 60)
+    assert retry_with_deadline(task, ValueError("429"), countdown=1.5) == ("retry", 1.5)
+
+
+def test_no_retry_without_budget(counts):
+    error = ValueError("upstream 503")
+    task = fake_task(deadline=time.time() + 0.5)
+    assert retry_with_deadline(task, error) is error
+    assert counts == [("dropped", "generate_doctor_response", "no_budget")]
+
+
+def test_no_retry_once_retries_are_exhausted(counts):
+    error = ValueError("upstream 503")
+    task = fake_task(retries=3, deadline=time.time() + 60)
+    assert retry_with_deadline(task, error) is error
+    assert counts == [("dropped", "generate_doctor_response", "exhausted")]
+
+
+def test_retry_without_a_deadline_header(counts):
+    task = fake_task(name=REPORT_TASK)
+    outcome = retry_with_deadline(task, ValueError("timeout"))
+    assert outcome[0] == "retry"
+    assert outcome[1] <= RETRY_POLICIES["batch"][1]